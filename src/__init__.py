@@ -2,14 +2,16 @@
 # Use of this source code is governed by an MIT license
 # that can be found in the LICENSE file.
 
-import os
+import os, shutil
+from concurrent.futures import ThreadPoolExecutor
 
 from .ast import sym, type
 from . import (
-    ast, token, prefs, report, utils,
+    ast, token, prefs, report, utils, cache, parallel, consteval, library,
+    source,
 
     # stages
-    parser, resolver, checker, codegen
+    parser, register, resolver, checker, codegen
 )
 
 from .codegen import c
@@ -43,7 +45,22 @@ class Compiler:
 		self.error_t = type.Type(self.universe[19])
 		self.no_return_t = type.Type(self.universe[20])
 
+		# Canonical instances of the resolved types, the primitive types above
+		# are interned first.
+		self.type_table = type.TypeTable()
+		for typ in (
+		    self.void_t, self.none_t, self.bool_t, self.rune_t, self.int8_t,
+		    self.int16_t, self.int32_t, self.int64_t, self.isize_t,
+		    self.uint8_t, self.uint16_t, self.uint32_t, self.uint64_t,
+		    self.usize_t, self.untyped_int_t, self.untyped_float_t,
+		    self.float32_t, self.float64_t, self.str_t, self.error_t,
+		    self.no_return_t
+		):
+			self.type_table.intern(typ)
+
+		self.args = args
 		self.prefs = prefs.Prefs(args)
+		self.core_files = [] # see `build_core`
 		self.source_files = []
 		self.extern_packages = [
 		    ast.ExternPkgInfo("core"),
@@ -51,6 +68,9 @@ class Compiler:
 		]
 
 		self.pointer_size = 8 if self.prefs.target_bits == prefs.Bits.X64 else 4
+		self.int_bits_table = sym.int_bits_table(
+		    32 if self.prefs.target_bits == prefs.Bits.X32 else 64
+		)
 
 		self.core_pkg = None
 		self.str_struct = None # from `core` package
@@ -62,27 +82,75 @@ class Compiler:
 		self.pkg_sym = None
 		self.pkg_attrs = None
 		self.mod_sym = None # for `mod mod_name;`
-
+		self.errtype_nr = 1
+		self.libs = [] # loaded by `extern pkg`, see `library.load`
+		# the numbers used by `core`, see `library.renumber`
+		self.core_symbol_count = 0
+		self.core_errtype_nr = 1
+
+		self.parse_cache = cache.ParseCache(
+		    self
+		) if self.prefs.parse_cache else None
+		self.parse_pool = None # with `-j N`, see `parse_files`
+		self.core_snapshot = cache.CoreSnapshot(self) if (
+		    self.prefs.core_snapshot and not self.prefs.check_syntax
+		) else None
+		self.build_manifest = cache.BuildManifest(self) if (
+		    self.prefs.build_cache and not (
+		        self.prefs.check_syntax or self.prefs.check
+		        or self.prefs.emit_rir
+		    )
+		) else None
+		# files read by the build besides the sources, see `BuildManifest`
+		self.build_deps = []
+		self.object_cache = cache.ObjectCache(
+		    self
+		) if self.prefs.object_cache else None
+
+		# values of the `#[if(...)]` conditions, see `prune_decls`
+		self.comptime_conds = {}
+
+		self.init_stages()
+
+	def init_stages(self):
+		# the stages keep some of the primitive types, they are created
+		# again when the core snapshot replaces them
+		self.const_eval = consteval.ConstEval(self)
 		self.resolver = resolver.Resolver(self)
 		self.checker = checker.Checker(self)
+		self.type_names = codegen.TypeNames()
 		self.ast2rir = codegen.AST2RIR(self)
 		self.cgen = c.Gen(self)
 
 	def build_package(self):
-		self.parse_files()
-		if not self.prefs.check_syntax:
+		if self.build_manifest and self.build_manifest.is_up_to_date():
+			self.vlog(f"package `{self.prefs.pkg_name}` is up to date")
+			return
+		self.build_core()
+		self.core_symbol_count = sym.SYMBOL_COUNT
+		self.core_errtype_nr = self.errtype_nr
+		if self.prefs.pkg_name != "core":
+			# registered before its files are parsed, see `in_core_pkg`
+			self.pkg_sym = register.Register(self).add_pkg(self.prefs.pkg_name)
+		self.parse_files(self.prefs.inputs)
+		if self.prefs.check_syntax:
+			self.shutdown_parse_pool()
+		else:
 			self.resolver.resolve_files(self.source_files)
+			# all the modules are loaded at this point
+			self.shutdown_parse_pool()
 			if report.ERRORS > 0:
 				self.abort()
 
-			self.load_core_pkg()
-
 			self.checker.check_files(self.source_files)
+			self.checker.check_main_fn()
 			if report.ERRORS > 0:
 				self.abort()
 
 			if not self.prefs.check:
-				unique_rir = self.ast2rir.convert(self.source_files)
+				unique_rir = self.ast2rir.convert(
+				    self.core_files, self.source_files
+				)
 				if report.ERRORS > 0:
 					self.abort()
 				if self.prefs.emit_rir:
@@ -92,31 +160,177 @@ class Compiler:
 					self.check_pkg_attrs()
 					if self.prefs.target_backend == prefs.Backend.C:
 						self.cgen.gen(unique_rir)
-						c_file = f"{self.prefs.pkg_name}.ri.c"
-						self.cgen.write_to_file(c_file)
-						args = [
-						    self.prefs.ccompiler, c_file,
-						    *self.prefs.objects_to_link, "-fno-builtin",
-						    "-Werror", "-m64" if self.prefs.target_bits
-						    == prefs.Bits.X64 else "-m32",
-						    *[f"-l{l}" for l in self.prefs.library_to_link],
-						    *[f"-L{l}" for l in self.prefs.library_path], "-o",
-						    self.prefs.pkg_output,
-						]
-						if self.prefs.build_mode == prefs.BuildMode.Release:
-							args.append("-flto")
-							args.append("-O3")
+						if self.prefs.split_c:
+							c_files = self.cgen.write_units(
+							    f"{self.prefs.pkg_name}.ri.d"
+							)
 						else:
-							args.append("-g")
-						self.vlog(f"C compiler options: {args}")
-						res = utils.execute(*args)
-						if res.exit_code == 0:
-							if not self.prefs.keep_c:
-								os.remove(c_file)
+							c_file = f"{self.prefs.pkg_name}.ri.c"
+							self.cgen.write_to_file(c_file)
+							c_files = [c_file]
+						if self.prefs.pkg_type == prefs.PkgType.Lib:
+							self.build_lib(c_files)
 						else:
-							utils.error(
-							    f"error while compiling the output C file `{c_file}`:\n{res.err}"
-							)
+							self.build_bin(c_files)
+						if self.object_cache:
+							self.object_cache.trim()
+		# the files of the package are not used anymore, this also closes
+		# the memory-mapped ones
+		source.clear()
+
+	def c_options(self):
+		options = [
+		    "-fno-builtin", "-Werror",
+		    "-m64" if self.prefs.target_bits == prefs.Bits.X64 else "-m32"
+		]
+		if self.prefs.build_mode == prefs.BuildMode.Release:
+			options.append("-O3")
+		else:
+			options.append("-g")
+		return options
+
+	def compile_c(
+	    self, c_file, options, obj_file, preprocess = False, headers = ()
+	):
+		if self.object_cache:
+			return self.object_cache.compile(
+			    c_file, options, obj_file, preprocess, headers
+			)
+		return utils.execute(
+		    self.prefs.ccompiler, c_file, *options, "-c", "-o", obj_file
+		)
+
+	def compile_c_files(self, c_files, options):
+		# With `--split-c`, the files are compiled by `-j` threads, each one
+		# waiting for its C compiler process. Returns the object files.
+		self.vlog(f"C compiler options: {options}")
+		headers = []
+		if self.prefs.split_c:
+			headers.append(
+			    os.path.join(
+			        os.path.dirname(c_files[0]), f"{self.prefs.pkg_name}.h"
+			    )
+			)
+		obj_files = [f"{c_file[:-2]}.o" for c_file in c_files]
+		with ThreadPoolExecutor(self.prefs.jobs) as pool:
+			results = list(
+			    pool.map(
+			        lambda c_file, obj_file: self.
+			        compile_c(c_file, options, obj_file, headers = headers),
+			        c_files, obj_files
+			    )
+			)
+		for c_file, res in zip(c_files, results):
+			if res.exit_code != 0:
+				utils.error(
+				    f"error while compiling the output C file `{c_file}`:\n{res.err}"
+				)
+		return obj_files
+
+	def remove_c_files(self, c_files, obj_files):
+		for obj_file in obj_files:
+			os.remove(obj_file)
+		if self.prefs.keep_c:
+			return
+		if self.prefs.split_c:
+			shutil.rmtree(os.path.dirname(c_files[0]))
+		else:
+			for c_file in c_files:
+				os.remove(c_file)
+
+	def build_bin(self, c_files):
+		options = self.c_options()
+		if self.prefs.build_mode == prefs.BuildMode.Release:
+			options.append("-flto")
+		obj_files = self.compile_c_files(c_files, options)
+		args = [
+		    self.prefs.ccompiler, *obj_files, *self.prefs.objects_to_link,
+		    # the dependents of a static library come first
+		    *[f"-l{lib.name}" for lib in reversed(self.libs)],
+		    *[f"-l{l}" for l in self.prefs.library_to_link],
+		    *[f"-L{l}" for l in self.prefs.library_path],
+		    "-m64" if self.prefs.target_bits == prefs.Bits.X64 else "-m32"
+		]
+		if self.prefs.build_mode == prefs.BuildMode.Release:
+			# the link-time optimization uses `-j` processes too
+			args.append(
+			    "-flto" if self.prefs.jobs == 1 else f"-flto={self.prefs.jobs}"
+			)
+			args.append("-O3")
+		args += ["-o", self.prefs.pkg_output]
+		self.vlog(f"linker options: {args}")
+		res = utils.execute(*args)
+		self.remove_c_files(c_files, obj_files)
+		if res.exit_code != 0:
+			utils.error(f"error while linking `{self.prefs.pkg_output}`:\n{res.err}")
+		outputs = [self.prefs.pkg_output]
+		if self.prefs.keep_c:
+			outputs += c_files
+		self.store_build_manifest(outputs)
+
+	def store_build_manifest(self, outputs):
+		# the warnings would not be reported again
+		if self.build_manifest and report.WARNS == 0:
+			self.build_manifest.store(outputs)
+
+	# A library is compiled into a static archive with its interface next to
+	# it, in `library.LIBS_DIR`, see `library.store`.
+	def build_lib(self, c_files):
+		obj_files = self.compile_c_files(c_files, self.c_options())
+		os.makedirs(library.LIBS_DIR, exist_ok = True)
+		archive = library.archive_file(library.LIBS_DIR, self.prefs.pkg_name)
+		if os.path.exists(archive):
+			os.remove(archive)
+		res = utils.execute(
+		    "ar", "rcs", archive, *obj_files, *self.prefs.objects_to_link
+		)
+		self.remove_c_files(c_files, obj_files)
+		if res.exit_code != 0:
+			utils.error(f"error while creating the archive `{archive}`:\n{res.err}")
+		library.store(self, library.LIBS_DIR)
+		self.vlog(f"library `{self.prefs.pkg_name}` stored in `{library.LIBS_DIR}`")
+		outputs = [
+		    archive,
+		    library.interface_file(library.LIBS_DIR, self.prefs.pkg_name)
+		]
+		if self.prefs.keep_c:
+			outputs += c_files
+		self.store_build_manifest(outputs)
+
+	# Parses, resolves and checks the files of `core` before those of the
+	# package, or loads them from the snapshot stored by a previous build.
+	# Both share the same package when the package is named `core`, the
+	# default for now, see `Prefs.pkg_name`.
+	def build_core(self):
+		if self.core_snapshot and self.core_snapshot.load():
+			self.vlog("core snapshot: loaded")
+			self.init_stages()
+			self.load_core_pkg()
+			return
+		warns = report.WARNS
+		self.parse_files(self.prefs.core_inputs)
+		if not self.prefs.check_syntax:
+			self.resolver.resolve_files(self.source_files)
+			if report.ERRORS > 0:
+				self.abort()
+			self.load_core_pkg()
+			self.checker.check_files(self.source_files)
+			if report.ERRORS > 0:
+				self.abort()
+		self.core_files = self.source_files
+		self.source_files = []
+		# the package is checked by new stages, like after loading the
+		# snapshot
+		self.init_stages()
+		# the warnings of `core` would not be reported again
+		if self.core_snapshot and report.WARNS == warns:
+			self.core_snapshot.store()
+			self.vlog("core snapshot: stored")
+
+	# Whether the files being parsed belong to `core`; its package is
+	# registered after its files are parsed.
+	def in_core_pkg(self):
+		return self.pkg_sym == None or self.pkg_sym.is_core
 
 	def load_core_pkg(self):
 		if core_pkg := self.universe.find("core"):
@@ -149,26 +363,28 @@ class Compiler:
 				if not os.path.exists(pkg_folder):
 					os.mkdir(pkg_folder)
 				cfile = os.path.realpath(attr.args[0].expr.lit)
+				options = [
+				    "-m64" if self.prefs.target_bits == prefs.Bits.X64 else
+				    "-m32", "-O3"
+				    if self.prefs.build_mode == prefs.BuildMode.Release else "-g"
+				]
+				# the headers are stamped in the build manifest too
+				deps = cache.c_deps(self.prefs.ccompiler, cfile, options)
+				self.build_deps.extend(deps)
 				objfile = os.path.join(
 				    pkg_folder,
 				    f"{os.path.basename(cfile)}.{self.get_postfix()}.o"
 				)
 				self.prefs.objects_to_link.append(objfile)
-				msg = f"c_compile: compiling object for C file `{cfile}`..."
-				if os.path.exists(objfile):
-					if os.path.getmtime(objfile) < os.path.getmtime(cfile):
-						msg = f"c_compile: {objfile} is older than {cfile}, rebuilding..."
-					else:
-						continue
-				self.vlog(msg)
-				args = [
-				    self.prefs.ccompiler, cfile, "-m64"
-				    if self.prefs.target_bits == prefs.Bits.X64 else "-m32",
-				    "-O3" if self.prefs.build_mode == prefs.BuildMode.Release
-				    else "-g", f'-L{os.path.dirname(cfile)}', "-c", "-o",
-				    objfile,
-				]
-				res = utils.execute(*args)
+				if self.object_cache == None and os.path.exists(
+				    objfile
+				) and os.path.getmtime(objfile) >= max(
+				    os.path.getmtime(dep) for dep in deps
+				):
+					continue
+				self.vlog(f"c_compile: compiling object for C file `{cfile}`...")
+				# the key of the object cache includes the headers of the file
+				res = self.compile_c(cfile, options, objfile, True)
 				if res.exit_code != 0:
 					utils.error(
 					    f"error while compiling the object file `{objfile}`:\n{res.err}"
@@ -198,8 +414,15 @@ class Compiler:
 		postfix += f"-{self.prefs.ccompiler}"
 		return postfix
 
-	def parse_files(self):
-		self.source_files = parser.Parser(self).parse_pkg()
+	def parse_files(self, inputs):
+		if self.prefs.jobs > 1 and self.parse_pool == None:
+			self.parse_pool = parallel.ParsePool(self)
+		self.source_files = parser.Parser(self).parse_pkg(inputs)
+		if self.parse_cache:
+			self.vlog(
+			    f"parse cache: {self.parse_cache.hits} hits, {self.parse_cache.misses} misses"
+			)
+			self.parse_cache.evict()
 		if report.ERRORS > 0:
 			self.abort()
 
@@ -208,22 +431,16 @@ class Compiler:
 		return self.is_int(typ) or self.is_float(typ)
 
 	def is_int(self, typ):
-		return self.is_signed_int(typ) or self.is_unsigned_int(typ)
+		return isinstance(typ, type.Type) and sym.IS_INT[typ.sym.kind]
 
 	def is_signed_int(self, typ):
-		return typ in (
-		    self.int8_t, self.int16_t, self.int32_t, self.int64_t, self.isize_t,
-		    self.untyped_int_t
-		)
+		return isinstance(typ, type.Type) and sym.IS_SIGNED_INT[typ.sym.kind]
 
 	def is_unsigned_int(self, typ):
-		return typ in (
-		    self.uint8_t, self.uint16_t, self.uint32_t, self.uint64_t,
-		    self.usize_t
-		)
+		return isinstance(typ, type.Type) and sym.IS_UNSIGNED_INT[typ.sym.kind]
 
 	def is_float(self, typ):
-		return typ in (self.float32_t, self.float64_t, self.untyped_float_t)
+		return isinstance(typ, type.Type) and sym.IS_FLOAT[typ.sym.kind]
 
 	def untyped_to_type(self, typ):
 		if typ == self.untyped_int_t:
@@ -238,30 +455,10 @@ class Compiler:
 		return self.float_bits(typ)
 
 	def int_bits(self, typ):
-		typ_sym = typ.get_sym()
-		if typ_sym.kind == sym.TypeKind.UntypedInt:
-			return 75 # only for checker
-		elif typ_sym.kind in (sym.TypeKind.Int8, sym.TypeKind.Uint8):
-			return 8
-		elif typ_sym.kind in (sym.TypeKind.Int16, sym.TypeKind.Uint16):
-			return 16
-		elif typ_sym.kind in (sym.TypeKind.Int32, sym.TypeKind.Uint32):
-			return 32
-		elif typ_sym.kind in (sym.TypeKind.Int64, sym.TypeKind.Uint64):
-			return 64
-		elif typ_sym.kind in (sym.TypeKind.Isize, sym.TypeKind.Usize):
-			return 32 if self.prefs.target_bits == prefs.Bits.X32 else 64
-		else:
-			return -1
+		return self.int_bits_table[typ.get_sym().kind]
 
 	def float_bits(self, typ):
-		typ_sym = typ.get_sym()
-		if typ_sym.kind == sym.TypeKind.Float32:
-			return 32
-		elif typ_sym.kind in (sym.TypeKind.Float64, sym.TypeKind.UntypedFloat):
-			return 64
-		else:
-			return -1
+		return sym.FLOAT_BITS[typ.get_sym().kind]
 
 	# Returns the size and alignment (in bytes) of `typ`, similarly to
 	# C's `sizeof(T)` and `_Alignof(T)`.
@@ -348,6 +545,42 @@ class Compiler:
 	def round_up(self, n, multiple):
 		return (n + multiple - 1) & (-multiple)
 
+	# Removes the declarations disabled by `#[if(cond)]` from `decls`, the
+	# later stages never see them. Each distinct condition is evaluated
+	# only once.
+	def prune_decls(self, decls):
+		pruned = []
+		for decl in decls:
+			if not decl.__class__ in (
+			    ast.TestDecl, ast.ExternPkg, ast.DestructorDecl
+			):
+				if if_attr := decl.attrs.find("if"):
+					if not self.comptime_cond_value(if_attr.args[0].expr):
+						continue
+			if isinstance(decl, ast.ExternDecl):
+				decl.protos = self.prune_decls(decl.protos)
+			elif isinstance(decl, (
+			    ast.ModDecl, ast.TraitDecl, ast.UnionDecl, ast.EnumDecl,
+			    ast.StructDecl, ast.ExtendDecl
+			)):
+				decl.decls = self.prune_decls(decl.decls)
+			pruned.append(decl)
+		return pruned
+
+	def comptime_cond_value(self, cond):
+		# the target and the flags don't change during the build, the value
+		# only depends on the text of the condition
+		key = str(cond)
+		if key in self.comptime_conds:
+			return self.comptime_conds[key]
+		errors = report.ERRORS
+		value = self.evalue_comptime_condition(cond)
+		# invalid conditions are evaluated again, to report their errors at
+		# each position
+		if report.ERRORS == errors:
+			self.comptime_conds[key] = value
+		return value
+
 	def evalue_comptime_condition(self, cond):
 		if isinstance(cond, ast.BoolLiteral):
 			return cond.lit
@@ -406,7 +639,24 @@ class Compiler:
 		if self.prefs.is_verbose:
 			utils.eprint(">>", msg)
 
+	def print_stats(self):
+		instances = self.universe.instances
+		utils.eprint("statistics:")
+		utils.eprint(
+		    f"  composite types: {instances.created} created, {instances.reused} reused"
+		)
+		if self.object_cache:
+			utils.eprint(
+			    f"  object cache: {self.object_cache.hits} hits, {self.object_cache.misses} misses"
+			)
+
+	def shutdown_parse_pool(self):
+		if self.parse_pool:
+			self.parse_pool.shutdown()
+			self.parse_pool = None
+
 	def abort(self):
+		self.shutdown_parse_pool()
 		if report.ERRORS == 1:
 			msg = f"could not compile package `{self.prefs.pkg_name}`, aborting due to previous error"
 		else:
@@ -419,4 +669,12 @@ class Compiler:
 
 def main(args):
 	comp = Compiler(args)
+	if comp.prefs.evict_object_cache != None:
+		removed = cache.ObjectCache(comp).evict(
+		    comp.prefs.evict_object_cache, comp.prefs.evict_object_cache
+		)
+		comp.vlog(f"object cache: {removed} entries removed")
+		return
 	comp.build_package()
+	if comp.prefs.stats:
+		comp.print_stats()
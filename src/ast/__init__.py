@@ -2,6 +2,7 @@
 # Use of this source code is governed by an MIT license
 # that can be found in the LICENSE file.
 
+import re
 from enum import IntEnum as Enum, auto as auto_enum
 
 COMPTIME_CONSTANTS = [
@@ -13,6 +14,8 @@ def is_comptime_constant(name):
 	return name in COMPTIME_CONSTANTS
 
 class ExternPkgInfo:
+	__slots__ = ("name", "deps")
+
 	def __init__(self, name, deps = list()):
 		self.name = name
 		self.deps = deps
@@ -21,6 +24,8 @@ class ExternPkgInfo:
 		self.deps.append(dep)
 
 class SourceFile:
+	__slots__ = ("file", "mod_sym", "decls", "imported_symbols")
+
 	def __init__(self, file, decls, mod_sym):
 		self.file = file
 		self.mod_sym = mod_sym
@@ -52,6 +57,8 @@ class Visibility(Enum):
 
 # Used in `let` stmts and guard exprs
 class VarDecl:
+	__slots__ = ("is_mut", "is_ref", "name", "has_typ", "typ", "pos")
+
 	def __init__(self, is_mut, is_ref, name, has_typ, typ, pos):
 		self.is_mut = is_mut
 		self.is_ref = is_ref
@@ -76,10 +83,14 @@ class VarDecl:
 
 # ---- Declarations ----
 class EmptyDecl:
+	__slots__ = ("attrs",)
+
 	def __init__(self):
 		self.attrs = Attrs()
 
 class DocComment:
+	__slots__ = ("lines", "pos")
+
 	def __init__(self, lines, pos):
 		self.lines = lines
 		self.pos = pos
@@ -98,12 +109,16 @@ class DocComment:
 		return res
 
 class AttrArg:
+	__slots__ = ("name", "expr", "is_named")
+
 	def __init__(self, name, expr):
 		self.name = name
 		self.expr = expr
 		self.is_named = name != ""
 
 class Attr:
+	__slots__ = ("name", "args", "pos")
+
 	def __init__(self, name, args, pos):
 		self.name = name
 		self.args = args
@@ -116,9 +131,10 @@ class Attr:
 		return None
 
 class Attrs:
+	__slots__ = ("attrs", )
+
 	def __init__(self):
 		self.attrs = []
-		self.if_check = True
 
 	def add(self, attr):
 		self.attrs.append(attr)
@@ -138,12 +154,16 @@ class Attrs:
 		return len(self.attrs) > 0
 
 class ExternPkg:
+	__slots__ = ("attrs", "pkg_name", "pos")
+
 	def __init__(self, pkg_name, pos):
 		self.attrs = Attrs()
 		self.pkg_name = pkg_name
 		self.pos = pos
 
 class UsingDecl:
+	__slots__ = ("attrs", "path", "alias", "symbols")
+
 	def __init__(self, attrs, path, alias, symbols):
 		self.attrs = attrs
 		self.path = path
@@ -151,6 +171,8 @@ class UsingDecl:
 		self.symbols = symbols
 
 class UsingSymbol:
+	__slots__ = ("name", "alias", "is_self", "pos")
+
 	def __init__(self, name, alias, is_self, pos):
 		self.name = name
 		self.alias = alias
@@ -158,6 +180,8 @@ class UsingSymbol:
 		self.pos = pos
 
 class ExternDecl:
+	__slots__ = ("attrs", "abi", "protos", "pos")
+
 	def __init__(self, attrs, abi, protos, pos):
 		self.attrs = attrs
 		self.abi = abi
@@ -165,6 +189,10 @@ class ExternDecl:
 		self.pos = pos
 
 class ConstDecl:
+	__slots__ = (
+	    "doc_comment", "attrs", "vis", "name", "typ", "expr", "sym", "pos"
+	)
+
 	def __init__(self, doc_comment, attrs, vis, name, typ, expr, pos):
 		self.doc_comment = doc_comment
 		self.attrs = attrs
@@ -176,6 +204,11 @@ class ConstDecl:
 		self.pos = pos
 
 class StaticDecl:
+	__slots__ = (
+	    "doc_comment", "attrs", "vis", "is_extern", "is_mut", "name", "typ",
+	    "expr", "sym", "pos"
+	)
+
 	def __init__(
 	    self, doc_comment, attrs, vis, is_extern, is_mut, name, typ, expr, pos
 	):
@@ -191,6 +224,11 @@ class StaticDecl:
 		self.pos = pos
 
 class ModDecl:
+	__slots__ = (
+	    "doc_comment", "attrs", "name", "vis", "decls", "sym", "is_unloaded",
+	    "pos"
+	)
+
 	def __init__(self, doc_comment, attrs, name, vis, decls, is_unloaded, pos):
 		self.doc_comment = doc_comment
 		self.attrs = attrs
@@ -202,6 +240,8 @@ class ModDecl:
 		self.pos = pos
 
 class TypeDecl:
+	__slots__ = ("doc_comment", "attrs", "vis", "name", "parent", "pos")
+
 	def __init__(self, doc_comment, attrs, vis, name, parent, pos):
 		self.doc_comment = doc_comment
 		self.attrs = attrs
@@ -211,6 +251,8 @@ class TypeDecl:
 		self.pos = pos
 
 class ErrTypeDecl:
+	__slots__ = ("doc_comment", "attrs", "vis", "name", "pos")
+
 	def __init__(self, doc_comment, attrs, vis, name, pos):
 		self.doc_comment = doc_comment
 		self.attrs = attrs
@@ -219,6 +261,8 @@ class ErrTypeDecl:
 		self.pos = pos
 
 class TraitDecl:
+	__slots__ = ("doc_comment", "attrs", "vis", "name", "decls", "pos")
+
 	def __init__(self, doc_comment, attrs, vis, name, decls, pos):
 		self.doc_comment = doc_comment
 		self.attrs = attrs
@@ -228,6 +272,10 @@ class TraitDecl:
 		self.pos = pos
 
 class UnionDecl:
+	__slots__ = (
+	    "doc_comment", "attrs", "vis", "name", "variants", "decls", "sym", "pos"
+	)
+
 	def __init__(self, doc_comment, attrs, vis, name, variants, decls, pos):
 		self.doc_comment = doc_comment
 		self.attrs = attrs
@@ -239,6 +287,11 @@ class UnionDecl:
 		self.pos = pos
 
 class StructField:
+	__slots__ = (
+	    "doc_comment", "attrs", "vis", "is_mut", "name", "typ", "def_expr",
+	    "has_def_expr", "pos"
+	)
+
 	def __init__(
 	    self, attrs, doc_comment, vis, is_mut, name, typ, def_expr,
 	    has_def_expr, pos
@@ -254,6 +307,11 @@ class StructField:
 		self.pos = pos
 
 class StructDecl:
+	__slots__ = (
+	    "doc_comment", "attrs", "vis", "name", "decls", "is_opaque", "sym",
+	    "pos"
+	)
+
 	def __init__(self, doc_comment, attrs, vis, name, decls, is_opaque, pos):
 		self.doc_comment = doc_comment
 		self.attrs = attrs
@@ -265,6 +323,11 @@ class StructDecl:
 		self.pos = pos
 
 class EnumDecl:
+	__slots__ = (
+	    "doc_comment", "attrs", "vis", "name", "underlying_typ", "variants",
+	    "decls", "sym", "pos"
+	)
+
 	def __init__(
 	    self, doc_comment, attrs, vis, name, underlying_typ, variants, decls,
 	    pos
@@ -280,6 +343,8 @@ class EnumDecl:
 		self.pos = pos
 
 class ExtendDecl:
+	__slots__ = ("attrs", "typ", "is_for_trait", "for_trait", "decls", "pos")
+
 	def __init__(self, attrs, typ, is_for_trait, for_trait, decls, pos):
 		self.attrs = attrs
 		self.typ = typ
@@ -289,11 +354,18 @@ class ExtendDecl:
 		self.pos = pos
 
 class FnDecl:
+	__slots__ = (
+	    "doc_comment", "attrs", "vis", "abi", "name", "name_pos", "args",
+	    "self_is_ref", "self_is_mut", "self_typ", "is_extern", "is_unsafe",
+	    "is_method", "is_variadic", "is_main", "ret_typ", "has_named_args",
+	    "has_body", "sym", "scope", "_stmts", "lazy_body"
+	)
+
 	def __init__(
 	    self, doc_comment, attrs, vis, is_extern, is_unsafe, name, name_pos,
 	    args, ret_typ, stmts, scope, has_body = False, is_method = False,
 	    self_is_ref = False, self_is_mut = False, has_named_args = False,
-	    is_main = False, is_variadic = False, abi = None
+	    is_main = False, is_variadic = False, abi = None, lazy_body = None
 	):
 		self.doc_comment = doc_comment
 		self.attrs = attrs
@@ -315,9 +387,25 @@ class FnDecl:
 		self.has_body = has_body
 		self.sym = None
 		self.scope = scope
-		self.stmts = stmts
+		self._stmts = stmts
+		# with `--lazy-bodies`, the body is parsed on first access
+		self.lazy_body = lazy_body
+
+	@property
+	def stmts(self):
+		if self.lazy_body != None:
+			self._stmts = self.lazy_body.parse()
+			self.lazy_body = None
+		return self._stmts
+
+	def __getstate__(self):
+		# the body is parsed before being serialized
+		self.stmts
+		return None, {name: getattr(self, name) for name in FnDecl.__slots__}
 
 class TestDecl:
+	__slots__ = ("name", "stmts", "scope", "pos")
+
 	def __init__(self, scope, name, stmts, pos):
 		self.name = name
 		self.stmts = stmts
@@ -325,6 +413,8 @@ class TestDecl:
 		self.pos = pos
 
 class DestructorDecl:
+	__slots__ = ("stmts", "scope", "self_typ", "pos")
+
 	def __init__(self, scope, stmts, pos):
 		self.stmts = stmts
 		self.scope = scope
@@ -333,6 +423,8 @@ class DestructorDecl:
 
 # ------ Statements --------
 class AssignStmt:
+	__slots__ = ("left", "op", "right", "pos")
+
 	def __init__(self, left, op, right, pos):
 		self.left = left
 		self.op = op
@@ -340,6 +432,8 @@ class AssignStmt:
 		self.pos = pos
 
 class LetStmt:
+	__slots__ = ("lefts", "right", "scope", "pos")
+
 	def __init__(self, scope, lefts, right, pos):
 		self.lefts = lefts
 		self.right = right
@@ -347,11 +441,15 @@ class LetStmt:
 		self.pos = pos
 
 class LabelStmt:
+	__slots__ = ("label", "pos")
+
 	def __init__(self, label, pos):
 		self.label = label
 		self.pos = pos
 
 class WhileStmt:
+	__slots__ = ("cond", "stmt", "is_inf", "pos")
+
 	def __init__(self, cond, stmt, is_inf, pos):
 		self.cond = cond
 		self.stmt = stmt
@@ -359,6 +457,8 @@ class WhileStmt:
 		self.pos = pos
 
 class ForInStmt:
+	__slots__ = ("vars", "iterable", "scope", "stmt", "pos")
+
 	def __init__(self, scope, vars, iterable, stmt, pos):
 		self.vars = vars
 		self.iterable = iterable
@@ -367,11 +467,15 @@ class ForInStmt:
 		self.pos = pos
 
 class GotoStmt:
+	__slots__ = ("label", "pos")
+
 	def __init__(self, label, pos):
 		self.label = label
 		self.pos = pos
 
 class ExprStmt:
+	__slots__ = ("expr", "pos")
+
 	def __init__(self, expr, pos):
 		self.expr = expr
 		self.pos = pos
@@ -384,6 +488,8 @@ class ExprStmt:
 
 # ------ Expressions -------
 class EmptyExpr:
+	__slots__ = ("pos",)
+
 	def __init__(self, pos):
 		self.pos = pos
 
@@ -394,6 +500,8 @@ class EmptyExpr:
 		return self.__repr__()
 
 class TypeNode:
+	__slots__ = ("typ", "pos")
+
 	def __init__(self, typ, pos):
 		self.typ = typ
 		self.pos = pos
@@ -405,6 +513,8 @@ class TypeNode:
 		return self.__repr__()
 
 class PkgExpr:
+	__slots__ = ("pos",)
+
 	def __init__(self, pos):
 		self.pos = pos
 
@@ -415,6 +525,10 @@ class PkgExpr:
 		return self.__repr__()
 
 class Ident:
+	__slots__ = (
+	    "name", "obj", "sym", "is_obj", "is_comptime", "scope", "pos", "typ"
+	)
+
 	def __init__(self, name, pos, scope, is_comptime):
 		self.name = name
 		self.obj = None
@@ -434,6 +548,8 @@ class Ident:
 		return self.__repr__()
 
 class SelfExpr:
+	__slots__ = ("scope", "pos", "typ")
+
 	def __init__(self, scope, pos):
 		self.scope = scope
 		self.pos = pos
@@ -446,6 +562,8 @@ class SelfExpr:
 		return self.__repr__()
 
 class SuperExpr:
+	__slots__ = ("scope", "pos", "typ")
+
 	def __init__(self, scope, pos):
 		self.scope = scope
 		self.pos = pos
@@ -458,9 +576,12 @@ class SuperExpr:
 		return self.__repr__()
 
 class SelfTyExpr:
+	__slots__ = ("scope", "pos", "typ")
+
 	def __init__(self, scope, pos):
 		self.scope = scope
 		self.pos = pos
+		self.typ = None
 
 	def __repr__(self):
 		return "Self"
@@ -469,6 +590,8 @@ class SelfTyExpr:
 		return self.__repr__()
 
 class NoneLiteral:
+	__slots__ = ("pos", "typ")
+
 	def __init__(self, pos):
 		self.pos = pos
 		self.typ = None
@@ -480,6 +603,8 @@ class NoneLiteral:
 		return self.__repr__()
 
 class BoolLiteral:
+	__slots__ = ("lit", "pos", "typ")
+
 	def __init__(self, lit, pos):
 		self.lit = lit
 		self.pos = pos
@@ -492,6 +617,8 @@ class BoolLiteral:
 		return self.__repr__()
 
 class CharLiteral:
+	__slots__ = ("lit", "pos", "is_byte", "typ")
+
 	def __init__(self, lit, pos, is_byte):
 		self.lit = lit
 		self.pos = pos
@@ -506,6 +633,8 @@ class CharLiteral:
 		return self.__repr__()
 
 class IntegerLiteral:
+	__slots__ = ("lit", "pos", "typ")
+
 	def __init__(self, lit, pos):
 		self.lit = lit
 		self.pos = pos
@@ -518,6 +647,8 @@ class IntegerLiteral:
 		return self.__repr__()
 
 class FloatLiteral:
+	__slots__ = ("lit", "pos", "typ")
+
 	def __init__(self, lit, pos):
 		self.lit = lit
 		self.pos = pos
@@ -530,6 +661,8 @@ class FloatLiteral:
 		return self.__repr__()
 
 class StringLiteral:
+	__slots__ = ("lit", "is_raw", "is_bytestr", "is_cstr", "pos", "typ")
+
 	def __init__(self, lit, is_raw, is_bytestr, is_cstr, pos):
 		self.lit = lit
 		self.is_raw = is_raw
@@ -546,6 +679,8 @@ class StringLiteral:
 		return self.__repr__()
 
 class EnumVariantExpr:
+	__slots__ = ("variant", "info", "pos", "typ")
+
 	def __init__(self, variant, pos):
 		self.variant = variant
 		self.info = None
@@ -559,6 +694,8 @@ class EnumVariantExpr:
 		return self.__repr__()
 
 class StructLiteralField:
+	__slots__ = ("name", "expr", "pos", "typ")
+
 	def __init__(self, name, expr, pos):
 		self.name = name
 		self.expr = expr
@@ -572,6 +709,8 @@ class StructLiteralField:
 		return self.__repr__()
 
 class StructLiteral:
+	__slots__ = ("expr", "fields", "pos", "typ")
+
 	def __init__(self, expr, fields, pos):
 		self.expr = expr
 		self.fields = fields
@@ -585,6 +724,8 @@ class StructLiteral:
 		return self.__repr__()
 
 class TupleLiteral:
+	__slots__ = ("exprs", "pos", "typ")
+
 	def __init__(self, exprs, pos):
 		self.exprs = exprs
 		self.pos = pos
@@ -597,6 +738,8 @@ class TupleLiteral:
 		return self.__repr__()
 
 class ArrayLiteral:
+	__slots__ = ("elems", "pos", "typ")
+
 	def __init__(self, elems, pos):
 		self.elems = elems
 		self.pos = pos
@@ -611,6 +754,8 @@ class ArrayLiteral:
 		return self.__repr__()
 
 class CastExpr:
+	__slots__ = ("expr", "pos", "typ")
+
 	def __init__(self, expr, typ, pos):
 		self.expr = expr
 		self.pos = pos
@@ -626,6 +771,10 @@ class GuardExpr:
 	# Examples:
 	# if (let x = optional_or_result_fn()) { ... }
 	# while (let byte = reader.read()) { ... }
+	__slots__ = (
+	    "vars", "expr", "has_cond", "cond", "is_result", "scope", "pos", "typ"
+	)
+
 	def __init__(self, vars, expr, has_cond, cond, scope, pos):
 		self.vars = vars
 		self.expr = expr
@@ -634,6 +783,7 @@ class GuardExpr:
 		self.is_result = False
 		self.scope = scope
 		self.pos = pos
+		self.typ = None
 
 	def __repr__(self):
 		vars_str = f"{', '.join([str(v) for v in self.vars])}"
@@ -646,6 +796,8 @@ class GuardExpr:
 		return self.__repr__()
 
 class UnaryExpr:
+	__slots__ = ("op", "right", "right_typ", "pos", "is_ref_mut", "typ")
+
 	def __init__(self, right, op, is_ref_mut, pos):
 		self.op = op
 		self.right = right
@@ -663,6 +815,8 @@ class UnaryExpr:
 		return self.__repr__()
 
 class BinaryExpr:
+	__slots__ = ("left", "op", "right", "pos", "typ")
+
 	def __init__(self, left, op, right, pos):
 		self.left = left
 		self.op = op
@@ -677,6 +831,8 @@ class BinaryExpr:
 		return self.__repr__()
 
 class PostfixExpr:
+	__slots__ = ("left", "op", "pos", "typ")
+
 	def __init__(self, left, op, pos):
 		self.left = left
 		self.op = op
@@ -690,6 +846,8 @@ class PostfixExpr:
 		return self.__repr__()
 
 class ParExpr:
+	__slots__ = ("expr", "pos", "typ")
+
 	def __init__(self, expr, pos):
 		self.expr = expr
 		self.pos = pos
@@ -699,6 +857,8 @@ class ParExpr:
 		return f"({self.expr})"
 
 class IndexExpr:
+	__slots__ = ("left", "index", "is_mut", "left_typ", "pos", "typ")
+
 	def __init__(self, left, index, is_mut, pos):
 		self.left = left
 		self.index = index
@@ -715,6 +875,11 @@ class IndexExpr:
 		return self.__repr__()
 
 class CallExpr:
+	__slots__ = (
+	    "left", "args", "err_handler", "info", "is_ctor", "is_closure", "pos",
+	    "typ"
+	)
+
 	def __init__(self, left, args, err_handler, pos):
 		self.left = left
 		self.args = args
@@ -753,6 +918,8 @@ class CallExpr:
 		return self.__repr__()
 
 class CallArg:
+	__slots__ = ("expr", "typ", "pos", "name", "is_named")
+
 	def __init__(self, expr, pos, name = ""):
 		self.expr = expr
 		self.typ = None
@@ -769,6 +936,10 @@ class CallArg:
 		return self.__repr__()
 
 class CallErrorHandler:
+	__slots__ = (
+	    "is_propagate", "varname", "varname_pos", "expr", "scope", "pos"
+	)
+
 	def __init__(self, is_propagate, varname, expr, varname_pos, scope, pos):
 		self.is_propagate = is_propagate
 		self.varname = varname
@@ -791,6 +962,10 @@ class CallErrorHandler:
 		return self.__repr__()
 
 class RangeExpr:
+	__slots__ = (
+	    "start", "end", "is_inclusive", "has_start", "has_end", "pos", "typ"
+	)
+
 	def __init__(
 	    self, start, end, is_inclusive, pos, has_start = True, has_end = True
 	):
@@ -814,6 +989,8 @@ class RangeExpr:
 		return self.__repr__()
 
 class BuiltinCallExpr:
+	__slots__ = ("name", "args", "pos", "typ")
+
 	def __init__(self, name, args, pos):
 		self.name = name
 		self.args = args
@@ -827,6 +1004,11 @@ class BuiltinCallExpr:
 		return self.__repr__()
 
 class SelectorExpr:
+	__slots__ = (
+	    "left", "field_name", "field_is_mut", "field_pos", "left_typ",
+	    "is_indirect", "is_nonecheck", "pos", "typ"
+	)
+
 	def __init__(
 	    self, left, field_name, pos, field_pos, is_indirect = False,
 	    is_nonecheck = False
@@ -852,6 +1034,11 @@ class SelectorExpr:
 		return self.__repr__()
 
 class PathExpr:
+	__slots__ = (
+	    "is_global", "left", "left_info", "field_name", "field_info",
+	    "field_pos", "is_last", "has_error", "pos", "typ"
+	)
+
 	def __init__(self, is_global, left, field_name, pos, field_pos):
 		self.is_global = is_global
 		self.left = left
@@ -871,6 +1058,8 @@ class PathExpr:
 		return self.__repr__()
 
 class BranchExpr:
+	__slots__ = ("op", "pos", "typ")
+
 	def __init__(self, op, pos):
 		self.op = op
 		self.pos = pos
@@ -883,6 +1072,8 @@ class BranchExpr:
 		return self.__repr__()
 
 class ReturnExpr:
+	__slots__ = ("expr", "has_expr", "pos", "typ")
+
 	def __init__(self, expr, has_expr, pos):
 		self.expr = expr
 		self.has_expr = has_expr
@@ -898,6 +1089,8 @@ class ReturnExpr:
 		return self.__repr__()
 
 class RaiseExpr:
+	__slots__ = ("expr", "pos", "typ")
+
 	def __init__(self, expr, pos):
 		self.expr = expr
 		self.pos = pos
@@ -910,6 +1103,8 @@ class RaiseExpr:
 		return self.__repr__()
 
 class Block:
+	__slots__ = ("is_unsafe", "stmts", "expr", "is_expr", "typ", "scope", "pos")
+
 	def __init__(self, scope, is_unsafe, stmts, expr, is_expr, pos):
 		self.is_unsafe = is_unsafe
 		self.stmts = stmts
@@ -936,6 +1131,8 @@ class Block:
 		return self.__repr__()
 
 class IfBranch:
+	__slots__ = ("is_comptime", "cond", "expr", "is_else", "op")
+
 	def __init__(self, is_comptime, cond, expr, is_else, op):
 		self.is_comptime = is_comptime
 		self.cond = cond
@@ -953,6 +1150,10 @@ class IfBranch:
 		return self.__repr__()
 
 class IfExpr:
+	__slots__ = (
+	    "is_comptime", "branches", "branch_idx", "has_else", "pos", "typ"
+	)
+
 	def __init__(self, is_comptime, branches, has_else, pos):
 		self.is_comptime = is_comptime
 		self.branches = branches
@@ -968,6 +1169,8 @@ class IfExpr:
 		return self.__repr__()
 
 class MatchBranch:
+	__slots__ = ("pats", "expr", "is_else")
+
 	def __init__(self, pats, expr, is_else):
 		self.pats = pats
 		self.expr = expr
@@ -982,6 +1185,8 @@ class MatchBranch:
 		return self.__repr__()
 
 class MatchExpr:
+	__slots__ = ("expr", "branches", "is_typematch", "pos", "typ")
+
 	def __init__(self, expr, branches, is_typematch, pos):
 		self.expr = expr
 		self.branches = branches
@@ -997,3 +1202,36 @@ class MatchExpr:
 
 	def __str__(self):
 		return self.__repr__()
+
+# Visitors
+
+STMTS = (
+    AssignStmt, LetStmt, LabelStmt, WhileStmt, ForInStmt, GotoStmt, ExprStmt
+)
+
+EXPRS = (
+    EmptyExpr, TypeNode, PkgExpr, Ident, SelfExpr, SuperExpr, SelfTyExpr,
+    NoneLiteral, BoolLiteral, CharLiteral, IntegerLiteral, FloatLiteral,
+    StringLiteral, EnumVariantExpr, StructLiteral, TupleLiteral, ArrayLiteral,
+    CastExpr, GuardExpr, UnaryExpr, BinaryExpr, PostfixExpr, ParExpr,
+    IndexExpr, CallExpr, RangeExpr, BuiltinCallExpr, SelectorExpr, PathExpr,
+    BranchExpr, ReturnExpr, RaiseExpr, Block, IfExpr, MatchExpr
+)
+
+def dispatch_table(visitor, prefix, classes, ignored = ()):
+	# Maps each class of `classes` to the method of `visitor` named after it,
+	# e.g. `check_call_expr` for `CallExpr` with the prefix `check`. A stage
+	# visits a node with a single dict lookup, instead of a chain of
+	# `isinstance` checks. `visitor` must have a method for every class,
+	# except for those of `ignored`, which are mapped to `None`.
+	table = {}
+	for cls in classes:
+		name = prefix + re.sub("([A-Z])", r"_\1", cls.__name__).lower()
+		method = getattr(visitor, name, None)
+		if cls in ignored:
+			assert method == None, f"`{name}` is defined, but ignored"
+			table[cls] = None
+		else:
+			assert method != None, f"`{name}` is not defined"
+			table[cls] = method
+	return table
@@ -8,6 +8,8 @@ from ..ast import Visibility
 from ..utils import CompilerError
 
 class Object:
+	__slots__ = ("name", "is_mut", "is_changed", "is_used", "is_arg", "typ")
+
 	def __init__(self, is_mut, name, typ, is_arg):
 		self.name = name
 		self.is_mut = is_mut
@@ -17,14 +19,18 @@ class Object:
 		self.typ = typ
 
 class Label:
+	__slots__ = ("name",)
+
 	def __init__(self, name):
 		self.name = name
 
 class Scope:
+	__slots__ = ("parent", "detached_from_parent", "objects", "start", "end")
+
 	def __init__(self, start, parent = None):
 		self.parent = parent
 		self.detached_from_parent = False
-		self.objects = []
+		self.objects = {}
 		self.start = start
 		self.end = 0
 
@@ -33,7 +39,7 @@ class Scope:
 			return # ignore special var
 		if self.exists(obj.name):
 			raise CompilerError(f"duplicate object `{obj.name}`")
-		self.objects.append(obj)
+		self.objects[obj.name] = obj
 
 	def exists(self, name):
 		if _ := self.lookup(name):
@@ -43,13 +49,11 @@ class Scope:
 	def lookup(self, name):
 		sc = self
 		while True:
-			for obj in sc.objects:
-				if obj.name == name:
-					return obj
+			if obj := sc.objects.get(name):
+				return obj
 			if sc.dont_lookup_parent():
-				break
+				return None
 			sc = sc.parent
-		return None
 
 	def dont_lookup_parent(self):
 		return self.detached_from_parent or self.parent == None
@@ -87,6 +91,11 @@ def symbol_count():
 	return ret
 
 class Sym:
+	__slots__ = (
+	    "vis", "name", "mangled_name", "qualified_name", "parent", "syms",
+	    "syms_by_name", "index", "is_core", "is_universe", "uses"
+	)
+
 	def __init__(self, vis, name):
 		self.vis = vis
 		self.name = name
@@ -94,8 +103,10 @@ class Sym:
 		self.qualified_name = ""
 		self.parent = None
 		self.syms = []
+		# index of `syms` for `find`, the first symbol with a name wins
+		self.syms_by_name = {}
 		self.index = symbol_count()
-		self.is_core = isinstance(self, Pkg) and self.index == 22
+		self.is_core = isinstance(self, Pkg) and name == "core"
 		self.is_universe = isinstance(self, Pkg) and self.index == 0
 		self.uses = 0
 
@@ -111,7 +122,7 @@ class Sym:
 						raise CompilerError(
 						    f"type `{asym.name}` has duplicate symbol: `{ss.name}`"
 						)
-					asym.syms.append(ss)
+					asym.append_sym(ss)
 				asym.info = sym.info
 				return
 			else:
@@ -119,12 +130,15 @@ class Sym:
 				    f"another symbol with this name already exists: `{sym.name}`"
 				)
 		sym.parent = self
-		self.syms.append(sym)
+		self.append_sym(sym)
 
 	def add_and_return(self, sym):
-		idx = len(self.syms)
+		self.append_sym(sym)
+		return sym
+
+	def append_sym(self, sym):
 		self.syms.append(sym)
-		return self.syms[idx]
+		self.syms_by_name.setdefault(sym.name, sym)
 
 	def add_or_extend_mod(self, sym):
 		if m := self.find(sym.name):
@@ -133,11 +147,17 @@ class Sym:
 		nm.parent = self
 		return nm
 
+	# The `add_or_get_*` methods are called on the universe, the types are
+	# first looked up by their structure in `instances`, then by their name.
+
 	def add_or_get_result(self, elem_typ):
+		key = (TypeKind.Struct, "Result", elem_typ.key())
+		if sym := self.instances.find(key):
+			return sym
 		from ..codegen import mangle_type
 		unique_name = f"Result_{mangle_type(elem_typ)}"
 		if sym := self.find(unique_name):
-			return sym
+			return self.instances.reuse(key, sym)
 		from ..ast import type
 		fields = []
 		if elem_typ != type.Type(self[0]):
@@ -148,66 +168,94 @@ class Sym:
 		fields.append(
 		    Field("err", False, Visibility.Private, type.Type(self[19]))
 		)
-		return self.add_and_return(
-		    Type(
-		        Visibility.Public, unique_name, TypeKind.Struct, fields,
-		        StructInfo(False)
+		return self.instances.add(
+		    key,
+		    self.add_and_return(
+		        Type(
+		            Visibility.Public, unique_name, TypeKind.Struct, fields,
+		            StructInfo(False)
+		        )
 		    )
 		)
 
 	def add_or_get_optional(self, elem_typ):
+		key = (TypeKind.Struct, "Optional", elem_typ.key())
+		if sym := self.instances.find(key):
+			return sym
 		from ..codegen import mangle_type
 		unique_name = f"Optional_{mangle_type(elem_typ)}"
 		if sym := self.find(unique_name):
-			return sym
+			return self.instances.reuse(key, sym)
 		from ..ast import type
-		return self.add_and_return(
-		    Type(
-		        Visibility.Public, unique_name, TypeKind.Struct, [
-		            Field("value", False, Visibility.Private, elem_typ),
-		            Field(
-		                "is_none", False, Visibility.Private,
-		                type.Type(self[2])
-		            )
-		        ], StructInfo(False)
+		return self.instances.add(
+		    key,
+		    self.add_and_return(
+		        Type(
+		            Visibility.Public, unique_name, TypeKind.Struct, [
+		                Field("value", False, Visibility.Private, elem_typ),
+		                Field(
+		                    "is_none", False, Visibility.Private,
+		                    type.Type(self[2])
+		                )
+		            ], StructInfo(False)
+		        )
 		    )
 		)
 
 	def add_or_get_array(self, elem_typ, size):
+		key = (TypeKind.Array, elem_typ.key(), str(size))
+		if sym := self.instances.find(key):
+			return sym
 		unique_name = f"[{elem_typ.qualstr()}; {size}]"
 		if sym := self.find(unique_name):
-			return sym
-		return self.add_and_return(
-		    Type(
-		        Visibility.Public, unique_name, TypeKind.Array,
-		        info = ArrayInfo(elem_typ, size)
+			return self.instances.reuse(key, sym)
+		return self.instances.add(
+		    key,
+		    self.add_and_return(
+		        Type(
+		            Visibility.Public, unique_name, TypeKind.Array,
+		            info = ArrayInfo(elem_typ, size)
+		        )
 		    )
 		)
 
 	def add_or_get_slice(self, elem_typ, is_mut):
+		key = (TypeKind.Slice, elem_typ.key(), is_mut)
+		if sym := self.instances.find(key):
+			return sym
+		# `[T]` and `[mut T]` share the same symbol
 		unique_name = f"[{elem_typ.qualstr()}]"
 		if sym := self.find(unique_name):
-			return sym
+			return self.instances.reuse(key, sym)
 		from ..ast.type import Ptr, Type as type_Type
-		return self.add_and_return(
-		    Type(
-		        Visibility.Public, unique_name, TypeKind.Slice, [
-		            Field(
-		                "ptr", False, Visibility.Public,
-		                Ptr(type_Type(self[0]))
-		            )
-		        ], SliceInfo(elem_typ, is_mut)
+		return self.instances.add(
+		    key,
+		    self.add_and_return(
+		        Type(
+		            Visibility.Public, unique_name, TypeKind.Slice, [
+		                Field(
+		                    "ptr", False, Visibility.Public,
+		                    Ptr(type_Type(self[0]))
+		                )
+		            ], SliceInfo(elem_typ, is_mut)
+		        )
 		    )
 		)
 
 	def add_or_get_tuple(self, types):
+		key = (TypeKind.Tuple, tuple(t.key() for t in types))
+		if sym := self.instances.find(key):
+			return sym
 		unique_name = f"({', '.join([t.qualstr() for t in types])})"
 		if sym := self.find(unique_name):
-			return sym
-		return self.add_and_return(
-		    Type(
-		        Visibility.Public, unique_name, TypeKind.Tuple,
-		        info = TupleInfo(types)
+			return self.instances.reuse(key, sym)
+		return self.instances.add(
+		    key,
+		    self.add_and_return(
+		        Type(
+		            Visibility.Public, unique_name, TypeKind.Tuple,
+		            info = TupleInfo(types)
+		        )
 		    )
 		)
 
@@ -219,10 +267,7 @@ class Sym:
 		return syms
 
 	def find(self, name):
-		for sym in self.syms:
-			if sym.name == name:
-				return sym
-		return None
+		return self.syms_by_name.get(name)
 
 	def exists(self, name):
 		if _ := self.find(name):
@@ -284,22 +329,62 @@ class Sym:
 		return self.syms[idx]
 
 class Pkg(Sym):
-	pass
+	__slots__ = ("instances",)
+
+	def __init__(self, vis, name):
+		Sym.__init__(self, vis, name)
+		self.instances = TypeInstances()
+
+class TypeInstances:
+	# Composite types instantiated in the universe (results, optionals,
+	# arrays, slices and tuples), keyed by the structure of their element
+	# types, see `Sym.add_or_get_result` and the like.
+	__slots__ = ("syms", "created", "reused")
+
+	def __init__(self):
+		self.syms = {}
+		self.created = 0
+		self.reused = 0
+
+	def find(self, key):
+		if sym := self.syms.get(key):
+			self.reused += 1
+		return sym
+
+	def reuse(self, key, sym):
+		self.syms[key] = sym
+		self.reused += 1
+		return sym
+
+	def add(self, key, sym):
+		self.syms[key] = sym
+		self.created += 1
+		return sym
 
 class Mod(Sym):
-	pass
+	__slots__ = ()
 
 class Const(Sym):
+	__slots__ = (
+	    "expr", "evaled_value", "has_evaled_value", "ir_expr", "has_ir_expr",
+	    "typ", "sf", "is_resolved"
+	)
+
 	def __init__(self, vis, name, typ, expr):
 		Sym.__init__(self, vis, name)
 		self.expr = expr
-		self.evaled_expr = None
-		self.has_evaled_expr = False
+		# see `consteval.ConstEval`
+		self.evaled_value = None
+		self.has_evaled_value = False
 		self.ir_expr = None
 		self.has_ir_expr = False
 		self.typ = typ
+		self.sf = None # see `Resolver.resolve_const`
+		self.is_resolved = False
 
 class Static(Sym):
+	__slots__ = ("is_extern", "is_mut", "typ")
+
 	def __init__(self, vis, is_mut, is_extern, name, typ):
 		Sym.__init__(self, vis, name)
 		self.is_extern = is_extern
@@ -307,6 +392,8 @@ class Static(Sym):
 		self.typ = typ
 
 class Field:
+	__slots__ = ("name", "is_mut", "vis", "typ", "has_def_expr", "def_expr")
+
 	def __init__(
 	    self, name, is_mut, vis, typ, has_def_expr = False, def_expr = None
 	):
@@ -424,37 +511,92 @@ class TypeKind(Enum):
 	def __str__(self):
 		return self.__repr__()
 
+# Property tables, indexed by `TypeKind`: indexing a tuple is cheaper than
+# checking the membership of a kind in a tuple of kinds.
+
+def kind_table(values, default = False):
+	table = [default] * (len(TypeKind) + 1)
+	for kind, value in values.items():
+		table[kind] = value
+	return tuple(table)
+
+IS_SIGNED_INT = kind_table(
+    dict.fromkeys((
+        TypeKind.Int8, TypeKind.Int16, TypeKind.Int32, TypeKind.Int64,
+        TypeKind.Isize, TypeKind.UntypedInt
+    ), True)
+)
+IS_UNSIGNED_INT = kind_table(
+    dict.fromkeys((
+        TypeKind.Uint8, TypeKind.Uint16, TypeKind.Uint32, TypeKind.Uint64,
+        TypeKind.Usize
+    ), True)
+)
+IS_INT = tuple(s or u for s, u in zip(IS_SIGNED_INT, IS_UNSIGNED_INT))
+IS_FLOAT = kind_table(
+    dict.fromkeys((
+        TypeKind.Float32, TypeKind.Float64, TypeKind.UntypedFloat
+    ), True)
+)
+
+# `isize` and `usize` depend on the target, see `Compiler.int_bits_table`
+def int_bits_table(target_bits):
+	return kind_table({
+	    TypeKind.Int8: 8, TypeKind.Uint8: 8, TypeKind.Int16: 16,
+	    TypeKind.Uint16: 16, TypeKind.Int32: 32, TypeKind.Uint32: 32,
+	    TypeKind.Int64: 64, TypeKind.Uint64: 64, TypeKind.Isize: target_bits,
+	    TypeKind.Usize: target_bits, TypeKind.UntypedInt: 75 # only for checker
+	}, -1)
+
+FLOAT_BITS = kind_table({
+    TypeKind.Float32: 32, TypeKind.Float64: 64, TypeKind.UntypedFloat: 64
+}, -1)
+
 # Type infos
 
 class AliasInfo:
+	__slots__ = ("parent",)
+
 	def __init__(self, parent):
 		self.parent = parent
 
 class ErrTypeInfo:
+	__slots__ = ("nr",)
+
 	def __init__(self, nr):
 		self.nr = nr
 
 class ArrayInfo:
+	__slots__ = ("elem_typ", "size", "has_wrapper")
+
 	def __init__(self, elem_typ, size):
 		self.elem_typ = elem_typ
 		self.size = size
 		self.has_wrapper = False # for return values in C backend
 
 class SliceInfo:
+	__slots__ = ("elem_typ", "is_mut")
+
 	def __init__(self, elem_typ, is_mut):
 		self.elem_typ = elem_typ
 		self.is_mut = is_mut
 
 class TupleInfo:
+	__slots__ = ("types",)
+
 	def __init__(self, types):
 		self.types = types
 
 class EnumVariant:
-	def __init__(self, name):
+	__slots__ = ("name", "value")
+
+	def __init__(self, name, value):
 		self.name = name
-		self.value = 0
+		self.value = value
 
 class EnumInfo:
+	__slots__ = ("underlying_typ", "variants")
+
 	def __init__(self, underlying_typ, variants):
 		self.underlying_typ = underlying_typ
 		self.variants = variants
@@ -471,6 +613,8 @@ class EnumInfo:
 		return False
 
 class TraitInfo:
+	__slots__ = ("implements", "has_objects")
+
 	def __init__(self):
 		self.implements = []
 		self.has_objects = False
@@ -481,15 +625,21 @@ class TraitInfo:
 		return -1
 
 class UnionInfo:
+	__slots__ = ("variants", "is_c_union")
+
 	def __init__(self, variants, is_c_union):
 		self.variants = variants
 		self.is_c_union = is_c_union # C-like union
 
 class StructInfo:
+	__slots__ = ("is_opaque",)
+
 	def __init__(self, is_opaque):
 		self.is_opaque = is_opaque
 
 class Type(Sym):
+	__slots__ = ("kind", "fields", "info", "size", "align")
+
 	def __init__(self, vis, name, kind, fields = [], info = None):
 		Sym.__init__(self, vis, name)
 		self.kind = kind
@@ -510,6 +660,8 @@ class Type(Sym):
 		return False
 
 class Arg:
+	__slots__ = ("name", "is_self", "typ", "def_expr", "has_def_expr", "pos")
+
 	def __init__(self, name, typ, def_expr, has_def_expr, pos):
 		self.name = name
 		self.is_self = name == "self"
@@ -519,6 +671,12 @@ class Arg:
 		self.pos = pos
 
 class Fn(Sym):
+	__slots__ = (
+	    "abi", "is_extern", "is_unsafe", "is_method", "is_variadic", "self_typ",
+	    "rec_is_mut", "rec_is_ref", "args", "ret_typ", "has_named_args",
+	    "has_body", "name_pos", "is_main"
+	)
+
 	def __init__(
 	    self, abi, vis, is_extern, is_unsafe, is_method, is_variadic, name,
 	    args, ret_typ, has_named_args, has_body, name_pos, rec_is_mut,
@@ -6,15 +6,51 @@ from .. import token
 from . import Visibility
 from .sym import TypeKind, Fn as FnInfo, Arg
 
-class _Ptr: # ugly hack =/
-	def __init__(self, val):
-		self.val = val
+# Types are hashable once resolved, `key()` identifies a type by its
+# structure. `&T == &mut T` holds but their keys differ, so they are still
+# different dict keys. `__hash__` only hashes what `__eq__` compares, types
+# that compare equal must have the same hash.
+
+class TypeTable:
+	# Interns resolved types: structurally identical types share the same
+	# instance, so comparing them is an identity check. The types built by the
+	# checker and the types of the symbols are interned, the other types
+	# (e.g. those of the locals) still compare by structure.
+	__slots__ = ("types",)
+
+	def __init__(self):
+		self.types = {}
+
+	def intern(self, typ):
+		return self.types.setdefault(typ.key(), typ)
+
+	def intern_resolved(self, typ):
+		# interns the element types too, so that comparing two composite types
+		# compares their elements by identity
+		if isinstance(typ, Fn):
+			typ.args = [self.intern_resolved(arg) for arg in typ.args]
+			typ.ret_typ = self.intern_resolved(typ.ret_typ)
+		elif isinstance(typ, Tuple):
+			typ.types = [self.intern_resolved(t) for t in typ.types]
+		elif isinstance(typ, Type):
+			if not typ.is_resolved():
+				return typ
+		else:
+			typ.typ = self.intern_resolved(typ.typ)
+		return self.intern(typ)
 
-	def store(self, val):
-		self.val.__class__ = val.__class__
-		self.val.__dict__ = val.__dict__
+	def __len__(self):
+		return len(self.types)
 
 class TBase:
+	# All the types share the same slots, so that a type can be turned into
+	# another in place (see `unalias`).
+	__slots__ = (
+	    "sym", "expr", "_unresolved", "typ", "is_mut", "size", "types",
+	    "is_unsafe", "is_extern", "abi", "is_method", "rec_is_ref",
+	    "rec_is_mut", "args", "is_variadic", "ret_typ"
+	)
+
 	def get_sym(self):
 		if isinstance(self, (Type, Slice, Array, Tuple, Variadic)):
 			return self.sym
@@ -37,9 +73,21 @@ class TBase:
 		elif isinstance(self, Type):
 			if self.is_resolved() and self.sym.kind == TypeKind.Alias:
 				self.sym.info.parent.unalias()
-				_Ptr(self).store(self.sym.info.parent)
+				self.replace_with(self.sym.info.parent)
+
+	def replace_with(self, other):
+		# the type is referenced from the AST and from the symbols, so it is
+		# updated in place instead of being replaced in all of them
+		self.__class__ = other.__class__
+		for name in TBase.__slots__:
+			if hasattr(other, name):
+				setattr(self, name, getattr(other, name))
+			elif hasattr(self, name):
+				delattr(self, name)
 
 class Type(TBase):
+	__slots__ = ()
+
 	def __init__(self, sym):
 		self.sym = sym
 		self.expr = None
@@ -62,8 +110,19 @@ class Type(TBase):
 	def qualstr(self):
 		return self.sym.qualname()
 
+	def key(self):
+		if self._unresolved:
+			# never shared: the unresolved types are all equal (see `__eq__`)
+			return (Type, id(self), self)
+		return self.sym
+
+	def __hash__(self):
+		return hash(self.sym)
+
 	def __eq__(self, other):
-		if not isinstance(other, Type):
+		if self is other:
+			return True
+		elif not isinstance(other, Type):
 			return False
 		return self.sym == other.sym
 
@@ -73,6 +132,8 @@ class Type(TBase):
 		return str(self.sym.name)
 
 class Ref(TBase):
+	__slots__ = ()
+
 	def __init__(self, typ, is_mut = False):
 		self.typ = typ
 		self.is_mut = is_mut
@@ -84,8 +145,16 @@ class Ref(TBase):
 	def nr_level(self):
 		return 1
 
+	def key(self):
+		return (Ref, self.is_mut, self.typ.key())
+
+	def __hash__(self):
+		return hash((Ref, self.typ))
+
 	def __eq__(self, other):
-		if not isinstance(other, Ref):
+		if self is other:
+			return True
+		elif not isinstance(other, Ref):
 			return False
 		elif self.is_mut and not other.is_mut:
 			return False
@@ -96,6 +165,8 @@ class Ref(TBase):
 		return f"&{kmut}{self.typ}"
 
 class Ptr(TBase):
+	__slots__ = ()
+
 	def __init__(self, typ, is_mut = False):
 		self.typ = typ
 		self.is_mut = is_mut
@@ -112,8 +183,16 @@ class Ptr(TBase):
 			nr += 1
 		return nr
 
+	def key(self):
+		return (Ptr, self.is_mut, self.typ.key())
+
+	def __hash__(self):
+		return hash((Ptr, self.typ))
+
 	def __eq__(self, other):
-		if not isinstance(other, Ptr):
+		if self is other:
+			return True
+		elif not isinstance(other, Ptr):
 			return False
 		elif self.is_mut and not other.is_mut:
 			return False
@@ -124,6 +203,8 @@ class Ptr(TBase):
 		return f"*{kmut}{self.typ}"
 
 class Slice(TBase):
+	__slots__ = ()
+
 	def __init__(self, typ, is_mut = False):
 		self.typ = typ
 		self.is_mut = is_mut
@@ -136,8 +217,16 @@ class Slice(TBase):
 		kw = "mut " if self.is_mut else ""
 		return f"[{kw}{self.typ.qualstr()}]"
 
+	def key(self):
+		return (Slice, self.is_mut, self.typ.key())
+
+	def __hash__(self):
+		return hash((Slice, self.is_mut, self.typ))
+
 	def __eq__(self, other):
-		if not isinstance(other, Slice):
+		if self is other:
+			return True
+		elif not isinstance(other, Slice):
 			return False
 		return self.is_mut == other.is_mut and self.typ == other.typ
 
@@ -146,6 +235,8 @@ class Slice(TBase):
 		return f"[{kw}{self.typ}]"
 
 class Variadic(TBase):
+	__slots__ = ()
+
 	def __init__(self, typ):
 		self.typ = typ
 		self.sym = None
@@ -156,8 +247,16 @@ class Variadic(TBase):
 	def qualstr(self):
 		return f"...{self.typ.qualstr()}"
 
+	def key(self):
+		return (Variadic, self.typ.key())
+
+	def __hash__(self):
+		return hash((Variadic, self.typ))
+
 	def __eq__(self, other):
-		if not isinstance(other, Variadic):
+		if self is other:
+			return True
+		elif not isinstance(other, Variadic):
 			return False
 		return self.typ == other.typ
 
@@ -165,6 +264,8 @@ class Variadic(TBase):
 		return f"...{self.typ}"
 
 class Array(TBase):
+	__slots__ = ()
+
 	def __init__(self, typ, size):
 		self.typ = typ
 		self.size = size
@@ -176,15 +277,25 @@ class Array(TBase):
 	def qualstr(self):
 		return f"[{self.typ.qualstr()}; {self.size}]"
 
+	def key(self):
+		return (Array, self.typ.key(), str(self.size))
+
+	def __hash__(self):
+		return hash((Array, self.typ, str(self.size)))
+
 	def __eq__(self, other):
-		if not isinstance(other, Array):
+		if self is other:
+			return True
+		elif not isinstance(other, Array):
 			return False
-		return self.typ == other.typ and self.size == other.size
+		return self.typ == other.typ and str(self.size) == str(other.size)
 
 	def __str__(self):
 		return f"[{self.typ}; {self.size}]"
 
 class Tuple(TBase):
+	__slots__ = ()
+
 	def __init__(self, types):
 		self.types = types
 		self.sym = None
@@ -195,10 +306,25 @@ class Tuple(TBase):
 	def qualstr(self):
 		return f"({', '.join([t.qualstr() for t in self.types])})"
 
+	def key(self):
+		return (Tuple, tuple(t.key() for t in self.types))
+
+	def __hash__(self):
+		return hash((Tuple, tuple(self.types)))
+
+	def __eq__(self, other):
+		if self is other:
+			return True
+		elif not isinstance(other, Tuple):
+			return False
+		return self.types == other.types
+
 	def __str__(self):
 		return f"({', '.join([str(t) for t in self.types])})"
 
 class Fn(TBase):
+	__slots__ = ()
+
 	def __init__(
 	    self, is_unsafe, is_extern, abi, is_method, args, is_variadic, ret_typ,
 	    rec_is_mut, rec_is_ref
@@ -258,7 +384,21 @@ class Fn(TBase):
 			res += str(self.ret_typ)
 		return res
 
+	def key(self):
+		return (
+		    Fn, self.is_unsafe, self.is_extern, self.abi, self.is_method,
+		    self.rec_is_ref, self.rec_is_mut,
+		    tuple(arg.key() for arg in self.args), self.ret_typ.key()
+		)
+
+	def __hash__(self):
+		return hash((
+		    Fn, self.is_unsafe, self.is_extern, self.abi, self.is_method,
+		    self.rec_is_ref, self.rec_is_mut, tuple(self.args), self.ret_typ
+		))
+
 	def __eq__(self, got):
+		if self is got: return True
 		if not isinstance(got, Fn): return False
 		if self.is_unsafe != got.is_unsafe:
 			return False
@@ -283,6 +423,8 @@ class Fn(TBase):
 		return self.stringify(False)
 
 class Optional(TBase):
+	__slots__ = ()
+
 	def __init__(self, typ):
 		self.typ = typ
 		self.sym = None
@@ -290,8 +432,16 @@ class Optional(TBase):
 	def qualstr(self):
 		return f"?{self.typ.qualstr()}"
 
+	def key(self):
+		return (Optional, self.typ.key())
+
+	def __hash__(self):
+		return hash((Optional, self.typ))
+
 	def __eq__(self, other):
-		if not isinstance(other, Optional):
+		if self is other:
+			return True
+		elif not isinstance(other, Optional):
 			return False
 		return self.typ == other.typ
 
@@ -299,6 +449,8 @@ class Optional(TBase):
 		return f"?{self.typ}"
 
 class Result(TBase):
+	__slots__ = ()
+
 	def __init__(self, typ):
 		self.typ = typ
 		self.sym = None
@@ -306,8 +458,16 @@ class Result(TBase):
 	def qualstr(self):
 		return f"!{self.typ.qualstr()}"
 
+	def key(self):
+		return (Result, self.typ.key())
+
+	def __hash__(self):
+		return hash((Result, self.typ))
+
 	def __eq__(self, other):
-		if not isinstance(other, Result):
+		if self is other:
+			return True
+		elif not isinstance(other, Result):
 			return False
 		return self.typ == other.typ
 
@@ -0,0 +1,540 @@
+# Copyright (C) 2022 The Rivet Team. All rights reserved.
+# Use of this source code is governed by an MIT license
+# that can be found in the LICENSE file.
+
+import io, os, gc, glob, json, pickle, shutil, hashlib, threading
+from os import path
+from contextlib import contextmanager
+
+try:
+	import fcntl
+except ImportError: # Windows
+	fcntl = None
+	import msvcrt
+
+from .ast import sym
+from . import prefs, utils
+
+PARSE_CACHE_DIR = path.join(prefs.RIVET_DIR, "cache", "parse")
+CORE_SNAPSHOT_DIR = path.join(prefs.RIVET_DIR, "cache", "core")
+OBJS_DIR = path.join(prefs.RIVET_DIR, "objs")
+OBJECT_CACHE_DIR = path.join(prefs.RIVET_DIR, "cache", "objs")
+
+# When the cache grows past this size, the least recently used entries are
+# removed until it is back to 3/4 of it.
+PARSE_CACHE_MAX_SIZE = 128 * 1024 * 1024
+
+# Like `PARSE_CACHE_MAX_SIZE`, for the object files, see `ObjectCache`.
+OBJECT_CACHE_MAX_SIZE = 512 * 1024 * 1024
+
+# Only the snapshots of the most recently used settings are kept.
+CORE_SNAPSHOT_MAX_ENTRIES = 8
+
+PRIMITIVE_TYPES = (
+    "void_t", "none_t", "bool_t", "rune_t", "int8_t", "int16_t", "int32_t",
+    "int64_t", "isize_t", "uint8_t", "uint16_t", "uint32_t", "uint64_t",
+    "usize_t", "untyped_int_t", "untyped_float_t", "float32_t", "float64_t",
+    "str_t", "error_t", "no_return_t"
+)
+
+# Attributes of the compiler that the parser puts in the AST; they are
+# stored by name and restored from the current compiler on load.
+SHARED_ATTRS = ("mod_sym", ) + PRIMITIVE_TYPES
+
+# Attributes of the compiler once `core` is checked, see `CoreSnapshot`.
+CORE_ATTRS = (
+    "universe", "type_table", "pkg_sym", "pkg_attrs", "extern_packages",
+    "core_files", "errtype_nr"
+) + PRIMITIVE_TYPES
+
+def compiler_fingerprint():
+	# the AST is pickled, so any change to the compiler invalidates the
+	# cache, not only a new version
+	h = hashlib.blake2b(utils.VERSION.encode(), digest_size = 20)
+	src_dir = path.dirname(path.realpath(__file__))
+	for file in sorted(glob.glob(path.join(src_dir, "**", "*.py"),
+	                             recursive = True)):
+		with open(file, "rb") as f:
+			h.update(f.read())
+	return h.digest()
+
+class _Pickler(pickle.Pickler):
+	def __init__(self, f, shared):
+		super().__init__(f, pickle.HIGHEST_PROTOCOL)
+		self.shared = shared
+
+	def persistent_id(self, obj):
+		return self.shared.get(id(obj))
+
+class _Unpickler(pickle.Unpickler):
+	def __init__(self, f, comp):
+		super().__init__(f)
+		self.comp = comp
+
+	def persistent_load(self, pid):
+		return getattr(self.comp, pid)
+
+def dumps(comp, obj):
+	# like `pickle.dumps`, but the objects in `SHARED_ATTRS` of `comp` are
+	# only referenced by name
+	shared = {}
+	for name in SHARED_ATTRS:
+		if (attr := getattr(comp, name)) != None:
+			shared[id(attr)] = name
+	f = io.BytesIO()
+	_Pickler(f, shared).dump(obj)
+	return f.getvalue()
+
+def loads(comp, data):
+	return _Unpickler(io.BytesIO(data), comp).load()
+
+class ParseCache:
+	# On-disk cache of parsed source files, keyed by the file path and
+	# contents, the compiler and the package settings the parser depends
+	# on. Only files parsed without errors or warnings are stored.
+	def __init__(self, comp):
+		self.comp = comp
+		self.fingerprint = compiler_fingerprint()
+		self.hits = 0
+		self.misses = 0
+
+	def key(self, file, is_pkg_level):
+		comp = self.comp
+		is_core = comp.in_core_pkg()
+		h = hashlib.blake2b(self.fingerprint, digest_size = 20)
+		h.update(
+		    f"{path.realpath(file)}\0{comp.prefs.pkg_name}\0{is_core}\0{is_pkg_level}\0"
+		    .encode()
+		)
+		with open(file, "rb") as f:
+			h.update(f.read())
+		return h.hexdigest()
+
+	def entry_path(self, key):
+		return path.join(PARSE_CACHE_DIR, key[:2], key)
+
+	def load(self, key):
+		# returns `(source_file, extern_packages, pkg_attrs)` or `None`
+		if data := self.load_data(key):
+			try:
+				return loads(self.comp, data)
+			except Exception:
+				# stale or corrupted entry
+				self.hits -= 1
+				self.misses += 1
+				self.remove(self.entry_path(key))
+		return None
+
+	def load_data(self, key):
+		entry = self.entry_path(key)
+		try:
+			with open(entry, "rb") as f:
+				data = f.read()
+			os.utime(entry) # used to find the least recently used entries
+		except OSError:
+			self.misses += 1
+			return None
+		self.hits += 1
+		return data
+
+	def store(self, key, source_file, extern_packages, pkg_attrs):
+		try:
+			data = dumps(self.comp, (source_file, extern_packages, pkg_attrs))
+		except (pickle.PicklingError, RecursionError):
+			return
+		self.store_data(key, data)
+
+	def store_data(self, key, data):
+		entry = self.entry_path(key)
+		tmp = f"{entry}.{os.getpid()}.tmp"
+		try:
+			os.makedirs(path.dirname(entry), exist_ok = True)
+			with open(tmp, "wb") as f:
+				f.write(data)
+			os.replace(tmp, entry)
+		except OSError:
+			# the cache is only an optimization
+			self.remove(tmp)
+
+	def evict(self):
+		# called once per build, after the files of the package are parsed
+		entries = []
+		total = 0
+		for entry in glob.glob(path.join(PARSE_CACHE_DIR, "*", "*")):
+			try:
+				st = os.stat(entry)
+			except OSError:
+				continue
+			entries.append((st.st_mtime, st.st_size, entry))
+			total += st.st_size
+		if total <= PARSE_CACHE_MAX_SIZE:
+			return
+		entries.sort()
+		for _, size, entry in entries:
+			if total <= PARSE_CACHE_MAX_SIZE * 3 // 4:
+				break
+			self.remove(entry)
+			total -= size
+
+	def remove(self, entry):
+		try:
+			os.remove(entry)
+		except OSError:
+			pass
+
+class CoreSnapshot:
+	# On-disk snapshot of the compiler once the `core` package is parsed,
+	# resolved and checked: the universe with its symbols and types, the
+	# constant values and the syntax trees that are lowered to RIR later,
+	# only the used functions are. It is keyed by the sources of `core`,
+	# the compiler and the settings that `#[if]` and the files depend on.
+	def __init__(self, comp):
+		self.comp = comp
+		self.entry = path.join(CORE_SNAPSHOT_DIR, self.key())
+
+	def key(self):
+		p = self.comp.prefs
+		h = hashlib.blake2b(compiler_fingerprint(), digest_size = 20)
+		h.update(
+		    f"{p.pkg_name}\0{p.target_os}\0{p.target_arch}\0{p.target_bits}\0{p.target_endian}\0{p.target_backend}\0"
+		    .encode()
+		)
+		h.update("\0".join(sorted(p.flags)).encode())
+		# all the files, the modules are loaded while `core` is registered
+		for file in sorted(glob.glob(path.join(prefs.CORE_SRC_DIR, "**", "*.ri"),
+		                             recursive = True)):
+			h.update(f"\0{path.realpath(file)}\0".encode())
+			with open(file, "rb") as f:
+				h.update(f.read())
+		return h.hexdigest()
+
+	def load(self):
+		# the collector would traverse the objects being created many times
+		gc_was_enabled = gc.isenabled()
+		gc.disable()
+		try:
+			with open(self.entry, "rb") as f:
+				symbol_count, attrs = pickle.load(f)
+			os.utime(self.entry)
+		except OSError:
+			return False
+		except Exception:
+			# stale or corrupted entry
+			self.remove(self.entry)
+			return False
+		finally:
+			if gc_was_enabled:
+				gc.enable()
+		for name, attr in zip(CORE_ATTRS, attrs):
+			setattr(self.comp, name, attr)
+		sym.SYMBOL_COUNT = symbol_count
+		return True
+
+	def store(self):
+		attrs = tuple(getattr(self.comp, name) for name in CORE_ATTRS)
+		try:
+			data = pickle.dumps((sym.SYMBOL_COUNT, attrs),
+			                    pickle.HIGHEST_PROTOCOL)
+		except (pickle.PicklingError, RecursionError):
+			return
+		tmp = f"{self.entry}.{os.getpid()}.tmp"
+		try:
+			os.makedirs(CORE_SNAPSHOT_DIR, exist_ok = True)
+			with open(tmp, "wb") as f:
+				f.write(data)
+			os.replace(tmp, self.entry)
+		except OSError:
+			# the snapshot is only an optimization
+			self.remove(tmp)
+			return
+		self.evict()
+
+	def evict(self):
+		entries = []
+		for entry in glob.glob(path.join(CORE_SNAPSHOT_DIR, "*")):
+			try:
+				entries.append((os.stat(entry).st_mtime, entry))
+			except OSError:
+				pass
+		entries.sort(reverse = True)
+		for _, entry in entries[CORE_SNAPSHOT_MAX_ENTRIES:]:
+			self.remove(entry)
+
+	def remove(self, entry):
+		try:
+			os.remove(entry)
+		except OSError:
+			pass
+
+def file_digest(file):
+	h = hashlib.blake2b(digest_size = 20)
+	with open(file, "rb") as f:
+		while chunk := f.read(1 << 20):
+			h.update(chunk)
+	return h.hexdigest()
+
+def file_stamp(file):
+	st = os.stat(file)
+	return [st.st_mtime_ns, st.st_size, file_digest(file)]
+
+class BuildManifest:
+	# Record of the last successful build of the package with the same
+	# settings, in `OBJS_DIR/<pkg>`: the files it read (the sources, the
+	# interfaces and archives of the libraries, the C files of `c_compile`
+	# and the C compiler) and the files it wrote, with their contents. The
+	# build is skipped while none of them changed and the directories of the
+	# sources don't have new files.
+	def __init__(self, comp):
+		self.comp = comp
+		self.entry = path.join(
+		    OBJS_DIR, comp.prefs.pkg_name, f"{self.key()}.manifest"
+		)
+
+	def key(self):
+		p = self.comp.prefs
+		h = hashlib.blake2b(compiler_fingerprint(), digest_size = 20)
+		settings = [
+		    p.pkg_name, p.pkg_type, p.pkg_output, p.build_mode, p.target_os,
+		    p.target_arch, p.target_bits, p.target_endian, p.target_backend,
+		    p.ccompiler,
+		    shutil.which(p.ccompiler), p.keep_c, p.split_c, *sorted(p.flags),
+		    "\0",
+		    *p.library_path, "\0", *p.library_to_link, "\0",
+		    *p.core_inputs, "\0", *p.inputs
+		]
+		h.update("\0".join(str(s) for s in settings).encode())
+		return h.hexdigest()
+
+	def is_up_to_date(self):
+		try:
+			with open(self.entry) as f:
+				manifest = json.load(f)
+		except (OSError, ValueError):
+			return False
+		for file, stamp in manifest["files"].items():
+			if not self.matches(file, stamp):
+				return False
+		for dir, files in manifest["dirs"].items():
+			if sorted(glob.glob(path.join(dir, "*.ri"))) != files:
+				return False
+		os.utime(self.entry)
+		return True
+
+	def matches(self, file, stamp):
+		try:
+			st = os.stat(file)
+			if [st.st_mtime_ns, st.st_size] == stamp[:2]:
+				return True
+			# touched, but maybe not changed
+			return st.st_size == stamp[1] and file_digest(file) == stamp[2]
+		except OSError:
+			return False
+
+	def store(self, outputs):
+		comp = self.comp
+		files = [
+		    path.realpath(sf.file)
+		    for sf in comp.core_files + comp.source_files
+		]
+		dirs = {}
+		for file in files:
+			dir = path.dirname(file)
+			if dir not in dirs:
+				dirs[dir] = sorted(glob.glob(path.join(dir, "*.ri")))
+		files += [path.realpath(file) for file in comp.build_deps]
+		if cc := shutil.which(comp.prefs.ccompiler):
+			files.append(cc)
+		try:
+			manifest = {
+			    "files": {
+			        file: file_stamp(file)
+			        for file in files + [path.realpath(o) for o in outputs]
+			    },
+			    "dirs": dirs
+			}
+		except OSError:
+			return
+		tmp = f"{self.entry}.{os.getpid()}.tmp"
+		try:
+			os.makedirs(path.dirname(self.entry), exist_ok = True)
+			with open(tmp, "w") as f:
+				json.dump(manifest, f)
+			os.replace(tmp, self.entry)
+		except OSError:
+			# the manifest is only an optimization
+			try:
+				os.remove(tmp)
+			except OSError:
+				pass
+
+def c_deps(cc, c_file, options):
+	# `c_file` and the headers it includes, from the rule written by `-M`;
+	# only `c_file` if the C compiler fails, the error is reported when the
+	# file is compiled
+	res = utils.execute(cc, c_file, *options, "-M")
+	deps = [path.realpath(c_file)]
+	if res.exit_code != 0:
+		return deps
+	rule = res.out.replace("\\\n", " ").replace("\\ ", "\0")
+	for dep in rule.partition(": ")[2].split():
+		dep = path.realpath(dep.replace("\0", " "))
+		if dep not in deps:
+			deps.append(dep)
+	return deps
+
+def c_compiler_identity(cc):
+	# the resolved path of the C compiler, with the size and modification
+	# time of its executable
+	if exe := shutil.which(cc):
+		exe = path.realpath(exe)
+		st = os.stat(exe)
+		return f"{exe}\0{st.st_size}\0{st.st_mtime_ns}"
+	return cc
+
+class ObjectCache:
+	# Content-addressed cache of the object files compiled from C, shared by
+	# the `rivetc` processes that use the same `RIVET_DIR`. The entries are
+	# keyed by the C source, the identity of the C compiler and its options,
+	# and written atomically; a process copies an entry while holding a
+	# shared lock on the cache (an exclusive one on Windows), `evict`
+	# removes entries with an exclusive one.
+	def __init__(self, comp):
+		self.comp = comp
+		self.hits = 0
+		self.misses = 0
+		# the files can be compiled by several threads, see
+		# `Compiler.compile_c_files`
+		self.stats_lock = threading.Lock()
+
+	def key(self, cc, options, source):
+		h = hashlib.blake2b(
+		    c_compiler_identity(cc).encode(), digest_size = 20
+		)
+		h.update("\0".join(options).encode())
+		h.update(b"\0")
+		h.update(source)
+		return h.hexdigest()
+
+	def entry_path(self, key):
+		return path.join(OBJECT_CACHE_DIR, key[:2], f"{key}.o")
+
+	def compile(
+	    self, c_file, options, obj_file, preprocess = False, headers = ()
+	):
+		# Compiles `c_file` into `obj_file` with `options`, unless the object
+		# is in the cache. With `preprocess`, the key includes all the headers
+		# that the file includes, otherwise only `headers`. Returns the
+		# `utils.ProcessResult` of the C compiler.
+		cc = self.comp.prefs.ccompiler
+		if preprocess:
+			res = utils.execute(cc, c_file, *options, "-E")
+			if res.exit_code != 0:
+				return res
+			source = res.out.encode()
+		else:
+			with open(c_file, "rb") as f:
+				source = f.read()
+			for header in headers:
+				with open(header, "rb") as f:
+					source += b"\0" + f.read()
+		if "-g" in options:
+			# the debug information has the path of the file
+			source += f"\0{path.realpath(c_file)}".encode()
+		entry = self.entry_path(self.key(cc, options, source))
+		with self.lock():
+			if self.copy(entry, obj_file):
+				os.utime(entry) # used to find the least recently used entries
+				with self.stats_lock:
+					self.hits += 1
+				return utils.ProcessResult("", "", 0)
+		with self.stats_lock:
+			self.misses += 1
+		# a previous object may be a link to an entry, see `copy`
+		self.remove(obj_file)
+		res = utils.execute(cc, c_file, *options, "-c", "-o", obj_file)
+		if res.exit_code == 0:
+			with self.lock():
+				os.makedirs(path.dirname(entry), exist_ok = True)
+				self.copy(obj_file, entry)
+		return res
+
+	def trim(self):
+		# called once per build, after the objects are compiled
+		if self.misses > 0:
+			self.evict(OBJECT_CACHE_MAX_SIZE)
+
+	def copy(self, src, dst):
+		# `dst` is replaced atomically; a hard link is enough, the entries
+		# and the objects are never written in place
+		tmp = f"{dst}.{os.getpid()}.tmp"
+		try:
+			try:
+				os.link(src, tmp)
+			except FileExistsError:
+				os.remove(tmp)
+				os.link(src, tmp)
+			except OSError:
+				shutil.copyfile(src, tmp)
+			os.replace(tmp, dst)
+			return True
+		except OSError:
+			self.remove(tmp)
+			return False
+
+	@contextmanager
+	def lock(self, exclusive = False):
+		os.makedirs(OBJECT_CACHE_DIR, exist_ok = True)
+		with open(path.join(OBJECT_CACHE_DIR, "lock"), "a") as f:
+			if fcntl == None:
+				# Windows only has exclusive locks, of the first byte
+				f.seek(0)
+				while True:
+					try:
+						msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+						break
+					except OSError: # still locked after 10 seconds
+						pass
+			else:
+				fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+			try:
+				yield
+			finally:
+				if fcntl == None:
+					f.seek(0)
+					msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+				else:
+					fcntl.flock(f, fcntl.LOCK_UN)
+
+	def evict(self, max_size, target_size = None):
+		# removes the least recently used entries until the cache is back to
+		# `target_size`, 3/4 of `max_size` by default, when it is larger than
+		# `max_size`; returns the number of removed entries
+		if target_size == None:
+			target_size = max_size * 3 // 4
+		removed = 0
+		with self.lock(exclusive = True):
+			entries = []
+			total = 0
+			for entry in glob.glob(path.join(OBJECT_CACHE_DIR, "*", "*.o")):
+				try:
+					st = os.stat(entry)
+				except OSError:
+					continue
+				entries.append((st.st_mtime, st.st_size, entry))
+				total += st.st_size
+			if total <= max_size:
+				return 0
+			entries.sort()
+			for _, size, entry in entries:
+				if total <= target_size:
+					break
+				self.remove(entry)
+				total -= size
+				removed += 1
+		return removed
+
+	def remove(self, entry):
+		try:
+			os.remove(entry)
+		except OSError:
+			pass
@@ -7,7 +7,7 @@ from enum import IntEnum as Enum, auto as auto_enum
 
 from ..ast import sym, type
 from ..ast.sym import TypeKind
-from .. import ast, prefs, colors, report, utils
+from .. import ast, prefs, colors, consteval, library, report, utils
 from ..token import Kind, OVERLOADABLE_OPERATORS_STR
 
 MAX_INT8 = 127
@@ -50,6 +50,12 @@ def prefix_type(tt):
 def mangle_type(typ):
 	return prefix_type(typ) + mangle_symbol(typ.get_sym())
 
+def unit_name(s):
+	# name of the package or module of the symbol, like `core.mem`
+	if p := s.super_():
+		return p.qualname().replace("::", ".")
+	return ""
+
 def mangle_symbol(s):
 	if len(s.mangled_name) > 0:
 		return s.mangled_name
@@ -107,7 +113,37 @@ def mangle_symbol(s):
 	root.mangled_name = "".join(res)
 	return root.mangled_name
 
+class TypeNames:
+	# Names of the types, computed once per compilation and keyed by the
+	# `key()` of the types: mangled names, names of their symbols, C type
+	# strings and C declarators of function pointers (see `c.Gen`).
+	__slots__ = ("mangled", "symbols", "c_types", "fn_ptrs")
+
+	def __init__(self):
+		self.mangled = {}
+		self.symbols = {}
+		self.c_types = {}
+		self.fn_ptrs = {}
+
+	def mangle_type(self, typ):
+		key = typ.key()
+		if name := self.mangled.get(key):
+			return name
+		name = mangle_type(typ)
+		self.mangled[key] = name
+		return name
+
+	def symbol_name(self, typ):
+		key = typ.key()
+		if name := self.symbols.get(key):
+			return name
+		name = mangle_symbol(typ.get_sym())
+		self.symbols[key] = name
+		return name
+
 class RIR:
+	__slots__ = ("pkg_name", "types", "externs", "statics", "decls")
+
 	def __init__(self, pkg_name, types, externs, statics, decls):
 		self.pkg_name = pkg_name
 		self.types = types
@@ -149,6 +185,8 @@ class RIR:
 		return self.__repr__()
 
 class Alias:
+	__slots__ = ("name", "sy")
+
 	def __init__(self, name, sy):
 		self.name = name
 		self.sy = sy
@@ -157,6 +195,8 @@ class Alias:
 		return f'type_alias "{self.name}" = {self.sy.qualname()}'
 
 class VTable:
+	__slots__ = ("structure", "name", "trait_name", "implement_nr", "funcs")
+
 	def __init__(self, structure, name, trait_name, implement_nr, funcs):
 		self.structure = structure
 		self.name = name
@@ -180,6 +220,8 @@ class VTable:
 		return str(sb)
 
 class RiUnion:
+	__slots__ = ("is_pub", "name", "variants")
+
 	def __init__(self, is_pub, name, variants):
 		self.is_pub = is_pub
 		self.name = name
@@ -203,11 +245,15 @@ class RiUnion:
 		return str(sb)
 
 class Field:
+	__slots__ = ("name", "typ")
+
 	def __init__(self, name, typ):
 		self.name = name
 		self.typ = typ
 
 class Struct:
+	__slots__ = ("is_pub", "is_union", "is_opaque", "name", "fields")
+
 	def __init__(self, is_pub, is_union, is_opaque, name, fields):
 		self.is_pub = is_pub
 		self.is_union = is_union
@@ -233,6 +279,8 @@ class Struct:
 		return str(sb)
 
 class StaticVar:
+	__slots__ = ("is_pub", "is_extern", "typ", "name")
+
 	def __init__(self, is_pub, is_extern, typ, name):
 		self.is_pub = is_pub
 		self.is_extern = is_extern
@@ -245,6 +293,8 @@ class StaticVar:
 		return f'{kw}{kw2}static {self.typ} %"{self.name}"'
 
 class ExternFn:
+	__slots__ = ("name", "ret_typ", "args", "is_variadic", "attrs")
+
 	def __init__(self, name, ret_typ, args, is_variadic, attrs):
 		self.name = name
 		self.ret_typ = ret_typ
@@ -265,13 +315,17 @@ class ExternFn:
 		return str(sb)
 
 class FnDecl:
-	def __init__(self, is_pub, name, ret_typ, args):
+	__slots__ = ("is_pub", "name", "ret_typ", "args", "locals", "bb", "unit")
+
+	def __init__(self, is_pub, name, ret_typ, args, unit = ""):
 		self.is_pub = is_pub
 		self.name = name
 		self.ret_typ = ret_typ
 		self.args = args
 		self.locals = 0
 		self.bb = list()
+		# the module that defines the function, see `c.Gen.write_units`
+		self.unit = unit
 
 	def add_comment(self, comment):
 		self.bb.append(Comment(comment))
@@ -356,6 +410,8 @@ class FnDecl:
 		return str(sb)
 
 class Comment:
+	__slots__ = ("text",)
+
 	def __init__(self, text):
 		self.text = text
 
@@ -366,6 +422,8 @@ class Comment:
 		return self.__repr__()
 
 class NoneLiteral:
+	__slots__ = ("typ",)
+
 	def __init__(self, typ):
 		self.typ = typ
 
@@ -376,6 +434,8 @@ class NoneLiteral:
 		return self.__repr__()
 
 class IntLiteral:
+	__slots__ = ("typ", "lit")
+
 	def __init__(self, typ, lit):
 		self.typ = typ
 		self.lit = lit
@@ -390,6 +450,8 @@ class IntLiteral:
 		return self.__repr__()
 
 class FloatLiteral:
+	__slots__ = ("typ", "lit")
+
 	def __init__(self, typ, lit):
 		self.typ = typ
 		self.lit = lit
@@ -401,6 +463,8 @@ class FloatLiteral:
 		return self.__repr__()
 
 class RuneLiteral:
+	__slots__ = ("lit", "typ")
+
 	def __init__(self, typ, lit):
 		self.lit = lit
 		self.typ = typ
@@ -412,6 +476,8 @@ class RuneLiteral:
 		return self.__repr__()
 
 class StringLiteral:
+	__slots__ = ("typ", "lit", "len")
+
 	def __init__(self, typ, lit, len_):
 		self.typ = typ
 		self.lit = lit
@@ -424,6 +490,8 @@ class StringLiteral:
 		return self.__repr__()
 
 class ArrayLiteral:
+	__slots__ = ("typ", "elems", "is_variadic_init")
+
 	def __init__(self, typ, elems, is_variadic_init = False):
 		self.typ = typ
 		self.elems = elems
@@ -438,6 +506,8 @@ class ArrayLiteral:
 		return self.__repr__()
 
 class Ident: # Variables, local and static values
+	__slots__ = ("typ", "name", "use_arr_field")
+
 	def __init__(self, typ, name):
 		self.typ = typ
 		self.name = name
@@ -450,6 +520,8 @@ class Ident: # Variables, local and static values
 		return self.__repr__()
 
 class Selector: # struct/union/tuple fields
+	__slots__ = ("typ", "left", "name")
+
 	def __init__(self, typ, left, name):
 		self.typ = typ
 		self.left = left
@@ -462,6 +534,8 @@ class Selector: # struct/union/tuple fields
 		return self.__repr__()
 
 class Name: # Simple identifier, e.g. labels
+	__slots__ = ("name",)
+
 	def __init__(self, name):
 		self.name = name
 
@@ -472,6 +546,8 @@ class Name: # Simple identifier, e.g. labels
 		return self.__repr__()
 
 class Label:
+	__slots__ = ("label",)
+
 	def __init__(self, label):
 		self.label = label
 
@@ -482,6 +558,8 @@ class Label:
 		return self.__repr__()
 
 class Type:
+	__slots__ = ("typ",)
+
 	def __init__(self, typ):
 		self.typ = typ
 
@@ -492,6 +570,8 @@ class Type:
 		return self.__repr__()
 
 class Skip:
+	__slots__ = ()
+
 	def __repr__(self):
 		return "<skip>"
 
@@ -499,6 +579,8 @@ class Skip:
 		return self.__repr__()
 
 class Alloca:
+	__slots__ = ("name", "inst", "typ")
+
 	def __init__(self, typ, name, inst):
 		self.name = name
 		self.inst = inst
@@ -592,6 +674,8 @@ class InstKind(Enum):
 		return self.__repr__()
 
 class Inst:
+	__slots__ = ("kind", "args")
+
 	def __init__(self, kind, args):
 		self.kind = kind
 		self.args = args
@@ -622,12 +706,39 @@ class AST2RIR:
 
 		self.void_types = (self.comp.void_t, self.comp.no_return_t)
 
+		self.is_lib = self.comp.prefs.pkg_type == prefs.PkgType.Lib
+		# only prototypes are generated for the declarations defined by
+		# another object file, see `convert`
+		self.protos_only = False
 		self.init_statics = FnDecl(
-		    True, "_R12init_staticsZ", self.comp.void_t, []
+		    True,
+		    library.init_statics_name(self.comp.prefs.pkg_name)
+		    if self.is_lib else "_R12init_staticsZ", self.comp.void_t, []
+		)
+		# the statics declared by `type_nr`
+		self.type_nr_names = set()
+
+		self.stmt_converters = ast.dispatch_table(self, "convert", ast.STMTS)
+		# these expressions are converted by the expressions that contain them
+		self.expr_converters = ast.dispatch_table(
+		    self, "convert", ast.EXPRS, (
+		        ast.EmptyExpr, ast.TypeNode, ast.PkgExpr, ast.SuperExpr,
+		        ast.SelfTyExpr, ast.GuardExpr, ast.RangeExpr
+		    )
 		)
 
-	def convert(self, source_files):
+	def convert(self, core_files, source_files):
 		self.convert_types(self.comp.universe)
+		# a library only declares the functions and statics of `core`, they
+		# are defined by the binaries that link it
+		self.protos_only = self.is_lib
+		for sf in core_files:
+			self.convert_source_file(sf)
+		self.protos_only = False
+		if len(self.comp.libs) > 0 and not self.is_lib:
+			self.define_type_nrs()
+		for lib in self.comp.libs:
+			self.convert_lib(lib)
 		for sf in source_files:
 			self.convert_source_file(sf)
 		self.decls.append(self.init_statics)
@@ -650,9 +761,6 @@ class AST2RIR:
 				)
 			elif ts.kind == sym.TypeKind.Array:
 				self.types.append(Alias(mangle_symbol(ts), ts))
-			elif ts.kind == sym.TypeKind.Enum:
-				for i, v in enumerate(ts.info.variants):
-					v.value = i
 			elif ts.kind == sym.TypeKind.Trait:
 				if ts.info.has_objects:
 					ts_name = mangle_symbol(ts)
@@ -694,7 +802,9 @@ class AST2RIR:
 				if ts.info.is_c_union:
 					fields = list()
 					for v in ts.info.variants:
-						fields.append(Field(mangle_type(v), v))
+						fields.append(
+						    Field(self.comp.type_names.mangle_type(v), v)
+						)
 					self.types.append(
 					    Struct(
 					        ts.vis.is_pub(), True, False, mangle_symbol(ts),
@@ -718,6 +828,74 @@ class AST2RIR:
 				    )
 				)
 
+	def convert_lib(self, pkg):
+		# the public functions and statics of a library loaded by `extern pkg`
+		# are defined by its archive, see `Compiler.build_lib`
+		for s in library.pub_syms(pkg):
+			if isinstance(s, sym.Static):
+				self.statics.append(
+				    StaticVar(
+				        True, True, s.typ,
+				        s.name if s.is_extern else mangle_symbol(s)
+				    )
+				)
+			elif s.has_body:
+				self.externs.append(self.extern_fn(s))
+		if not self.is_lib:
+			# the binary initializes the statics of all the libraries, the
+			# dependencies first
+			name = library.init_statics_name(pkg.name)
+			self.externs.append(
+			    ExternFn(name, self.comp.void_t, [], False, ast.Attrs())
+			)
+			self.init_statics.add_call(name)
+
+	def define_type_nrs(self):
+		# the numbers given to the types of the libraries when they were
+		# loaded, set before the statics of the libraries are initialized
+		for s in library.numbered_types(self.comp):
+			self.define_type_nr(library.type_nr_name(s, "idx"), s.index)
+			if s.kind == sym.TypeKind.ErrType:
+				self.define_type_nr(library.type_nr_name(s, "tag"), s.info.nr)
+
+	def define_type_nr(self, name, nr):
+		self.statics.append(StaticVar(True, False, self.comp.usize_t, name))
+		self.init_statics.store(
+		    Ident(self.comp.usize_t, name), IntLiteral(self.comp.usize_t, str(nr))
+		)
+
+	def type_nr(self, s):
+		# The number of a type, used by the unions and by `is`/`match`. The
+		# types of a library are numbered again by the binary that loads it
+		# (see `library.renumber`), so the library reads their numbers from
+		# statics defined by the binary, see `define_type_nrs`.
+		if self.is_lib and s.index >= self.comp.core_symbol_count:
+			return self.type_nr_static(library.type_nr_name(s, "idx"))
+		return IntLiteral(self.comp.usize_t, str(s.index))
+
+	def errtype_tag(self, s):
+		if self.is_lib and s.info.nr >= self.comp.core_errtype_nr:
+			return self.type_nr_static(library.type_nr_name(s, "tag"))
+		return IntLiteral(self.comp.usize_t, str(s.info.nr))
+
+	def type_nr_static(self, name):
+		if name not in self.type_nr_names:
+			self.type_nr_names.add(name)
+			self.statics.append(
+			    StaticVar(True, True, self.comp.usize_t, name)
+			)
+		return Ident(self.comp.usize_t, name)
+
+	def extern_fn(self, fn):
+		args = fn.args.copy()
+		if fn.is_method:
+			args.insert(
+			    0, sym.Arg("self", fn.self_typ, None, None, fn.name_pos)
+			)
+		return ExternFn(
+		    mangle_symbol(fn), fn.ret_typ, args, fn.is_variadic, ast.Attrs()
+		)
+
 	def convert_source_file(self, sf):
 		self.convert_decls(sf.decls)
 
@@ -726,61 +904,66 @@ class AST2RIR:
 			self.convert_decl(d)
 
 	def convert_decl(self, d):
-		should_gen = True
-		if not d.__class__ in (ast.TestDecl, ast.ExternPkg, ast.DestructorDecl):
-			should_gen = d.attrs.if_check
 		if isinstance(d, ast.ExternDecl):
-			if should_gen:
-				self.convert_decls(d.protos)
+			self.convert_decls(d.protos)
 		elif isinstance(d, ast.ConstDecl):
-			if should_gen:
-				self.convert_const(d.sym)
+			self.convert_const(d.sym)
 		elif isinstance(d, ast.StaticDecl):
-			if should_gen:
-				name = d.sym.name if d.is_extern else mangle_symbol(d.sym)
-				self.statics.append(
-				    StaticVar(d.vis.is_pub(), d.is_extern, d.typ, name)
+			name = d.sym.name if d.is_extern else mangle_symbol(d.sym)
+			self.statics.append(
+			    StaticVar(
+			        d.vis.is_pub(), d.is_extern or self.protos_only, d.typ,
+			        name
+			    )
+			)
+			if not (
+			    d.is_extern or self.protos_only
+			) and name != "_R4core4ARGS": # TODO(StunxFS): temp
+				self.cur_fn = self.init_statics
+				self.cur_fn.store(
+				    Ident(d.typ, name),
+				    self.convert_expr_with_cast(d.typ, d.expr)
 				)
-				if not d.is_extern and name != "_R4core4ARGS": # TODO(StunxFS): temp
-					self.cur_fn = self.init_statics
-					self.cur_fn.store(
-					    Ident(d.typ, name),
-					    self.convert_expr_with_cast(d.typ, d.expr)
-					)
-					self.cur_fn = None
+				self.cur_fn = None
 		elif isinstance(d, ast.ModDecl):
-			if should_gen:
-				self.convert_decls(d.decls)
+			self.convert_decls(d.decls)
 		elif isinstance(d, ast.UnionDecl):
-			if should_gen and d.sym.is_used():
+			if d.sym.is_used():
 				self.convert_decls(d.decls)
 		elif isinstance(d, ast.StructDecl):
-			if should_gen and d.sym.is_used():
+			if d.sym.is_used():
 				self.convert_decls(d.decls)
 		elif isinstance(d, ast.EnumDecl):
-			if should_gen and d.sym.is_used():
+			if d.sym.is_used():
 				self.convert_decls(d.decls)
 		elif isinstance(d, ast.ExtendDecl):
-			if should_gen:
-				self.convert_decls(d.decls)
+			self.convert_decls(d.decls)
 		elif isinstance(d, ast.FnDecl):
-			if should_gen:
-				if d.is_extern and not d.has_body:
-					self.externs.append(
-					    ExternFn(
-					        d.name, d.ret_typ, d.args, d.is_variadic, d.attrs
-					    )
-					)
-				elif d.sym.is_used():
+			if d.is_extern and not d.has_body:
+				self.externs.append(
+				    ExternFn(
+				        d.name, d.ret_typ, d.args, d.is_variadic, d.attrs
+				    )
+				)
+			elif d.sym.is_used():
+				if self.protos_only:
+					self.externs.append(self.extern_fn(d.sym))
+				else:
 					self.decls.append(self.convert_fn_decl(d))
 		elif isinstance(d, ast.DestructorDecl):
-			self.cur_fn = FnDecl(
-			    True,
-			    mangle_symbol(d.self_typ.get_sym()) + "_dtor", self.comp.void_t,
-			    [sym.Arg("self", d.self_typ, None, None, None)]
-			)
-			self.convert_stmts(d.stmts)
-			self.decls.append(self.cur_fn)
+			name = mangle_symbol(d.self_typ.get_sym()) + "_dtor"
+			args = [sym.Arg("self", d.self_typ, None, None, None)]
+			if self.protos_only:
+				self.externs.append(
+				    ExternFn(name, self.comp.void_t, args, False, ast.Attrs())
+				)
+			else:
+				self.cur_fn = FnDecl(
+				    True, name, self.comp.void_t, args,
+				    unit_name(d.self_typ.get_sym())
+				)
+				self.convert_stmts(d.stmts)
+				self.decls.append(self.cur_fn)
 
 	def convert_fn_decl(self, fn_decl):
 		self.cur_fn_is_main = fn_decl.is_main
@@ -793,7 +976,7 @@ class AST2RIR:
 			)
 		self.cur_fn = FnDecl(
 		    fn_decl.vis.is_pub(), mangle_symbol(fn_decl.sym), fn_decl.ret_typ,
-		    args
+		    args, unit_name(fn_decl.sym)
 		)
 		self.convert_stmts(fn_decl.stmts)
 		if len(fn_decl.stmts) == 0 or (
@@ -816,264 +999,272 @@ class AST2RIR:
 	def convert_stmt(self, stmt):
 		# if self.comp.prefs.build_mode != prefs.BuildMode.Release:
 		# 	self.cur_fn.add_dbg_stmt_line(stmt.pos)
-		if isinstance(stmt, ast.LabelStmt):
-			self.cur_fn.add_label(stmt.label)
-		elif isinstance(stmt, ast.GotoStmt):
-			self.cur_fn.add_br(stmt.label)
-		elif isinstance(stmt, ast.ForInStmt):
-			old_entry_label = self.loop_entry_label
-			old_exit_label = self.loop_exit_label
-
-			vars_len = len(stmt.vars)
-			iterable_sym = stmt.iterable.typ.get_sym()
-			self.loop_entry_label = self.cur_fn.local_name()
-			body_label = self.cur_fn.local_name()
-			self.loop_exit_label = self.cur_fn.local_name()
-
-			self.cur_fn.add_comment("for in stmt")
-
-			if isinstance(stmt.iterable,
-			              ast.RangeExpr) or iterable_sym.kind in (
-			                  TypeKind.Array, TypeKind.Slice, TypeKind.Str
-			              ):
-				if isinstance(stmt.iterable, ast.RangeExpr):
-					self.cur_fn.alloca(
-					    stmt.iterable.typ, stmt.vars[0],
-					    self.convert_expr(stmt.iterable.start)
-					)
-					idx = Ident(self.comp.usize_t, stmt.vars[0])
-					self.cur_fn.add_label(self.loop_entry_label)
-					self.cur_fn.add_cond_br(
-					    Inst(
-					        InstKind.Cmp, [
-					            Name(
-					                "<=" if stmt.iterable.is_inclusive else "<"
-					            ), idx,
-					            self.convert_expr(stmt.iterable.end)
-					        ]
-					    ), body_label, self.loop_exit_label
-					)
-					self.cur_fn.add_label(body_label)
-				else:
-					idx_name = self.cur_fn.local_name(
-					) if vars_len == 1 else stmt.vars[0]
-					iterable = self.convert_expr(stmt.iterable)
-					self.cur_fn.alloca(
-					    self.comp.usize_t, idx_name,
-					    IntLiteral(self.comp.usize_t, "0")
-					)
-					idx = Ident(self.comp.usize_t, idx_name)
-					self.cur_fn.add_label(self.loop_entry_label)
-					if iterable_sym.kind == TypeKind.Array:
-						len_ = IntLiteral(
-						    self.comp.usize_t, iterable_sym.info.size.lit
-						)
-					elif iterable_sym.kind == TypeKind.Str and isinstance(
-					    iterable, StringLiteral
-					):
-						len_ = IntLiteral(self.comp.usize_t, iterable.len)
-					else:
-						len_ = Selector(
-						    self.comp.usize_t, iterable, Name("len")
-						)
-					self.cur_fn.add_cond_br(
-					    Inst(InstKind.Cmp, [Name("<"), idx, len_]), body_label,
-					    self.loop_exit_label
-					)
+		self.stmt_converters[stmt.__class__](stmt)
 
-					self.cur_fn.add_label(body_label)
-					value_t = self.comp.uint8_t if iterable_sym.kind == TypeKind.Str else iterable_sym.info.elem_typ
-					if iterable_sym.kind == TypeKind.Array:
-						value = Inst(InstKind.GetElementPtr, [iterable, idx])
-					else:
-						value = Selector(
-						    type.Ptr(self.comp.void_t), iterable, Name("ptr")
-						)
-						if iterable_sym.kind == TypeKind.Slice:
-							value = Inst(
-							    InstKind.Add, [
-							        Inst(
-							            InstKind.Cast,
-							            [value, Type(type.Ptr(value_t))]
-							        ), idx
-							    ]
-							)
-						else:
-							value = Inst(InstKind.GetElementPtr, [value, idx])
-					self.cur_fn.alloca(
-					    value_t,
-					    stmt.vars[0] if vars_len == 1 else stmt.vars[1],
-					    Inst(InstKind.LoadPtr, [value])
-					)
-				self.convert_stmt(stmt.stmt)
-				self.cur_fn.add_inst(Inst(InstKind.Inc, [idx]))
-				self.cur_fn.add_br(self.loop_entry_label)
-				self.cur_fn.add_label(self.loop_exit_label)
-
-			self.loop_entry_label = old_entry_label
-			self.loop_exit_label = old_exit_label
-		elif isinstance(stmt, ast.WhileStmt):
-			old_entry_label = self.loop_entry_label
-			old_exit_label = self.loop_exit_label
-			self.cur_fn.add_comment(f"while stmt (is_inf: {stmt.is_inf})")
-			self.loop_entry_label = self.cur_fn.local_name()
-			body_label = self.cur_fn.local_name()
-			self.loop_exit_label = self.cur_fn.local_name()
-
-			self.cur_fn.add_label(self.loop_entry_label)
-			if stmt.is_inf:
-				cond = IntLiteral(self.comp.bool_t, "1")
-				self.cur_fn.add_br(body_label)
+	def convert_label_stmt(self, stmt):
+		self.cur_fn.add_label(stmt.label)
+
+	def convert_goto_stmt(self, stmt):
+		self.cur_fn.add_br(stmt.label)
+
+	def convert_for_in_stmt(self, stmt):
+		old_entry_label = self.loop_entry_label
+		old_exit_label = self.loop_exit_label
+
+		vars_len = len(stmt.vars)
+		iterable_sym = stmt.iterable.typ.get_sym()
+		self.loop_entry_label = self.cur_fn.local_name()
+		body_label = self.cur_fn.local_name()
+		self.loop_exit_label = self.cur_fn.local_name()
+
+		self.cur_fn.add_comment("for in stmt")
+
+		if isinstance(stmt.iterable,
+		              ast.RangeExpr) or iterable_sym.kind in (
+		                  TypeKind.Array, TypeKind.Slice, TypeKind.Str
+		              ):
+			if isinstance(stmt.iterable, ast.RangeExpr):
+				self.cur_fn.alloca(
+				    stmt.iterable.typ, stmt.vars[0],
+				    self.convert_expr(stmt.iterable.start)
+				)
+				idx = Ident(self.comp.usize_t, stmt.vars[0])
+				self.cur_fn.add_label(self.loop_entry_label)
+				self.cur_fn.add_cond_br(
+				    Inst(
+				        InstKind.Cmp, [
+				            Name(
+				                "<=" if stmt.iterable.is_inclusive else "<"
+				            ), idx,
+				            self.convert_expr(stmt.iterable.end)
+				        ]
+				    ), body_label, self.loop_exit_label
+				)
+				self.cur_fn.add_label(body_label)
 			else:
-				if isinstance(stmt.cond, ast.GuardExpr):
-					gexpr = self.convert_expr_with_cast(
-					    stmt.cond.expr.typ, stmt.cond.expr
+				idx_name = self.cur_fn.local_name(
+				) if vars_len == 1 else stmt.vars[0]
+				iterable = self.convert_expr(stmt.iterable)
+				self.cur_fn.alloca(
+				    self.comp.usize_t, idx_name,
+				    IntLiteral(self.comp.usize_t, "0")
+				)
+				idx = Ident(self.comp.usize_t, idx_name)
+				self.cur_fn.add_label(self.loop_entry_label)
+				if iterable_sym.kind == TypeKind.Array:
+					len_ = IntLiteral(
+					    self.comp.usize_t, iterable_sym.info.size.lit
+					)
+				elif iterable_sym.kind == TypeKind.Str and isinstance(
+				    iterable, StringLiteral
+				):
+					len_ = IntLiteral(self.comp.usize_t, iterable.len)
+				else:
+					len_ = Selector(
+					    self.comp.usize_t, iterable, Name("len")
 					)
-					if stmt.cond.is_result:
-						cond = Inst(
-						    InstKind.BooleanNot,
-						    [Selector(self.comp.bool_t, gexpr, Name("is_err"))]
-						)
-					else:
-						cond = Inst(
-						    InstKind.BooleanNot, [
-						        Selector(
-						            self.comp.bool_t, gexpr, Name("is_none")
-						        )
+				self.cur_fn.add_cond_br(
+				    Inst(InstKind.Cmp, [Name("<"), idx, len_]), body_label,
+				    self.loop_exit_label
+				)
+
+				self.cur_fn.add_label(body_label)
+				value_t = self.comp.uint8_t if iterable_sym.kind == TypeKind.Str else iterable_sym.info.elem_typ
+				if iterable_sym.kind == TypeKind.Array:
+					value = Inst(InstKind.GetElementPtr, [iterable, idx])
+				else:
+					value = Selector(
+					    type.Ptr(self.comp.void_t), iterable, Name("ptr")
+					)
+					if iterable_sym.kind == TypeKind.Slice:
+						value = Inst(
+						    InstKind.Add, [
+						        Inst(
+						            InstKind.Cast,
+						            [value, Type(type.Ptr(value_t))]
+						        ), idx
 						    ]
 						)
-					self.cur_fn.alloca(
-					    stmt.cond.expr.typ.typ, stmt.cond.vars[0],
-					    Selector(stmt.cond.expr.typ.typ, gexpr, Name("value"))
+					else:
+						value = Inst(InstKind.GetElementPtr, [value, idx])
+				self.cur_fn.alloca(
+				    value_t,
+				    stmt.vars[0] if vars_len == 1 else stmt.vars[1],
+				    Inst(InstKind.LoadPtr, [value])
+				)
+			self.convert_stmt(stmt.stmt)
+			self.cur_fn.add_inst(Inst(InstKind.Inc, [idx]))
+			self.cur_fn.add_br(self.loop_entry_label)
+			self.cur_fn.add_label(self.loop_exit_label)
+
+		self.loop_entry_label = old_entry_label
+		self.loop_exit_label = old_exit_label
+
+	def convert_while_stmt(self, stmt):
+		old_entry_label = self.loop_entry_label
+		old_exit_label = self.loop_exit_label
+		self.cur_fn.add_comment(f"while stmt (is_inf: {stmt.is_inf})")
+		self.loop_entry_label = self.cur_fn.local_name()
+		body_label = self.cur_fn.local_name()
+		self.loop_exit_label = self.cur_fn.local_name()
+
+		self.cur_fn.add_label(self.loop_entry_label)
+		if stmt.is_inf:
+			cond = IntLiteral(self.comp.bool_t, "1")
+			self.cur_fn.add_br(body_label)
+		else:
+			if isinstance(stmt.cond, ast.GuardExpr):
+				gexpr = self.convert_expr_with_cast(
+				    stmt.cond.expr.typ, stmt.cond.expr
+				)
+				if stmt.cond.is_result:
+					cond = Inst(
+					    InstKind.BooleanNot,
+					    [Selector(self.comp.bool_t, gexpr, Name("is_err"))]
 					)
-					if stmt.cond.has_cond:
-						gcond = self.convert_expr_with_cast(
-						    self.comp.bool_t, stmt.cond.cond
-						)
-						self.cur_fn.add_cond_br(
-						    gcond, body_label, self.loop_exit_label
-						)
 				else:
-					cond = self.convert_expr_with_cast(
-					    self.comp.bool_t, stmt.cond
+					cond = Inst(
+					    InstKind.BooleanNot, [
+					        Selector(
+					            self.comp.bool_t, gexpr, Name("is_none")
+					        )
+					    ]
+					)
+				self.cur_fn.alloca(
+				    stmt.cond.expr.typ.typ, stmt.cond.vars[0],
+				    Selector(stmt.cond.expr.typ.typ, gexpr, Name("value"))
+				)
+				if stmt.cond.has_cond:
+					gcond = self.convert_expr_with_cast(
+					    self.comp.bool_t, stmt.cond.cond
 					)
-				if isinstance(cond, IntLiteral) and cond.lit == "1":
-					self.cur_fn.add_br(body_label)
-				else:
 					self.cur_fn.add_cond_br(
-					    cond, body_label, self.loop_exit_label
+					    gcond, body_label, self.loop_exit_label
 					)
+			else:
+				cond = self.convert_expr_with_cast(
+				    self.comp.bool_t, stmt.cond
+				)
+			if isinstance(cond, IntLiteral) and cond.lit == "1":
+				self.cur_fn.add_br(body_label)
+			else:
+				self.cur_fn.add_cond_br(
+				    cond, body_label, self.loop_exit_label
+				)
 
-			gen_stmt = True
-			if isinstance(cond, IntLiteral) and cond.lit == "0":
-				self.cur_fn.add_comment("skip while stmt (cond: false)")
-				gen_stmt = False
+		gen_stmt = True
+		if isinstance(cond, IntLiteral) and cond.lit == "0":
+			self.cur_fn.add_comment("skip while stmt (cond: false)")
+			gen_stmt = False
 
-			self.cur_fn.add_label(body_label)
-			if gen_stmt:
-				self.convert_stmt(stmt.stmt)
-				self.cur_fn.add_comment(
-				    f"while stmt (goto to `{self.loop_entry_label}` for continue)"
+		self.cur_fn.add_label(body_label)
+		if gen_stmt:
+			self.convert_stmt(stmt.stmt)
+			self.cur_fn.add_comment(
+			    f"while stmt (goto to `{self.loop_entry_label}` for continue)"
+			)
+			self.cur_fn.add_br(self.loop_entry_label)
+		self.cur_fn.add_label(self.loop_exit_label)
+
+		self.loop_entry_label = old_entry_label
+		self.loop_exit_label = old_exit_label
+
+	def convert_let_stmt(self, stmt):
+		if len(stmt.lefts) == 1:
+			left = stmt.lefts[0]
+			ident = Ident(
+			    left.typ,
+			    self.cur_fn.local_name() if left.name == "_" else left.name
+			)
+			self.cur_fn.alloca_var(ident)
+			value = self.convert_expr_with_cast(left.typ, stmt.right)
+			self.cur_fn.store(ident, value)
+			if isinstance(value, IntLiteral) and self.comp.is_int(left.typ):
+				self.check_number_limit(
+				    left.typ, value.value(), stmt.right.pos
 				)
-				self.cur_fn.add_br(self.loop_entry_label)
-			self.cur_fn.add_label(self.loop_exit_label)
-
-			self.loop_entry_label = old_entry_label
-			self.loop_exit_label = old_exit_label
-		elif isinstance(stmt, ast.LetStmt):
-			if len(stmt.lefts) == 1:
-				left = stmt.lefts[0]
+		else:
+			right = self.convert_expr(stmt.right)
+			for i, left in enumerate(stmt.lefts):
 				ident = Ident(
 				    left.typ,
-				    self.cur_fn.local_name() if left.name == "_" else left.name
+				    self.cur_fn.local_name()
+				    if left.name == "_" else left.name
 				)
 				self.cur_fn.alloca_var(ident)
-				value = self.convert_expr_with_cast(left.typ, stmt.right)
-				self.cur_fn.store(ident, value)
-				if isinstance(value, IntLiteral) and self.comp.is_int(left.typ):
-					self.check_number_limit(
-					    left.typ, value.value(), stmt.right.pos
-					)
+				self.cur_fn.store(
+				    ident, Selector(left.typ, right, Name(f"f{i}"))
+				)
+
+	def convert_assign_stmt(self, stmt):
+		left = None
+		if isinstance(stmt.left, ast.Ident):
+			if stmt.left.name == "_":
+				_ = self.convert_expr(stmt.right)
+				return
 			else:
-				right = self.convert_expr(stmt.right)
-				for i, left in enumerate(stmt.lefts):
-					ident = Ident(
-					    left.typ,
-					    self.cur_fn.local_name()
-					    if left.name == "_" else left.name
-					)
-					self.cur_fn.alloca_var(ident)
-					self.cur_fn.store(
-					    ident, Selector(left.typ, right, Name(f"f{i}"))
-					)
-		elif isinstance(stmt, ast.AssignStmt):
-			left = None
-			if isinstance(stmt.left, ast.Ident):
-				if stmt.left.name == "_":
-					_ = self.convert_expr(stmt.right)
-					return
-				else:
-					left = self.convert_expr(stmt.left)
-			elif isinstance(stmt.left, ast.SelectorExpr):
-				if stmt.left.is_indirect:
-					left = Inst(
-					    InstKind.LoadPtr, [self.convert_expr(stmt.left.left)]
-					)
-				else:
-					left = self.convert_expr(stmt.left)
-			elif isinstance(stmt.left, ast.IndexExpr):
-				left_sym = stmt.left.left_typ.get_sym()
-				if left_sym.kind == TypeKind.Slice and stmt.op == Kind.Assign:
-					rec = self.convert_expr_with_cast(
-					    stmt.left.left_typ, stmt.left.left
-					)
-					if not isinstance(stmt.left.left_typ, type.Ref):
-						rec = Inst(InstKind.GetRef, [rec])
-					self.cur_fn.add_call(
-					    "_R4core6_slice3setM", [
-					        rec,
-					        self.convert_expr(stmt.left.index),
-					        Inst(
-					            InstKind.GetRef, [
-					                self.convert_expr_with_cast(
-					                    stmt.right.typ, stmt.right
-					                )
-					            ]
-					        )
-					    ]
-					)
-					return
-				left = Inst(InstKind.LoadPtr, [self.convert_expr(stmt.left)])
-			if left == None: return
-			if stmt.op == Kind.Assign:
-				value = self.convert_expr_with_cast(stmt.left.typ, stmt.right)
-				if isinstance(value,
-				              IntLiteral) and self.comp.is_int(stmt.left.typ):
-					self.check_number_limit(
-					    stmt.left.typ, value.value(), stmt.right.pos
-					)
-				self.cur_fn.store(left, value)
+				left = self.convert_expr(stmt.left)
+		elif isinstance(stmt.left, ast.SelectorExpr):
+			if stmt.left.is_indirect:
+				left = Inst(
+				    InstKind.LoadPtr, [self.convert_expr(stmt.left.left)]
+				)
 			else:
-				right = self.convert_expr_with_cast(stmt.left.typ, stmt.right)
-				if stmt.op == Kind.PlusAssign:
-					op_kind = InstKind.Add
-				elif stmt.op == Kind.MinusAssign:
-					op_kind = InstKind.Sub
-				elif stmt.op == Kind.MultAssign:
-					op_kind = InstKind.Mult
-				elif stmt.op == Kind.DivAssign:
-					op_kind = InstKind.Div
-				elif stmt.op == Kind.ModAssign:
-					op_kind = InstKind.Mod
-				elif stmt.op == Kind.AmpAssign:
-					op_kind = InstKind.BitAnd
-				elif stmt.op == Kind.PipeAssign:
-					op_kind = InstKind.BitOr
-				elif stmt.op == Kind.XorAssign:
-					op_kind = InstKind.BitXor
-				self.cur_fn.store(left, Inst(op_kind, [left, right]))
-		elif isinstance(stmt, ast.ExprStmt):
-			_ = self.convert_expr(stmt.expr)
+				left = self.convert_expr(stmt.left)
+		elif isinstance(stmt.left, ast.IndexExpr):
+			left_sym = stmt.left.left_typ.get_sym()
+			if left_sym.kind == TypeKind.Slice and stmt.op == Kind.Assign:
+				rec = self.convert_expr_with_cast(
+				    stmt.left.left_typ, stmt.left.left
+				)
+				if not isinstance(stmt.left.left_typ, type.Ref):
+					rec = Inst(InstKind.GetRef, [rec])
+				self.cur_fn.add_call(
+				    "_R4core6_slice3setM", [
+				        rec,
+				        self.convert_expr(stmt.left.index),
+				        Inst(
+				            InstKind.GetRef, [
+				                self.convert_expr_with_cast(
+				                    stmt.right.typ, stmt.right
+				                )
+				            ]
+				        )
+				    ]
+				)
+				return
+			left = Inst(InstKind.LoadPtr, [self.convert_expr(stmt.left)])
+		if left == None: return
+		if stmt.op == Kind.Assign:
+			value = self.convert_expr_with_cast(stmt.left.typ, stmt.right)
+			if isinstance(value,
+			              IntLiteral) and self.comp.is_int(stmt.left.typ):
+				self.check_number_limit(
+				    stmt.left.typ, value.value(), stmt.right.pos
+				)
+			self.cur_fn.store(left, value)
+		else:
+			right = self.convert_expr_with_cast(stmt.left.typ, stmt.right)
+			if stmt.op == Kind.PlusAssign:
+				op_kind = InstKind.Add
+			elif stmt.op == Kind.MinusAssign:
+				op_kind = InstKind.Sub
+			elif stmt.op == Kind.MultAssign:
+				op_kind = InstKind.Mult
+			elif stmt.op == Kind.DivAssign:
+				op_kind = InstKind.Div
+			elif stmt.op == Kind.ModAssign:
+				op_kind = InstKind.Mod
+			elif stmt.op == Kind.AmpAssign:
+				op_kind = InstKind.BitAnd
+			elif stmt.op == Kind.PipeAssign:
+				op_kind = InstKind.BitOr
+			elif stmt.op == Kind.XorAssign:
+				op_kind = InstKind.BitXor
+			self.cur_fn.store(left, Inst(op_kind, [left, right]))
+
+	def convert_expr_stmt(self, stmt):
+		_ = self.convert_expr(stmt.expr)
 
 	def convert_expr_with_cast(self, expected_typ, expr):
 		res_expr = self.convert_expr(expr)
@@ -1113,1375 +1304,1403 @@ class AST2RIR:
 		return res_expr
 
 	def convert_expr(self, expr):
-		if isinstance(expr, ast.ParExpr):
-			return self.convert_expr(expr.expr)
-		elif isinstance(expr, ast.NoneLiteral):
-			return NoneLiteral(self.comp.none_t)
-		elif isinstance(expr, ast.BoolLiteral):
-			return IntLiteral(self.comp.bool_t, str(int(expr.lit)))
-		elif isinstance(expr, ast.CharLiteral):
-			if expr.is_byte:
-				b, _ = utils.bytestr(expr.lit)
-				return IntLiteral(expr.typ, str(b[0]))
-			else:
-				return RuneLiteral(self.comp.rune_t, expr.lit)
-		elif isinstance(expr, ast.IntegerLiteral):
-			return IntLiteral(expr.typ, expr.lit)
-		elif isinstance(expr, ast.FloatLiteral):
-			return FloatLiteral(self.comp.float64_t, expr.lit)
-		elif isinstance(expr, ast.StringLiteral):
-			escaped_val = utils.smart_quote(expr.lit, expr.is_raw)
-			bytes, _ = utils.bytestr(escaped_val)
-			_, size = utils.bytestr(expr.lit)
-			if expr.is_bytestr:
-				return ArrayLiteral(
-				    expr.typ, [
-				        IntLiteral(self.comp.uint8_t, chr(b))
-				        for b in list(bytes)
-				    ]
-				)
-			return StringLiteral(expr.typ, escaped_val, str(size))
-		elif isinstance(expr, ast.EnumVariantExpr):
-			return IntLiteral(
-			    expr.typ.get_sym().info.underlying_typ, str(expr.info.value)
+		if convert := self.expr_converters[expr.__class__]:
+			return convert(expr)
+		raise Exception(expr.__class__)
+
+	def convert_par_expr(self, expr):
+		return self.convert_expr(expr.expr)
+
+	def convert_none_literal(self, expr):
+		return NoneLiteral(self.comp.none_t)
+
+	def convert_bool_literal(self, expr):
+		return IntLiteral(self.comp.bool_t, str(int(expr.lit)))
+
+	def convert_char_literal(self, expr):
+		if expr.is_byte:
+			b, _ = utils.bytestr(expr.lit)
+			return IntLiteral(expr.typ, str(b[0]))
+		else:
+			return RuneLiteral(self.comp.rune_t, expr.lit)
+		return Skip()
+
+	def convert_integer_literal(self, expr):
+		return IntLiteral(expr.typ, expr.lit)
+
+	def convert_float_literal(self, expr):
+		return FloatLiteral(self.comp.float64_t, expr.lit)
+
+	def convert_string_literal(self, expr):
+		escaped_val = utils.smart_quote(expr.lit, expr.is_raw)
+		bytes, _ = utils.bytestr(escaped_val)
+		_, size = utils.bytestr(expr.lit)
+		if expr.is_bytestr:
+			return ArrayLiteral(
+			    expr.typ, [
+			        IntLiteral(self.comp.uint8_t, chr(b))
+			        for b in list(bytes)
+			    ]
 			)
-		elif isinstance(expr, ast.SelfExpr):
-			return Ident(expr.typ, "self")
-		elif isinstance(expr, ast.Ident):
-			if isinstance(expr.sym, sym.Const):
-				return self.convert_const(expr.sym)
-			elif isinstance(expr.sym, sym.Static):
-				if expr.sym.is_extern:
-					return Ident(expr.typ, expr.sym.name)
-				return Ident(expr.typ, mangle_symbol(expr.sym))
-			# comptime values
-			elif expr.is_comptime:
-				if expr.name == "_FILE_":
-					return StringLiteral(
-					    self.comp.str_t, expr.pos.file, len(expr.pos.file)
-					)
-				elif expr.name == "_LINE_":
-					line = str(expr.pos.line + 1)
-					return StringLiteral(self.comp.str_t, line, len(line))
-				elif expr.name == "_COLUMN_":
-					col = str(expr.pos.col)
-					return StringLiteral(self.comp.str_t, col, len(col))
-				elif expr.name == "_FUNCTION_":
-					return StringLiteral(
-					    self.comp.str_t, self.cur_fn_qualname,
-					    len(self.cur_fn_qualname)
-					)
-				elif expr.name == "_RIVET_VERSION_":
-					return StringLiteral(
-					    self.comp.str_t, utils.VERSION, len(utils.VERSION)
-					)
-				elif expr.name == "_RIVET_COMMIT_":
-					commit = utils.commit_hash()
-					return StringLiteral(self.comp.str_t, commit, len(commit))
-			elif isinstance(expr.sym, sym.Fn):
-				return Ident(expr.typ, mangle_symbol(expr.sym))
-			# runtime object
-			return Ident(expr.typ, expr.name)
-		elif isinstance(expr, ast.BuiltinCallExpr):
-			if expr.name in ("compile_warn", "compile_error"):
-				msg = self.convert_expr(expr.args[0])
-				if isinstance(msg, StringLiteral):
-					if expr.name == "compile_warn":
-						report.warn(msg.lit, expr.pos)
-					else:
-						report.error(msg.lit, expr.pos)
-				else:
-					report.error(
-					    f"`{expr.name}` can only use string comptime values",
-					    expr.pos
-					)
-			elif expr.name == "mangle_of":
-				arg0 = expr.args[0]
-				if isinstance(arg0, ast.Ident):
-					mangled_name = mangle_symbol(arg0.sym)
-				else:
-					mangled_name = mangle_symbol(arg0.field_info)
+		return StringLiteral(expr.typ, escaped_val, str(size))
+
+	def convert_enum_variant_expr(self, expr):
+		return IntLiteral(
+		    expr.typ.get_sym().info.underlying_typ, str(expr.info.value)
+		)
+
+	def convert_self_expr(self, expr):
+		return Ident(expr.typ, "self")
+
+	def convert_ident(self, expr):
+		if isinstance(expr.sym, sym.Const):
+			return self.convert_const(expr.sym)
+		elif isinstance(expr.sym, sym.Static):
+			if expr.sym.is_extern:
+				return Ident(expr.typ, expr.sym.name)
+			return Ident(expr.typ, mangle_symbol(expr.sym))
+		# comptime values
+		elif expr.is_comptime:
+			if expr.name == "_FILE_":
 				return StringLiteral(
-				    self.comp.str_t, mangled_name, len(mangled_name)
+				    self.comp.str_t, expr.pos.file, len(expr.pos.file)
 				)
-			elif expr.name in ("size_of", "align_of"):
-				size, align = self.comp.type_size(expr.args[0].typ)
-				if expr.name == "size_of":
-					return IntLiteral(self.comp.usize_t, str(size))
+			elif expr.name == "_LINE_":
+				line = str(expr.pos.line + 1)
+				return StringLiteral(self.comp.str_t, line, len(line))
+			elif expr.name == "_COLUMN_":
+				col = str(expr.pos.col)
+				return StringLiteral(self.comp.str_t, col, len(col))
+			elif expr.name == "_FUNCTION_":
+				return StringLiteral(
+				    self.comp.str_t, self.cur_fn_qualname,
+				    len(self.cur_fn_qualname)
+				)
+			elif expr.name == "_RIVET_VERSION_":
+				return StringLiteral(
+				    self.comp.str_t, utils.VERSION, len(utils.VERSION)
+				)
+			elif expr.name == "_RIVET_COMMIT_":
+				commit = utils.commit_hash()
+				return StringLiteral(self.comp.str_t, commit, len(commit))
+		elif isinstance(expr.sym, sym.Fn):
+			return Ident(expr.typ, mangle_symbol(expr.sym))
+		# runtime object
+		return Ident(expr.typ, expr.name)
+
+	def convert_builtin_call_expr(self, expr):
+		if expr.name in ("compile_warn", "compile_error"):
+			msg = self.convert_expr(expr.args[0])
+			if isinstance(msg, StringLiteral):
+				if expr.name == "compile_warn":
+					report.warn(msg.lit, expr.pos)
 				else:
-					return IntLiteral(self.comp.usize_t, str(align))
-			elif expr.name == "assert":
-				msg_ = f"`{expr.args[0]}`"
-				msg = utils.smart_quote(msg_, False)
-				_, size = utils.bytestr(msg_)
+					report.error(msg.lit, expr.pos)
+			else:
+				report.error(
+				    f"`{expr.name}` can only use string comptime values",
+				    expr.pos
+				)
+		elif expr.name == "mangle_of":
+			arg0 = expr.args[0]
+			if isinstance(arg0, ast.Ident):
+				mangled_name = mangle_symbol(arg0.sym)
+			else:
+				mangled_name = mangle_symbol(arg0.field_info)
+			return StringLiteral(
+			    self.comp.str_t, mangled_name, len(mangled_name)
+			)
+		elif expr.name in ("size_of", "align_of"):
+			size, align = self.comp.type_size(expr.args[0].typ)
+			if expr.name == "size_of":
+				return IntLiteral(self.comp.usize_t, str(size))
+			else:
+				return IntLiteral(self.comp.usize_t, str(align))
+		elif expr.name == "assert":
+			msg_ = f"`{expr.args[0]}`"
+			msg = utils.smart_quote(msg_, False)
+			_, size = utils.bytestr(msg_)
+			self.cur_fn.add_call(
+			    "_R4core6assertF", [
+			        self.convert_expr(expr.args[0]),
+			        StringLiteral(self.comp.str_t, msg, size)
+			    ]
+			)
+		elif expr.name == "unreachable":
+			self.panic("entered unreachable code")
+			self.cur_fn.unreachable()
+		elif expr.name == "breakpoint":
+			if self.comp.prefs.build_mode != prefs.BuildMode.Release:
+				self.cur_fn.breakpoint()
+		return Skip()
+
+	def convert_cast_expr(self, expr):
+		res = self.convert_expr_with_cast(expr.typ, expr.expr)
+		if isinstance(res, IntLiteral):
+			if self.comp.is_int(expr.typ) or expr.typ == self.comp.bool_t:
+				self.check_number_limit(expr.typ, res.value(), expr.pos)
+				res.typ = expr.typ
+				return res
+		typ_sym = expr.expr.typ.get_sym()
+		expr_typ_sym = expr.typ.get_sym()
+		if typ_sym.kind == sym.TypeKind.Union:
+			if not typ_sym.info.is_c_union:
+				msg = utils.smart_quote(
+				    f"cannot cast union value `{expr.expr}` to `{expr.typ}`",
+				    False
+				)
 				self.cur_fn.add_call(
-				    "_R4core6assertF", [
-				        self.convert_expr(expr.args[0]),
-				        StringLiteral(self.comp.str_t, msg, size)
+				    "_R4core8panic_ifF", [
+				        Inst(
+				            InstKind.Cmp, [
+				                Name("!="),
+				                Selector(
+				                    self.comp.usize_t, res, Name("idx")
+				                ),
+				                self.type_nr(expr_typ_sym)
+				            ]
+				        ),
+				        StringLiteral(self.comp.str_t, msg, len(msg))
 				    ]
 				)
-			elif expr.name == "unreachable":
-				self.panic("entered unreachable code")
-				self.cur_fn.unreachable()
-			elif expr.name == "breakpoint":
-				if self.comp.prefs.build_mode != prefs.BuildMode.Release:
-					self.cur_fn.breakpoint()
-		elif isinstance(expr, ast.CastExpr):
-			res = self.convert_expr_with_cast(expr.typ, expr.expr)
-			if isinstance(res, IntLiteral):
-				if self.comp.is_int(expr.typ) or expr.typ == self.comp.bool_t:
-					self.check_number_limit(expr.typ, res.value(), expr.pos)
-					res.typ = expr.typ
-					return res
-			typ_sym = expr.expr.typ.get_sym()
-			expr_typ_sym = expr.typ.get_sym()
-			if typ_sym.kind == sym.TypeKind.Union:
-				if not typ_sym.info.is_c_union:
-					msg = utils.smart_quote(
-					    f"cannot cast union value `{expr.expr}` to `{expr.typ}`",
-					    False
-					)
-					self.cur_fn.add_call(
-					    "_R4core8panic_ifF", [
-					        Inst(
-					            InstKind.Cmp, [
-					                Name("!="),
-					                Selector(
-					                    self.comp.usize_t, res, Name("idx")
-					                ),
-					                IntLiteral(
-					                    self.comp.usize_t,
-					                    str(expr_typ_sym.index)
-					                )
-					            ]
-					        ),
-					        StringLiteral(self.comp.str_t, msg, len(msg))
-					    ]
-					)
-				return Selector(
-				    expr.typ, res, Name(mangle_symbol(expr_typ_sym))
+			return Selector(
+			    expr.typ, res, Name(mangle_symbol(expr_typ_sym))
+			)
+		tmp = self.cur_fn.local_name()
+		self.cur_fn.alloca(
+		    expr.typ, tmp, Inst(InstKind.Cast, [res, Type(expr.typ)])
+		)
+		return Ident(expr.typ, tmp)
+
+	def convert_struct_literal(self, expr):
+		typ_sym = expr.typ.get_sym()
+		tmp = Ident(expr.typ, self.cur_fn.local_name())
+		self.cur_fn.alloca_var(tmp)
+		initted_fields = {}
+		for f in expr.fields:
+			initted_fields[f.name] = True
+			field_expr = self.convert_expr_with_cast(f.typ, f.expr)
+			if isinstance(field_expr,
+			              IntLiteral) and self.comp.is_int(f.typ):
+				self.check_number_limit(
+				    f.typ, field_expr.value(), f.expr.pos
 				)
-			tmp = self.cur_fn.local_name()
-			self.cur_fn.alloca(
-			    expr.typ, tmp, Inst(InstKind.Cast, [res, Type(expr.typ)])
+			self.cur_fn.store(
+			    Selector(f.typ, tmp, Name(f.name)), field_expr
 			)
-			return Ident(expr.typ, tmp)
-		elif isinstance(expr, ast.StructLiteral):
+		for f in typ_sym.fields:
+			if f.name in initted_fields:
+				continue
+			if f.has_def_expr:
+				val = self.convert_expr_with_cast(f.typ, f.def_expr)
+			else:
+				val = self.default_value(f.typ)
+			self.cur_fn.store(Selector(f.typ, tmp, Name(f.name)), val)
+		return tmp
+
+	def convert_tuple_literal(self, expr):
+		expr_sym = expr.typ.get_sym()
+		tmp = Ident(expr.typ, self.cur_fn.local_name())
+		self.cur_fn.alloca_var(tmp)
+		for i, elem in enumerate(expr.exprs):
+			field_expr = self.convert_expr_with_cast(
+			    expr_sym.info.types[i], elem
+			)
+			if isinstance(field_expr, IntLiteral) and self.comp.is_int(
+			    expr_sym.info.types[i]
+			):
+				self.check_number_limit(
+				    expr_sym.info.types[i], field_expr.value(), elem.pos
+				)
+			self.cur_fn.store(
+			    Selector(expr_sym.info.types[i], tmp, Name(f"f{i}")),
+			    field_expr
+			)
+		return tmp
+
+	def convert_array_literal(self, expr):
+		if len(expr.elems) == 0:
+			return self.default_value(expr.typ)
+		elem_typ = expr.typ.get_sym().info.elem_typ
+		elems = []
+		for i, elem in enumerate(expr.elems):
+			element = self.convert_expr_with_cast(elem_typ, elem)
+			if isinstance(element,
+			              IntLiteral) and self.comp.is_int(elem_typ):
+				self.check_number_limit(elem_typ, element.value(), elem.pos)
+			elems.append(element)
+		return ArrayLiteral(expr.typ, elems)
+
+	def convert_call_expr(self, expr):
+		if expr.is_ctor:
+			value = expr.args[0].expr
 			typ_sym = expr.typ.get_sym()
-			tmp = Ident(expr.typ, self.cur_fn.local_name())
-			self.cur_fn.alloca_var(tmp)
-			initted_fields = {}
-			for f in expr.fields:
-				initted_fields[f.name] = True
-				field_expr = self.convert_expr_with_cast(f.typ, f.expr)
-				if isinstance(field_expr,
-				              IntLiteral) and self.comp.is_int(f.typ):
-					self.check_number_limit(
-					    f.typ, field_expr.value(), f.expr.pos
-					)
-				self.cur_fn.store(
-				    Selector(f.typ, tmp, Name(f.name)), field_expr
+			if typ_sym.kind == sym.TypeKind.Trait:
+				return self.trait_value(
+				    self.convert_expr_with_cast(value.typ, value),
+				    value.typ, expr.typ
 				)
-			for f in typ_sym.fields:
-				if f.name in initted_fields:
-					continue
-				if f.has_def_expr:
-					val = self.convert_expr_with_cast(f.typ, f.def_expr)
-				else:
-					val = self.default_value(f.typ)
-				self.cur_fn.store(Selector(f.typ, tmp, Name(f.name)), val)
-			return tmp
-		elif isinstance(expr, ast.TupleLiteral):
-			expr_sym = expr.typ.get_sym()
+			value_sym = self.comp.untyped_to_type(value.typ).get_sym()
 			tmp = Ident(expr.typ, self.cur_fn.local_name())
 			self.cur_fn.alloca_var(tmp)
-			for i, elem in enumerate(expr.exprs):
-				field_expr = self.convert_expr_with_cast(
-				    expr_sym.info.types[i], elem
-				)
-				if isinstance(field_expr, IntLiteral) and self.comp.is_int(
-				    expr_sym.info.types[i]
-				):
-					self.check_number_limit(
-					    expr_sym.info.types[i], field_expr.value(), elem.pos
-					)
+			self.cur_fn.store(
+			    Selector(value.typ, tmp, Name(mangle_symbol(value_sym))),
+			    self.convert_expr_with_cast(value.typ, value)
+			)
+			if not typ_sym.info.is_c_union:
 				self.cur_fn.store(
-				    Selector(expr_sym.info.types[i], tmp, Name(f"f{i}")),
-				    field_expr
+				    Selector(self.comp.usize_t, tmp, Name("idx")),
+				    self.type_nr(value_sym)
 				)
 			return tmp
-		elif isinstance(expr, ast.ArrayLiteral):
-			if len(expr.elems) == 0:
-				return self.default_value(expr.typ)
-			elem_typ = expr.typ.get_sym().info.elem_typ
-			elems = []
-			for i, elem in enumerate(expr.elems):
-				element = self.convert_expr_with_cast(elem_typ, elem)
-				if isinstance(element,
-				              IntLiteral) and self.comp.is_int(elem_typ):
-					self.check_number_limit(elem_typ, element.value(), elem.pos)
-				elems.append(element)
-			return ArrayLiteral(expr.typ, elems)
-		elif isinstance(expr, ast.CallExpr):
-			if expr.is_ctor:
-				value = expr.args[0].expr
-				typ_sym = expr.typ.get_sym()
-				if typ_sym.kind == sym.TypeKind.Trait:
-					return self.trait_value(
-					    self.convert_expr_with_cast(value.typ, value),
-					    value.typ, expr.typ
-					)
-				value_sym = self.comp.untyped_to_type(value.typ).get_sym()
-				tmp = Ident(expr.typ, self.cur_fn.local_name())
-				self.cur_fn.alloca_var(tmp)
-				self.cur_fn.store(
-				    Selector(value.typ, tmp, Name(mangle_symbol(value_sym))),
-				    self.convert_expr_with_cast(value.typ, value)
+		args = []
+		is_trait_call = False
+		if expr.info.is_method:
+			left_sym = expr.left.left_typ.get_sym()
+			if left_sym.kind == TypeKind.Trait:
+				is_trait_call = True
+				self_expr = Inst(
+				    InstKind.LoadPtr, [
+				        self.convert_expr_with_cast(
+				            expr.info.self_typ, expr.left.left
+				        )
+				    ]
 				)
-				if not typ_sym.info.is_c_union:
-					self.cur_fn.store(
-					    Selector(self.comp.usize_t, tmp, Name("idx")),
-					    IntLiteral(self.comp.usize_t, str(value_sym.index))
-					)
-				return tmp
-			args = []
-			is_trait_call = False
+				args.append(
+				    Selector(
+				        type.Ptr(self.comp.void_t),
+				        Inst(
+				            InstKind.LoadPtr, [
+				                Inst(
+				                    InstKind.GetElementPtr, [
+				                        Name(
+				                            mangle_symbol(left_sym) +
+				                            "4VTBL"
+				                        ),
+				                        Selector(
+				                            self.comp.usize_t, self_expr,
+				                            Name("idx")
+				                        )
+				                    ]
+				                )
+				            ]
+				        ), Name(expr.info.name)
+				    )
+				)
+				args.append(
+				    Selector(
+				        type.Ptr(self.comp.void_t), self_expr, Name("obj")
+				    )
+				)
+		if not is_trait_call:
+			if expr.is_closure:
+				name = self.convert_expr_with_cast(expr.left.typ, expr.left)
+			elif expr.info.is_extern:
+				name = Ident(expr.typ, expr.info.name)
+			else:
+				name = Ident(expr.typ, mangle_symbol(expr.info))
+			args.append(name)
 			if expr.info.is_method:
-				left_sym = expr.left.left_typ.get_sym()
-				if left_sym.kind == TypeKind.Trait:
-					is_trait_call = True
-					self_expr = Inst(
-					    InstKind.LoadPtr, [
-					        self.convert_expr_with_cast(
-					            expr.info.self_typ, expr.left.left
-					        )
-					    ]
-					)
+				self_expr = self.convert_expr_with_cast(
+				    expr.info.self_typ, expr.left.left
+				)
+				if expr.info.rec_is_ref and not isinstance(
+				    expr.left.left_typ, type.Ref
+				):
+					self_expr = Inst(InstKind.GetRef, [self_expr])
+				args.append(self_expr)
+		args_len = expr.info.args_len()
+		for i, arg in enumerate(expr.args):
+			if expr.info.is_variadic and i == args_len:
+				break
+			arg_typ = expr.info.args[i].typ
+			arg_expr = self.convert_expr_with_cast(arg_typ, arg.expr)
+			if isinstance(arg_expr,
+			              IntLiteral) and self.comp.is_int(arg_typ):
+				self.check_number_limit(arg_typ, arg_expr.value(), arg.pos)
+			args.append(arg_expr)
+		if expr.info.is_variadic:
+			args_nr = args_len
+			variadic_count = len(expr.args) - args_nr
+			if expr.info.is_extern:
+				for i in range(args_nr + 1, len(expr.args)):
+					arg = expr.args[i]
 					args.append(
-					    Selector(
-					        type.Ptr(self.comp.void_t),
-					        Inst(
-					            InstKind.LoadPtr, [
-					                Inst(
-					                    InstKind.GetElementPtr, [
-					                        Name(
-					                            mangle_symbol(left_sym) +
-					                            "4VTBL"
-					                        ),
-					                        Selector(
-					                            self.comp.usize_t, self_expr,
-					                            Name("idx")
-					                        )
-					                    ]
-					                )
-					            ]
-					        ), Name(expr.info.name)
-					    )
+					    self.convert_expr_with_cast(arg.typ, arg.expr)
 					)
+			else:
+				var_arg = expr.info.args[-1]
+				if variadic_count == 1 and len(expr.args
+				                               ) > 0 and isinstance(
+				                                   expr.args[-1].expr.typ,
+				                                   type.Variadic
+				                               ):
+					arg = expr.args[-1]
 					args.append(
-					    Selector(
-					        type.Ptr(self.comp.void_t), self_expr, Name("obj")
-					    )
-					)
-			if not is_trait_call:
-				if expr.is_closure:
-					name = self.convert_expr_with_cast(expr.left.typ, expr.left)
-				elif expr.info.is_extern:
-					name = Ident(expr.typ, expr.info.name)
-				else:
-					name = Ident(expr.typ, mangle_symbol(expr.info))
-				args.append(name)
-				if expr.info.is_method:
-					self_expr = self.convert_expr_with_cast(
-					    expr.info.self_typ, expr.left.left
+					    self.convert_expr_with_cast(arg.typ, arg.expr)
 					)
-					if expr.info.rec_is_ref and not isinstance(
-					    expr.left.left_typ, type.Ref
-					):
-						self_expr = Inst(InstKind.GetRef, [self_expr])
-					args.append(self_expr)
-			args_len = expr.info.args_len()
-			for i, arg in enumerate(expr.args):
-				if expr.info.is_variadic and i == args_len:
-					break
-				arg_typ = expr.info.args[i].typ
-				arg_expr = self.convert_expr_with_cast(arg_typ, arg.expr)
-				if isinstance(arg_expr,
-				              IntLiteral) and self.comp.is_int(arg_typ):
-					self.check_number_limit(arg_typ, arg_expr.value(), arg.pos)
-				args.append(arg_expr)
-			if expr.info.is_variadic:
-				args_nr = args_len
-				variadic_count = len(expr.args) - args_nr
-				if expr.info.is_extern:
-					for i in range(args_nr + 1, len(expr.args)):
-						arg = expr.args[i]
-						args.append(
-						    self.convert_expr_with_cast(arg.typ, arg.expr)
+				elif variadic_count > 0:
+					vargs = []
+					for i in range(args_nr, len(expr.args)):
+						vargs.append(
+						    self.convert_expr_with_cast(
+						        var_arg.typ.typ, expr.args[i].expr
+						    )
 						)
+					args.append(self.variadic_args(vargs, var_arg.typ.typ))
 				else:
-					var_arg = expr.info.args[-1]
-					if variadic_count == 1 and len(expr.args
-					                               ) > 0 and isinstance(
-					                                   expr.args[-1].expr.typ,
-					                                   type.Variadic
-					                               ):
-						arg = expr.args[-1]
-						args.append(
-						    self.convert_expr_with_cast(arg.typ, arg.expr)
-						)
-					elif variadic_count > 0:
-						vargs = []
-						for i in range(args_nr, len(expr.args)):
-							vargs.append(
-							    self.convert_expr_with_cast(
-							        var_arg.typ.typ, expr.args[i].expr
-							    )
-							)
-						args.append(self.variadic_args(vargs, var_arg.typ.typ))
-					else:
-						args.append(Ident(var_arg.typ, "_R4core11empty_slice"))
-			inst = Inst(InstKind.Call, args)
-			if expr.info.ret_typ in self.void_types:
-				self.cur_fn.add_inst(inst)
-			else:
-				is_void_value = expr.typ in self.void_types
-				tmp = self.cur_fn.local_name()
-				self.cur_fn.alloca(expr.info.ret_typ, tmp, inst)
-
-				if expr.has_err_handler():
-					err_handler_is_void = (
-					    not expr.err_handler.is_propagate
-					) and expr.err_handler.expr.typ in self.void_types
-					res_value = Ident(expr.info.ret_typ, tmp)
-					panic_l = self.cur_fn.local_name()
-					else_value = "" if err_handler_is_void else self.cur_fn.local_name(
-					)
-					exit_l = "" if expr.err_handler.is_propagate else self.cur_fn.local_name(
+					args.append(Ident(var_arg.typ, "_R4core11empty_slice"))
+		inst = Inst(InstKind.Call, args)
+		if expr.info.ret_typ in self.void_types:
+			self.cur_fn.add_inst(inst)
+		else:
+			is_void_value = expr.typ in self.void_types
+			tmp = self.cur_fn.local_name()
+			self.cur_fn.alloca(expr.info.ret_typ, tmp, inst)
+
+			if expr.has_err_handler():
+				err_handler_is_void = (
+				    not expr.err_handler.is_propagate
+				) and expr.err_handler.expr.typ in self.void_types
+				res_value = Ident(expr.info.ret_typ, tmp)
+				panic_l = self.cur_fn.local_name()
+				else_value = "" if err_handler_is_void else self.cur_fn.local_name(
+				)
+				exit_l = "" if expr.err_handler.is_propagate else self.cur_fn.local_name(
+				)
+				if err_handler_is_void:
+					self.cur_fn.add_cond_br(
+					    Selector(
+					        self.comp.bool_t, res_value, Name("is_err")
+					    ), panic_l, exit_l
 					)
-					if err_handler_is_void:
-						self.cur_fn.add_cond_br(
-						    Selector(
-						        self.comp.bool_t, res_value, Name("is_err")
-						    ), panic_l, exit_l
+				else:
+					self.cur_fn.add_cond_br(
+					    Selector(
+					        self.comp.bool_t, res_value, Name("is_err")
+					    ), panic_l, else_value
+					)
+				self.cur_fn.add_label(panic_l)
+				if expr.err_handler.is_propagate:
+					if self.cur_fn_is_main:
+						self.cur_fn.add_call(
+						    "_R4core6_error5printM", [
+						        Inst(
+						            InstKind.GetRef, [
+						                Selector(
+						                    self.comp.error_t, res_value,
+						                    Name("err")
+						                )
+						            ]
+						        )
+						    ]
 						)
+						self.cur_fn.unreachable()
 					else:
-						self.cur_fn.add_cond_br(
-						    Selector(
-						        self.comp.bool_t, res_value, Name("is_err")
-						    ), panic_l, else_value
-						)
-					self.cur_fn.add_label(panic_l)
-					if expr.err_handler.is_propagate:
-						if self.cur_fn_is_main:
-							self.cur_fn.add_call(
-							    "_R4core6_error5printM", [
-							        Inst(
-							            InstKind.GetRef, [
-							                Selector(
-							                    self.comp.error_t, res_value,
-							                    Name("err")
-							                )
-							            ]
-							        )
-							    ]
-							)
-							self.cur_fn.unreachable()
-						else:
-							tmp2 = Ident(
-							    self.cur_fn.ret_typ, self.cur_fn.local_name()
-							)
-							self.cur_fn.alloca_var(tmp2)
-							self.cur_fn.store(
-							    Selector(
-							        self.comp.bool_t, tmp2, Name("is_err")
-							    ), IntLiteral(self.comp.bool_t, "1")
-							)
-							self.cur_fn.store(
-							    Selector(self.comp.error_t, tmp2, Name("err")),
-							    Selector(
-							        self.comp.error_t, res_value, Name("err")
-							    )
-							)
-							self.cur_fn.add_ret(tmp2)
-						self.cur_fn.add_label(else_value)
-						if is_void_value:
-							return Skip()
-						return Selector(
-						    expr.info.ret_typ.typ, res_value, Name("value")
-						)
-					else: # `catch`
-						if expr.err_handler.has_varname():
-							self.cur_fn.alloca(
-							    self.comp.error_t, expr.err_handler.varname,
-							    Selector(
-							        self.comp.error_t, res_value, Name("err")
-							    )
-							)
-						if err_handler_is_void:
-							self.convert_expr_with_cast(
-							    expr.info.ret_typ.typ, expr.err_handler.expr
-							)
-							self.cur_fn.add_label(exit_l)
-							return Selector(expr.typ, res_value, Name("value"))
 						tmp2 = Ident(
-						    expr.info.ret_typ.typ, self.cur_fn.local_name()
+						    self.cur_fn.ret_typ, self.cur_fn.local_name()
 						)
 						self.cur_fn.alloca_var(tmp2)
 						self.cur_fn.store(
-						    tmp2,
-						    self.convert_expr_with_cast(
-						        expr.info.ret_typ.typ, expr.err_handler.expr
-						    )
+						    Selector(
+						        self.comp.bool_t, tmp2, Name("is_err")
+						    ), IntLiteral(self.comp.bool_t, "1")
 						)
-						self.cur_fn.add_br(exit_l)
-						self.cur_fn.add_label(else_value)
 						self.cur_fn.store(
-						    tmp2, Selector(expr.typ, res_value, Name("value"))
+						    Selector(self.comp.error_t, tmp2, Name("err")),
+						    Selector(
+						        self.comp.error_t, res_value, Name("err")
+						    )
+						)
+						self.cur_fn.add_ret(tmp2)
+					self.cur_fn.add_label(else_value)
+					if is_void_value:
+						return Skip()
+					return Selector(
+					    expr.info.ret_typ.typ, res_value, Name("value")
+					)
+				else: # `catch`
+					if expr.err_handler.has_varname():
+						self.cur_fn.alloca(
+						    self.comp.error_t, expr.err_handler.varname,
+						    Selector(
+						        self.comp.error_t, res_value, Name("err")
+						    )
+						)
+					if err_handler_is_void:
+						self.convert_expr_with_cast(
+						    expr.info.ret_typ.typ, expr.err_handler.expr
 						)
 						self.cur_fn.add_label(exit_l)
-						return tmp2
-				id = Ident(expr.info.ret_typ, tmp)
-				id.use_arr_field = isinstance(expr.info.ret_typ, type.Array)
-				return id
-		elif isinstance(expr, ast.BranchExpr):
-			if expr.op == Kind.KeyContinue:
-				self.cur_fn.add_br(self.loop_entry_label)
-			else:
-				self.cur_fn.add_br(self.loop_exit_label)
-			return Skip()
-		elif isinstance(expr, ast.RaiseExpr):
-			name = mangle_symbol(self.cur_fn.ret_typ.sym)
-			errtype_tag = str(expr.expr.typ.sym.info.nr)
-			vargs = []
-			if len(expr.expr.args) == 0:
-				msg = StringLiteral(self.comp.str_t, "", 0)
-			else:
-				msg = self.convert_expr_with_cast(
-				    self.comp.str_t, expr.expr.args[0].expr
-				)
-				vargs = [
-				    self.convert_expr_with_cast(
-				        type.Type(self.comp.trait_to_string), a.expr
-				    ) for a in expr.expr.args[1:]
-				]
-			self.cur_fn.add_ret(
-			    self.result_err(expr.expr.typ, msg, errtype_tag, vargs)
+						return Selector(expr.typ, res_value, Name("value"))
+					tmp2 = Ident(
+					    expr.info.ret_typ.typ, self.cur_fn.local_name()
+					)
+					self.cur_fn.alloca_var(tmp2)
+					self.cur_fn.store(
+					    tmp2,
+					    self.convert_expr_with_cast(
+					        expr.info.ret_typ.typ, expr.err_handler.expr
+					    )
+					)
+					self.cur_fn.add_br(exit_l)
+					self.cur_fn.add_label(else_value)
+					self.cur_fn.store(
+					    tmp2, Selector(expr.typ, res_value, Name("value"))
+					)
+					self.cur_fn.add_label(exit_l)
+					return tmp2
+			id = Ident(expr.info.ret_typ, tmp)
+			id.use_arr_field = isinstance(expr.info.ret_typ, type.Array)
+			return id
+		return Skip()
+
+	def convert_branch_expr(self, expr):
+		if expr.op == Kind.KeyContinue:
+			self.cur_fn.add_br(self.loop_entry_label)
+		else:
+			self.cur_fn.add_br(self.loop_exit_label)
+		return Skip()
+
+	def convert_raise_expr(self, expr):
+		name = mangle_symbol(self.cur_fn.ret_typ.sym)
+		errtype_tag = self.errtype_tag(expr.expr.typ.sym)
+		vargs = []
+		if len(expr.expr.args) == 0:
+			msg = StringLiteral(self.comp.str_t, "", 0)
+		else:
+			msg = self.convert_expr_with_cast(
+			    self.comp.str_t, expr.expr.args[0].expr
+			)
+			vargs = [
+			    self.convert_expr_with_cast(
+			        type.Type(self.comp.trait_to_string), a.expr
+			    ) for a in expr.expr.args[1:]
+			]
+		self.cur_fn.add_ret(
+		    self.result_err(expr.expr.typ, msg, errtype_tag, vargs)
+		)
+		return Skip()
+
+	def convert_return_expr(self, expr):
+		wrap_result = isinstance(self.cur_fn.ret_typ, type.Result)
+		ret_typ = self.cur_fn.ret_typ.typ if wrap_result else self.cur_fn.ret_typ
+		if expr.has_expr:
+			expr = self.convert_expr_with_cast(ret_typ, expr.expr)
+			if wrap_result:
+				expr = self.result_ok(self.cur_fn.ret_typ, expr)
+			self.cur_fn.add_ret(expr)
+		elif wrap_result:
+			self.cur_fn.add_ret(self.result_void_ok(self.cur_fn.ret_typ))
+		else:
+			self.cur_fn.add_ret_void()
+		return Skip()
+
+	def convert_selector_expr(self, expr):
+		left_sym = expr.left_typ.get_sym()
+		left = self.convert_expr_with_cast(expr.left_typ, expr.left)
+		if expr.is_indirect:
+			tmp = self.cur_fn.local_name()
+			self.cur_fn.alloca(
+			    expr.typ, tmp, Inst(InstKind.LoadPtr, [left])
 			)
-			return Skip()
-		elif isinstance(expr, ast.ReturnExpr):
-			wrap_result = isinstance(self.cur_fn.ret_typ, type.Result)
-			ret_typ = self.cur_fn.ret_typ.typ if wrap_result else self.cur_fn.ret_typ
-			if expr.has_expr:
-				expr = self.convert_expr_with_cast(ret_typ, expr.expr)
-				if wrap_result:
-					expr = self.result_ok(self.cur_fn.ret_typ, expr)
-				self.cur_fn.add_ret(expr)
-			elif wrap_result:
-				self.cur_fn.add_ret(self.result_void_ok(self.cur_fn.ret_typ))
+			return Ident(expr.typ, tmp)
+		elif isinstance(expr.left_typ, (type.Ref, type.Ptr)):
+			left = Inst(InstKind.LoadPtr, [left])
+
+		if expr.is_nonecheck:
+			panic_l = self.cur_fn.local_name()
+			exit_l = self.cur_fn.local_name()
+			if isinstance(expr.typ, type.Ref):
+				self.cur_fn.add_cond_br(
+				    Inst(InstKind.Cmp,
+				         [Name("=="), left, NoneLiteral()]), panic_l, exit_l
+				)
+				self.cur_fn.add_label(panic_l)
+				self.panic(f"attempt to use none value (`{expr.left}`)")
+				self.cur_fn.unreachable()
+				self.cur_fn.add_label(exit_l)
+				return left
 			else:
-				self.cur_fn.add_ret_void()
-			return Skip()
-		elif isinstance(expr, ast.SelectorExpr):
-			left_sym = expr.left_typ.get_sym()
-			left = self.convert_expr_with_cast(expr.left_typ, expr.left)
-			if expr.is_indirect:
-				tmp = self.cur_fn.local_name()
-				self.cur_fn.alloca(
-				    expr.typ, tmp, Inst(InstKind.LoadPtr, [left])
+				self.cur_fn.add_cond_br(
+				    Selector(self.comp.bool_t, left, Name("is_none")),
+				    panic_l, exit_l
+				)
+				self.cur_fn.add_label(panic_l)
+				self.panic(f"attempt to use none value (`{expr.left}`)")
+				self.cur_fn.unreachable()
+				self.cur_fn.add_label(exit_l)
+				return Selector(expr.typ, left, Name("value"))
+		elif isinstance(left, StringLiteral):
+			if expr.field_name == "ptr":
+				return StringLiteral(
+				    type.Ptr(self.comp.uint8_t), left.lit, left.len, True
 				)
-				return Ident(expr.typ, tmp)
-			elif isinstance(expr.left_typ, (type.Ref, type.Ptr)):
-				left = Inst(InstKind.LoadPtr, [left])
+			elif expr.field_name == "len":
+				return IntLiteral(self.comp.usize_t, str(left.len))
+			elif expr.field_name == "size":
+				return IntLiteral(self.comp.usize_t, str(left.size))
+		elif left_sym.kind == TypeKind.Array and expr.field_name == "len":
+			return IntLiteral(self.comp.usize_t, left_sym.info.size.lit)
+		return Selector(
+		    expr.typ, left,
+		    Name(
+		        f"f{expr.field_name}" if left_sym.kind ==
+		        sym.TypeKind.Tuple else expr.field_name
+		    )
+		)
 
-			if expr.is_nonecheck:
-				panic_l = self.cur_fn.local_name()
-				exit_l = self.cur_fn.local_name()
-				if isinstance(expr.typ, type.Ref):
-					self.cur_fn.add_cond_br(
-					    Inst(InstKind.Cmp,
-					         [Name("=="), left, NoneLiteral()]), panic_l, exit_l
-					)
-					self.cur_fn.add_label(panic_l)
-					self.panic(f"attempt to use none value (`{expr.left}`)")
-					self.cur_fn.unreachable()
-					self.cur_fn.add_label(exit_l)
-					return left
+	def convert_path_expr(self, expr):
+		if isinstance(expr.field_info, sym.Const):
+			return self.convert_const(expr.field_info)
+		elif isinstance(
+		    expr.left_info, sym.Type
+		) and expr.left_info.kind == sym.TypeKind.Enum:
+			if v := expr.left_info.info.get_variant(expr.field_name):
+				return IntLiteral(
+				    expr.left_info.info.underlying_typ, str(v.value)
+				)
+		elif isinstance(expr.left_info, sym.Fn):
+			return Ident(expr.typ, mangle_symbol(expr.left_info))
+		elif isinstance(
+		    expr.field_info, sym.Static
+		) and expr.field_info.is_extern:
+			return Ident(expr.typ, expr.field_info.name)
+		return Ident(expr.typ, mangle_symbol(expr.field_info))
+
+	def convert_index_expr(self, expr):
+		s = expr.left.typ.get_sym()
+		left = self.convert_expr_with_cast(expr.left_typ, expr.left)
+		if isinstance(expr.index, ast.RangeExpr):
+			if expr.index.has_start:
+				start = self.convert_expr(expr.index.start)
+			else:
+				start = IntLiteral(self.comp.usize_t, "0")
+			if expr.index.has_end:
+				end = self.convert_expr(expr.index.end)
+			else:
+				if s.kind == sym.TypeKind.Array:
+					end = IntLiteral(self.comp.usize_t, s.info.size.lit)
+				elif isinstance(left, StringLiteral):
+					end = IntLiteral(self.comp.usize_t, left.len)
 				else:
-					self.cur_fn.add_cond_br(
-					    Selector(self.comp.bool_t, left, Name("is_none")),
-					    panic_l, exit_l
+					end = None
+			if isinstance(start,
+			              IntLiteral) and isinstance(end, IntLiteral):
+				start_int, end_int = int(start.lit), int(end.lit)
+				if start_int < 0:
+					report.error(
+					    "slice bounds out of range", expr.index.pos
 					)
-					self.cur_fn.add_label(panic_l)
-					self.panic(f"attempt to use none value (`{expr.left}`)")
-					self.cur_fn.unreachable()
-					self.cur_fn.add_label(exit_l)
-					return Selector(expr.typ, left, Name("value"))
-			elif isinstance(left, StringLiteral):
-				if expr.field_name == "ptr":
+					report.note("start index is negative")
+				elif s.kind == sym.TypeKind.Array and end_int > int(
+				    s.info.size.lit
+				):
+					report.error(
+					    "slice bounds out of range", expr.index.pos
+					)
+					report.note(
+					    f"the size is {s.info.size.lit} but the index is {end.lit}"
+					)
+				elif start_int > end_int:
+					report.error(
+					    "slice bounds out of range", expr.index.pos
+					)
+					report.note("start index > end index")
+				elif isinstance(left, StringLiteral): # comptime slicing
+					slen = end_int - start_int
+					s, _ = utils.bytestr(left.lit)
 					return StringLiteral(
-					    type.Ptr(self.comp.uint8_t), left.lit, left.len, True
+					    self.comp.str_t,
+					    s[start_int:end_int].decode("utf-8"), slen
 					)
-				elif expr.field_name == "len":
-					return IntLiteral(self.comp.usize_t, str(left.len))
-				elif expr.field_name == "size":
-					return IntLiteral(self.comp.usize_t, str(left.size))
-			elif left_sym.kind == TypeKind.Array and expr.field_name == "len":
-				return IntLiteral(self.comp.usize_t, left_sym.info.size.lit)
-			return Selector(
-			    expr.typ, left,
-			    Name(
-			        f"f{expr.field_name}" if left_sym.kind ==
-			        sym.TypeKind.Tuple else expr.field_name
-			    )
-			)
-		elif isinstance(expr, ast.PathExpr):
-			if isinstance(expr.field_info, sym.Const):
-				return self.convert_const(expr.field_info)
-			elif isinstance(
-			    expr.left_info, sym.Type
-			) and expr.left_info.kind == sym.TypeKind.Enum:
-				if v := expr.left_info.info.get_variant(expr.field_name):
-					return IntLiteral(
-					    expr.left_info.info.underlying_typ, str(v.value)
+			tmp = self.cur_fn.local_name()
+			if s.kind == sym.TypeKind.Str:
+				if end == None:
+					inst = Inst(
+					    InstKind.Call, [
+					        Name("_R4core4_str10slice_fromM"),
+					        Inst(InstKind.GetRef, [left]), start
+					    ]
 					)
-			elif isinstance(expr.left_info, sym.Fn):
-				return Ident(expr.typ, mangle_symbol(expr.left_info))
-			elif isinstance(
-			    expr.field_info, sym.Static
-			) and expr.field_info.is_extern:
-				return Ident(expr.typ, expr.field_info.name)
-			return Ident(expr.typ, mangle_symbol(expr.field_info))
-		elif isinstance(expr, ast.IndexExpr):
-			s = expr.left.typ.get_sym()
-			left = self.convert_expr_with_cast(expr.left_typ, expr.left)
-			if isinstance(expr.index, ast.RangeExpr):
-				if expr.index.has_start:
-					start = self.convert_expr(expr.index.start)
 				else:
-					start = IntLiteral(self.comp.usize_t, "0")
-				if expr.index.has_end:
-					end = self.convert_expr(expr.index.end)
+					inst = Inst(
+					    InstKind.Call, [
+					        Name("_R4core4_str5sliceM"),
+					        Inst(InstKind.GetRef, [left]), start, end
+					    ]
+					)
+			elif s.kind == sym.TypeKind.Slice:
+				if end == None:
+					inst = Inst(
+					    InstKind.Call, [
+					        Name("_R4core6_slice10slice_fromM"),
+					        Inst(InstKind.GetRef, [left]), start
+					    ]
+					)
 				else:
-					if s.kind == sym.TypeKind.Array:
-						end = IntLiteral(self.comp.usize_t, s.info.size.lit)
-					elif isinstance(left, StringLiteral):
-						end = IntLiteral(self.comp.usize_t, left.len)
-					else:
-						end = None
-				if isinstance(start,
-				              IntLiteral) and isinstance(end, IntLiteral):
-					start_int, end_int = int(start.lit), int(end.lit)
-					if start_int < 0:
-						report.error(
-						    "slice bounds out of range", expr.index.pos
-						)
-						report.note("start index is negative")
-					elif s.kind == sym.TypeKind.Array and end_int > int(
-					    s.info.size.lit
-					):
-						report.error(
-						    "slice bounds out of range", expr.index.pos
-						)
-						report.note(
-						    f"the size is {s.info.size.lit} but the index is {end.lit}"
-						)
-					elif start_int > end_int:
-						report.error(
-						    "slice bounds out of range", expr.index.pos
-						)
-						report.note("start index > end index")
-					elif isinstance(left, StringLiteral): # comptime slicing
-						slen = end_int - start_int
-						s, _ = utils.bytestr(left.lit)
-						return StringLiteral(
-						    self.comp.str_t,
-						    s[start_int:end_int].decode("utf-8"), slen
-						)
-				tmp = self.cur_fn.local_name()
-				if s.kind == sym.TypeKind.Str:
-					if end == None:
-						inst = Inst(
-						    InstKind.Call, [
-						        Name("_R4core4_str10slice_fromM"),
-						        Inst(InstKind.GetRef, [left]), start
-						    ]
-						)
-					else:
-						inst = Inst(
-						    InstKind.Call, [
-						        Name("_R4core4_str5sliceM"),
-						        Inst(InstKind.GetRef, [left]), start, end
-						    ]
-						)
-				elif s.kind == sym.TypeKind.Slice:
-					if end == None:
-						inst = Inst(
-						    InstKind.Call, [
-						        Name("_R4core6_slice10slice_fromM"),
-						        Inst(InstKind.GetRef, [left]), start
-						    ]
-						)
-					else:
-						inst = Inst(
-						    InstKind.Call, [
-						        Name("_R4core6_slice5sliceM"),
-						        Inst(InstKind.GetRef, [left]), start, end
-						    ]
-						)
+					inst = Inst(
+					    InstKind.Call, [
+					        Name("_R4core6_slice5sliceM"),
+					        Inst(InstKind.GetRef, [left]), start, end
+					    ]
+					)
+			else:
+				size, _ = self.comp.type_size(s.info.elem_typ)
+				if end == None:
+					inst = Inst(
+					    InstKind.Call, [
+					        Name("_R4core16array_slice_fromF"),
+					        Inst(InstKind.GetRef, [left]),
+					        IntLiteral(self.comp.usize_t, str(size)),
+					        IntLiteral(self.comp.usize_t, s.info.size.lit),
+					        start
+					    ]
+					)
 				else:
-					size, _ = self.comp.type_size(s.info.elem_typ)
-					if end == None:
-						inst = Inst(
-						    InstKind.Call, [
-						        Name("_R4core16array_slice_fromF"),
-						        Inst(InstKind.GetRef, [left]),
-						        IntLiteral(self.comp.usize_t, str(size)),
-						        IntLiteral(self.comp.usize_t, s.info.size.lit),
-						        start
-						    ]
+					inst = Inst(
+					    InstKind.Call, [
+					        Name("_R4core11array_sliceF"),
+					        Inst(InstKind.GetRef, [left]),
+					        IntLiteral(self.comp.usize_t, str(size)),
+					        IntLiteral(self.comp.usize_t, s.info.size.lit),
+					        start, end
+					    ]
+					)
+			self.cur_fn.alloca(expr.typ, tmp, inst)
+			return Ident(expr.typ, tmp)
+		idx = self.convert_expr(expr.index)
+		if isinstance(idx, IntLiteral):
+			idx_lit = int(idx.lit)
+			if idx_lit < 0:
+				report.error("index cannot be negative", expr.index.pos)
+				report.note(f"the index is {idx.lit}")
+				return Skip()
+			if isinstance(s.info, sym.ArrayInfo
+			              ) or isinstance(left, StringLiteral):
+				size = int(left.len) if isinstance(left,
+				                                   StringLiteral) else int(
+				                                       s.info.size.lit
+				                                   )
+				if idx_lit >= size:
+					if isinstance(left, StringLiteral):
+						report.error(
+						    "string index out of range", expr.index.pos
 						)
 					else:
-						inst = Inst(
-						    InstKind.Call, [
-						        Name("_R4core11array_sliceF"),
-						        Inst(InstKind.GetRef, [left]),
-						        IntLiteral(self.comp.usize_t, str(size)),
-						        IntLiteral(self.comp.usize_t, s.info.size.lit),
-						        start, end
-						    ]
+						report.error(
+						    "array index out of range", expr.index.pos
 						)
-				self.cur_fn.alloca(expr.typ, tmp, inst)
-				return Ident(expr.typ, tmp)
-			idx = self.convert_expr(expr.index)
-			if isinstance(idx, IntLiteral):
-				idx_lit = int(idx.lit)
-				if idx_lit < 0:
-					report.error("index cannot be negative", expr.index.pos)
-					report.note(f"the index is {idx.lit}")
+					report.note(
+					    f"the size is {s.info.size.lit} but the index is {idx.lit}"
+					)
+					if idx_lit == size and idx_lit >= 0:
+						report.help(f"use `{idx_lit-1}` instead")
 					return Skip()
-				if isinstance(s.info, sym.ArrayInfo
-				              ) or isinstance(left, StringLiteral):
-					size = int(left.len) if isinstance(left,
-					                                   StringLiteral) else int(
-					                                       s.info.size.lit
-					                                   )
-					if idx_lit >= size:
-						if isinstance(left, StringLiteral):
-							report.error(
-							    "string index out of range", expr.index.pos
-							)
-						else:
-							report.error(
-							    "array index out of range", expr.index.pos
-							)
-						report.note(
-						    f"the size is {s.info.size.lit} but the index is {idx.lit}"
-						)
-						if idx_lit == size and idx_lit >= 0:
-							report.help(f"use `{idx_lit-1}` instead")
-						return Skip()
-			elif isinstance(s.info, sym.ArrayInfo):
-				self.cur_fn.add_call(
-				    "_R4core11array_indexF",
-				    [IntLiteral(self.comp.usize_t, s.info.size.lit), idx]
+		elif isinstance(s.info, sym.ArrayInfo):
+			self.cur_fn.add_call(
+			    "_R4core11array_indexF",
+			    [IntLiteral(self.comp.usize_t, s.info.size.lit), idx]
+			)
+		tmp = self.cur_fn.local_name()
+		if s.kind == sym.TypeKind.Str:
+			if isinstance(left,
+			              StringLiteral) and isinstance(idx, IntLiteral):
+				return IntLiteral(
+				    self.comp.uint8_t,
+				    str(bytearray(left.lit, "utf-8")[idx.value()])
 				)
+			self.cur_fn.alloca(
+			    expr.typ, tmp,
+			    Inst(
+			        InstKind.Call, [
+			            Name("_R4core4_str2atM"),
+			            Inst(InstKind.GetRef, [left]), idx
+			        ]
+			    )
+			)
+			return Ident(expr.typ, tmp)
+		elif s.kind == sym.TypeKind.Slice:
+			value = Inst(
+			    InstKind.Cast, [
+			        Inst(
+			            InstKind.Call, [
+			                Name("_R4core6_slice3getM"),
+			                Inst(InstKind.GetRef, [left]), idx
+			            ]
+			        ),
+			        Type(type.Ptr(expr.typ))
+			    ]
+			)
+		else:
+			value = Inst(InstKind.GetElementPtr, [left, idx])
+		self.cur_fn.alloca(type.Ptr(expr.typ), tmp, value)
+		return Ident(type.Ptr(expr.typ), tmp)
+
+	def convert_unary_expr(self, expr):
+		right = self.convert_expr_with_cast(expr.right_typ, expr.right)
+		if expr.op == Kind.Amp:
 			tmp = self.cur_fn.local_name()
-			if s.kind == sym.TypeKind.Str:
-				if isinstance(left,
-				              StringLiteral) and isinstance(idx, IntLiteral):
-					return IntLiteral(
-					    self.comp.uint8_t,
-					    str(bytearray(left.lit, "utf-8")[idx.value()])
+			self.cur_fn.alloca(
+			    expr.typ, tmp, Inst(InstKind.GetRef, [right])
+			)
+			return Ident(expr.typ, tmp)
+
+		# comptime calculation
+		if isinstance(right, IntLiteral):
+			computed = True
+			res = 0
+			if expr.op == Kind.Bang:
+				if right.lit == "0":
+					res = 1
+				elif right.lit == "1":
+					res = 0
+				else:
+					computed = False
+			elif expr.op == Kind.BitNot:
+				res = ~right.value()
+			elif expr.op == Kind.Minus:
+				res = -right.value()
+			else:
+				computed = False
+			if computed:
+				return IntLiteral(expr.typ, str(res))
+
+		# runtime calculation
+		if expr.op == Kind.Bang:
+			kind = InstKind.BooleanNot
+		elif expr.op == Kind.BitNot:
+			kind = InstKind.BitNot
+		else:
+			kind = InstKind.Neg
+		tmp = self.cur_fn.local_name()
+		self.cur_fn.alloca(expr.typ, tmp, Inst(kind, [right]))
+		return Ident(expr.typ, tmp)
+
+	def convert_binary_expr(self, expr):
+		if isinstance(expr.left.typ, type.Optional):
+			if expr.op in (
+			    Kind.Eq, Kind.Ne
+			) and not isinstance(expr.left.typ.typ, type.Ref):
+				left = self.convert_expr_with_cast(expr.left.typ, expr.left)
+				val = Selector(self.comp.bool_t, left, Name("is_none"))
+				if expr.op == Kind.Ne:
+					val = Inst(InstKind.BooleanNot, [val])
+				return val
+			elif expr.op == Kind.KeyOrElse:
+				expr_typ = expr.left.typ
+				left = self.convert_expr_with_cast(expr_typ, expr.left)
+				is_none_label = self.cur_fn.local_name()
+				is_not_none_label = self.cur_fn.local_name()
+				exit_label = self.cur_fn.local_name()
+				if isinstance(expr_typ.typ, type.Ref):
+					cond = Inst(
+					    InstKind.Cmp,
+					    [Name("=="), left, NoneLiteral()]
+					)
+				else:
+					cond = Selector(self.comp.bool_t, left, Name("is_none"))
+				tmp = Ident(expr_typ.typ, self.cur_fn.local_name())
+				self.cur_fn.alloca_var(tmp)
+				self.cur_fn.add_cond_br(
+				    cond, is_none_label, is_not_none_label
+				)
+				self.cur_fn.add_label(is_none_label)
+				right = self.convert_expr_with_cast(
+				    expr_typ.typ, expr.right
+				)
+				self.cur_fn.store(tmp, right)
+				self.cur_fn.add_br(exit_label)
+				self.cur_fn.add_label(is_not_none_label)
+				if isinstance(expr_typ.typ, type.Ref):
+					self.cur_fn.store(tmp, left)
+				else:
+					self.cur_fn.store(
+					    tmp, Selector(expr_typ.typ, left, Name("value"))
 					)
+				self.cur_fn.add_label(exit_label)
+				return tmp
+		elif expr.op in (Kind.KeyAnd, Kind.KeyOr):
+			left = self.convert_expr_with_cast(expr.left.typ, expr.left)
+			if isinstance(left, IntLiteral):
+				if left.lit == "0" and expr.op == Kind.KeyAnd:
+					return left
+				elif left.lit == "1" and expr.op == Kind.KeyOr:
+					return left
+				return self.convert_expr_with_cast(
+				    expr.right.typ, expr.right
+				)
+
+			tmp = Ident(self.comp.bool_t, self.cur_fn.local_name())
+			self.cur_fn.alloca_var(tmp)
+			self.cur_fn.store(tmp, left)
+			left_l = self.cur_fn.local_name()
+			exit_l = self.cur_fn.local_name()
+
+			if expr.op == Kind.KeyAnd:
+				self.cur_fn.add_cond_br(left, left_l, exit_l)
+			else:
+				self.cur_fn.add_cond_br(left, exit_l, left_l)
+
+			self.cur_fn.add_label(left_l)
+			self.cur_fn.store(
+			    tmp, self.convert_expr_with_cast(expr.left.typ, expr.right)
+			)
+
+			self.cur_fn.add_label(exit_l)
+			return tmp
+		elif expr.op in (Kind.KeyIs, Kind.KeyNotIs):
+			left = self.convert_expr_with_cast(expr.left.typ, expr.left)
+			tmp = self.cur_fn.local_name()
+			if expr.op == Kind.KeyIs:
+				kind = "=="
+			else:
+				kind = "!="
+			left_sym = expr.left.typ.get_sym()
+			if expr.left.typ == self.comp.error_t:
 				self.cur_fn.alloca(
 				    expr.typ, tmp,
 				    Inst(
-				        InstKind.Call, [
-				            Name("_R4core4_str2atM"),
-				            Inst(InstKind.GetRef, [left]), idx
+				        InstKind.Cmp, [
+				            Name(kind),
+				            Selector(expr.typ, left, Name("tag")),
+				            self.errtype_tag(expr.right.typ.sym)
 				        ]
 				    )
 				)
-				return Ident(expr.typ, tmp)
-			elif s.kind == sym.TypeKind.Slice:
-				value = Inst(
-				    InstKind.Cast, [
-				        Inst(
-				            InstKind.Call, [
-				                Name("_R4core6_slice3getM"),
-				                Inst(InstKind.GetRef, [left]), idx
-				            ]
-				        ),
-				        Type(type.Ptr(expr.typ))
-				    ]
-				)
 			else:
-				value = Inst(InstKind.GetElementPtr, [left, idx])
-			self.cur_fn.alloca(type.Ptr(expr.typ), tmp, value)
-			return Ident(type.Ptr(expr.typ), tmp)
-		elif isinstance(expr, ast.UnaryExpr):
-			right = self.convert_expr_with_cast(expr.right_typ, expr.right)
-			if expr.op == Kind.Amp:
-				tmp = self.cur_fn.local_name()
 				self.cur_fn.alloca(
-				    expr.typ, tmp, Inst(InstKind.GetRef, [right])
+				    expr.typ, tmp,
+				    Inst(
+				        InstKind.Cmp, [
+				            Name(kind),
+				            Selector(expr.typ, left, Name("idx")),
+				            self.type_nr(expr.right.typ.sym)
+				        ]
+				    )
 				)
-				return Ident(expr.typ, tmp)
-
-			# comptime calculation
-			if isinstance(right, IntLiteral):
-				computed = True
-				res = 0
-				if expr.op == Kind.Bang:
-					if right.lit == "0":
-						res = 1
-					elif right.lit == "1":
-						res = 0
-					else:
-						computed = False
-				elif expr.op == Kind.BitNot:
-					res = ~right.value()
-				elif expr.op == Kind.Minus:
-					res = -right.value()
-				else:
-					computed = False
-				if computed:
-					return IntLiteral(expr.typ, str(res))
-
-			# runtime calculation
-			if expr.op == Kind.Bang:
-				kind = InstKind.BooleanNot
-			elif expr.op == Kind.BitNot:
-				kind = InstKind.BitNot
-			else:
-				kind = InstKind.Neg
-			tmp = self.cur_fn.local_name()
-			self.cur_fn.alloca(expr.typ, tmp, Inst(kind, [right]))
 			return Ident(expr.typ, tmp)
-		elif isinstance(expr, ast.BinaryExpr):
-			if isinstance(expr.left.typ, type.Optional):
-				if expr.op in (
-				    Kind.Eq, Kind.Ne
-				) and not isinstance(expr.left.typ.typ, type.Ref):
-					left = self.convert_expr_with_cast(expr.left.typ, expr.left)
-					val = Selector(self.comp.bool_t, left, Name("is_none"))
-					if expr.op == Kind.Ne:
-						val = Inst(InstKind.BooleanNot, [val])
-					return val
-				elif expr.op == Kind.KeyOrElse:
-					expr_typ = expr.left.typ
-					left = self.convert_expr_with_cast(expr_typ, expr.left)
-					is_none_label = self.cur_fn.local_name()
-					is_not_none_label = self.cur_fn.local_name()
-					exit_label = self.cur_fn.local_name()
-					if isinstance(expr_typ.typ, type.Ref):
-						cond = Inst(
-						    InstKind.Cmp,
-						    [Name("=="), left, NoneLiteral()]
-						)
-					else:
-						cond = Selector(self.comp.bool_t, left, Name("is_none"))
-					tmp = Ident(expr_typ.typ, self.cur_fn.local_name())
-					self.cur_fn.alloca_var(tmp)
-					self.cur_fn.add_cond_br(
-					    cond, is_none_label, is_not_none_label
-					)
-					self.cur_fn.add_label(is_none_label)
-					right = self.convert_expr_with_cast(
-					    expr_typ.typ, expr.right
-					)
-					self.cur_fn.store(tmp, right)
-					self.cur_fn.add_br(exit_label)
-					self.cur_fn.add_label(is_not_none_label)
-					if isinstance(expr_typ.typ, type.Ref):
-						self.cur_fn.store(tmp, left)
-					else:
-						self.cur_fn.store(
-						    tmp, Selector(expr_typ.typ, left, Name("value"))
-						)
-					self.cur_fn.add_label(exit_label)
-					return tmp
-			elif expr.op in (Kind.KeyAnd, Kind.KeyOr):
-				left = self.convert_expr_with_cast(expr.left.typ, expr.left)
-				if isinstance(left, IntLiteral):
-					if left.lit == "0" and expr.op == Kind.KeyAnd:
-						return left
-					elif left.lit == "1" and expr.op == Kind.KeyOr:
-						return left
-					return self.convert_expr_with_cast(
-					    expr.right.typ, expr.right
-					)
-
-				tmp = Ident(self.comp.bool_t, self.cur_fn.local_name())
-				self.cur_fn.alloca_var(tmp)
-				self.cur_fn.store(tmp, left)
-				left_l = self.cur_fn.local_name()
-				exit_l = self.cur_fn.local_name()
 
-				if expr.op == Kind.KeyAnd:
-					self.cur_fn.add_cond_br(left, left_l, exit_l)
-				else:
-					self.cur_fn.add_cond_br(left, exit_l, left_l)
+		left = self.convert_expr_with_cast(expr.left.typ, expr.left)
+		right = self.convert_expr_with_cast(expr.right.typ, expr.right)
 
-				self.cur_fn.add_label(left_l)
-				self.cur_fn.store(
-				    tmp, self.convert_expr_with_cast(expr.left.typ, expr.right)
+		if self.comp.is_unsigned_int(expr.left.typ
+		                             ) and isinstance(right, IntLiteral):
+			if expr.op == Kind.Lt and right.lit == "0":
+				report.warn(
+				    "comparison is useless due to type limits",
+				    expr.right.pos
 				)
-
-				self.cur_fn.add_label(exit_l)
-				return tmp
-			elif expr.op in (Kind.KeyIs, Kind.KeyNotIs):
-				left = self.convert_expr_with_cast(expr.left.typ, expr.left)
-				tmp = self.cur_fn.local_name()
-				if expr.op == Kind.KeyIs:
-					kind = "=="
-				else:
-					kind = "!="
-				left_sym = expr.left.typ.get_sym()
-				if expr.left.typ == self.comp.error_t:
-					self.cur_fn.alloca(
-					    expr.typ, tmp,
-					    Inst(
-					        InstKind.Cmp, [
-					            Name(kind),
-					            Selector(expr.typ, left, Name("tag")),
-					            IntLiteral(
-					                self.comp.usize_t,
-					                str(expr.right.typ.sym.info.nr)
-					            )
-					        ]
-					    )
-					)
-				else:
-					self.cur_fn.alloca(
-					    expr.typ, tmp,
-					    Inst(
-					        InstKind.Cmp, [
-					            Name(kind),
-					            Selector(expr.typ, left, Name("idx")),
-					            IntLiteral(
-					                self.comp.usize_t,
-					                str(expr.right.typ.sym.index)
-					            )
-					        ]
-					    )
-					)
-				return Ident(expr.typ, tmp)
-
-			left = self.convert_expr_with_cast(expr.left.typ, expr.left)
-			right = self.convert_expr_with_cast(expr.right.typ, expr.right)
-
-			if self.comp.is_unsigned_int(expr.left.typ
-			                             ) and isinstance(right, IntLiteral):
-				if expr.op == Kind.Lt and right.lit == "0":
-					report.warn(
-					    "comparison is useless due to type limits",
-					    expr.right.pos
-					)
-				elif expr.op in (Kind.Eq, Kind.Ne, Kind.Le,
-				                 Kind.Ge) and right.value() < 0:
-					report.error(
-					    "unsigned integer cannot be compared with negative value",
-					    expr.right.pos
-					)
-				else:
-					self.check_number_limit(
-					    expr.left.typ, right.value(), expr.right.pos
-					)
-			elif isinstance(left, IntLiteral) and self.comp.is_unsigned_int(
-			    expr.right.typ
+			elif expr.op in (Kind.Eq, Kind.Ne, Kind.Le,
+			                 Kind.Ge) and right.value() < 0:
+				report.error(
+				    "unsigned integer cannot be compared with negative value",
+				    expr.right.pos
+				)
+			else:
+				self.check_number_limit(
+				    expr.left.typ, right.value(), expr.right.pos
+				)
+		elif isinstance(left, IntLiteral) and self.comp.is_unsigned_int(
+		    expr.right.typ
+		):
+			if expr.op == Kind.Lt and left.lit == "0":
+				report.warn(
+				    "comparison is useless due to type limits",
+				    expr.left.pos
+				)
+			elif expr.op in (Kind.Eq, Kind.Ne, Kind.Le,
+			                 Kind.Ge) and left.value() < 0:
+				report.error(
+				    "unsigned integer cannot be compared with negative value",
+				    expr.left.pos
+				)
+			else:
+				self.check_number_limit(
+				    expr.left.typ, left.value(), expr.right.pos
+				)
+		elif expr.op in (Kind.Lshift,
+		                 Kind.Rshift) and isinstance(right, IntLiteral):
+			ivalue = right.value()
+			if ivalue < 0:
+				report.error("invalid negative shift count", expr.right.pos)
+			if expr.left.typ in (self.comp.int8_t, self.comp.uint8_t):
+				moffset = 7
+			elif expr.left.typ in (self.comp.int16_t, self.comp.uint16_t):
+				moffset = 15
+			elif expr.left.typ in (
+			    self.comp.int32_t, self.comp.uint32_t,
+			    self.comp.untyped_int_t
 			):
-				if expr.op == Kind.Lt and left.lit == "0":
-					report.warn(
-					    "comparison is useless due to type limits",
-					    expr.left.pos
-					)
-				elif expr.op in (Kind.Eq, Kind.Ne, Kind.Le,
-				                 Kind.Ge) and left.value() < 0:
+				moffset = 31
+			elif expr.left.typ in (self.comp.int64_t, self.comp.uint64_t):
+				moffset = 63
+			else:
+				moffset = 64
+			if ivalue > moffset:
+				report.error(
+				    f"shift count for type `{expr.left.typ}` too large",
+				    expr.right.pos
+				)
+				report.note(f"maximum: {moffset} bits")
+			if isinstance(left, IntLiteral):
+				if left.value() < 0:
 					report.error(
-					    "unsigned integer cannot be compared with negative value",
+					    "invalid bitshift of a negative number",
 					    expr.left.pos
 					)
+
+		# comptime calculation
+		skip_calc = False
+		if expr.op in (Kind.Div,
+		               Kind.Mod) and isinstance(right, IntLiteral):
+			val = right.value()
+			if expr.op == Kind.Div and val == 0:
+				report.error("division by zero", expr.pos)
+				skip_calc = True
+			elif val <= 0:
+				report.error("module by zero or negative value", expr.pos)
+				skip_calc = True
+
+		if not skip_calc:
+			if isinstance(left,
+			              IntLiteral) and isinstance(right, IntLiteral):
+				computed = True
+				if expr.op == Kind.Plus:
+					res = left.value() + right.value()
+				elif expr.op == Kind.Minus:
+					res = left.value() - right.value()
+				elif expr.op == Kind.Mult:
+					res = left.value() * right.value()
+				elif expr.op == Kind.Div:
+					res = consteval.int_div(left.value(), right.value())
+				elif expr.op == Kind.Mod:
+					res = consteval.int_mod(left.value(), right.value())
+				elif expr.op == Kind.Amp:
+					res = left.value() & right.value()
+				elif expr.op == Kind.Pipe:
+					res = left.value() | right.value()
+				elif expr.op == Kind.Xor:
+					res = left.value() ^ right.value()
+				elif expr.op == Kind.Lshift:
+					res = left.value() << right.value()
+				elif expr.op == Kind.Rshift:
+					res = left.value() >> right.value()
+				elif expr.op == Kind.Eq:
+					res = int(left.value() == right.value())
+				elif expr.op == Kind.Ne:
+					res = int(left.value() != right.value())
+				elif expr.op == Kind.Lt:
+					res = int(left.value() < right.value())
+				elif expr.op == Kind.Gt:
+					res = int(left.value() > right.value())
+				elif expr.op == Kind.Le:
+					res = int(left.value() <= right.value())
+				elif expr.op == Kind.Ge:
+					res = int(left.value() >= right.value())
 				else:
-					self.check_number_limit(
-					    expr.left.typ, left.value(), expr.right.pos
-					)
-			elif expr.op in (Kind.Lshift,
-			                 Kind.Rshift) and isinstance(right, IntLiteral):
-				ivalue = right.value()
-				if ivalue < 0:
-					report.error("invalid negative shift count", expr.right.pos)
-				if expr.left.typ in (self.comp.int8_t, self.comp.uint8_t):
-					moffset = 7
-				elif expr.left.typ in (self.comp.int16_t, self.comp.uint16_t):
-					moffset = 15
-				elif expr.left.typ in (
-				    self.comp.int32_t, self.comp.uint32_t,
-				    self.comp.untyped_int_t
-				):
-					moffset = 31
-				elif expr.left.typ in (self.comp.int64_t, self.comp.uint64_t):
-					moffset = 63
+					computed = False
+				if computed:
+					return IntLiteral(expr.typ, str(res))
+			elif isinstance(left, FloatLiteral
+			                ) and isinstance(right, FloatLiteral):
+				computed = True
+				if expr.op == Kind.Plus:
+					res = float(left.lit) + float(right.lit)
+				elif expr.op == Kind.Minus:
+					res = float(left.lit) - float(right.lit)
+				elif expr.op == Kind.Mult:
+					res = float(left.lit) * float(right.lit)
+				elif expr.op == Kind.Div:
+					res = float(left.lit) / float(right.lit)
+				elif expr.op == Kind.Eq:
+					res = int(float(left.lit) == float(right.lit))
+				elif expr.op == Kind.Ne:
+					res = int(float(left.lit) != float(right.lit))
+				elif expr.op == Kind.Lt:
+					res = int(float(left.lit) < float(right.lit))
+				elif expr.op == Kind.Gt:
+					res = int(float(left.lit) > float(right.lit))
+				elif expr.op == Kind.Le:
+					res = int(float(left.lit) <= float(right.lit))
+				elif expr.op == Kind.Ge:
+					res = int(float(left.lit) >= float(right.lit))
 				else:
-					moffset = 64
-				if ivalue > moffset:
-					report.error(
-					    f"shift count for type `{expr.left.typ}` too large",
-					    expr.right.pos
-					)
-					report.note(f"maximum: {moffset} bits")
-				if isinstance(left, IntLiteral):
-					if left.value() < 0:
-						report.error(
-						    "invalid bitshift of a negative number",
-						    expr.left.pos
-						)
-
-			# comptime calculation
-			skip_calc = False
-			if expr.op in (Kind.Div,
-			               Kind.Mod) and isinstance(right, IntLiteral):
-				val = right.value()
-				if expr.op == Kind.Div and val == 0:
-					report.error("division by zero", expr.pos)
-					skip_calc = True
-				elif val <= 0:
-					report.error("module by zero or negative value", expr.pos)
-					skip_calc = True
-
-			if not skip_calc:
-				if isinstance(left,
-				              IntLiteral) and isinstance(right, IntLiteral):
-					computed = True
-					if expr.op == Kind.Plus:
-						res = left.value() + right.value()
-					elif expr.op == Kind.Minus:
-						res = left.value() - right.value()
-					elif expr.op == Kind.Mult:
-						res = left.value() * right.value()
-					elif expr.op == Kind.Div:
-						res = left.value() // right.value()
-					elif expr.op == Kind.Mod:
-						res = left.value() % right.value()
-					elif expr.op == Kind.Amp:
-						res = left.value() & right.value()
-					elif expr.op == Kind.Pipe:
-						res = left.value() | right.value()
-					elif expr.op == Kind.Xor:
-						res = left.value() ^ right.value()
-					elif expr.op == Kind.Lshift:
-						res = left.value() << right.value()
-					elif expr.op == Kind.Rshift:
-						res = left.value() >> right.value()
-					elif expr.op == Kind.Eq:
-						res = int(left.value() == right.value())
-					elif expr.op == Kind.Ne:
-						res = int(left.value() != right.value())
-					elif expr.op == Kind.Lt:
-						res = int(left.value() < right.value())
-					elif expr.op == Kind.Gt:
-						res = int(left.value() > right.value())
-					elif expr.op == Kind.Le:
-						res = int(left.value() <= right.value())
-					elif expr.op == Kind.Ge:
-						res = int(left.value() >= right.value())
-					else:
-						computed = False
-					if computed:
-						return IntLiteral(expr.typ, str(res))
-				elif isinstance(left, FloatLiteral
-				                ) and isinstance(right, FloatLiteral):
-					computed = True
-					if expr.op == Kind.Plus:
-						res = float(left.lit) + float(right.lit)
-					elif expr.op == Kind.Minus:
-						res = float(left.lit) - float(right.lit)
-					elif expr.op == Kind.Mult:
-						res = float(left.lit) * float(right.lit)
-					elif expr.op == Kind.Div:
-						res = float(left.lit) / float(right.lit)
-					elif expr.op == Kind.Eq:
-						res = float(left.lit) == float(right.lit)
-					elif expr.op == Kind.Ne:
-						res = float(left.lit) != float(right.lit)
-					elif expr.op == Kind.Lt:
-						res = float(left.lit) < float(right.lit)
-					elif expr.op == Kind.Gt:
-						res = float(left.lit) > float(right.lit)
-					elif expr.op == Kind.Le:
-						res = float(left.lit) <= float(right.lit)
-					elif expr.op == Kind.Ge:
-						res = float(left.lit) >= float(right.lit)
-					else:
-						computed = False
-					if computed:
-						return FloatLiteral(expr.typ, str(res))
-				elif isinstance(left, StringLiteral
-				                ) and isinstance(right, StringLiteral):
-					computed = True
-					if expr.op == Kind.Eq:
-						res = int(left.lit == right.lit)
-					elif expr.op == Kind.Ne:
-						res = int(left.lit != right.lit)
-					elif expr.op == Kind.Lt:
-						res = int(left.lit < right.lit)
-					elif expr.op == Kind.Gt:
-						res = int(left.lit > right.lit)
-					elif expr.op == Kind.Le:
-						res = int(left.lit <= right.lit)
-					elif expr.op == Kind.Ge:
-						res = int(left.lit >= right.lit)
-					else:
-						computed = False
-					if computed:
+					computed = False
+				if computed:
+					if isinstance(res, int):
+						# comparisons
 						return IntLiteral(expr.typ, str(res))
-
-			# runtime calculation
-			tmp = self.cur_fn.local_name()
-			typ_sym = expr.left.typ.get_sym()
-			if expr.op.is_overloadable_op() and typ_sym.kind in (
-			    TypeKind.Array, TypeKind.Slice, TypeKind.Str, TypeKind.Struct
-			) and not isinstance(expr.left.typ, type.Ptr):
-				if typ_sym.kind == TypeKind.Array:
-					if expr.op == Kind.Eq:
-						name = "_R4core8array_eqF"
-					elif expr.op == Kind.Ne:
-						name = "_R4core8array_neF"
-					size, _ = self.comp.type_size(expr.left.typ)
-					self.cur_fn.alloca(
-					    expr.typ, tmp,
-					    Inst(
-					        InstKind.Call, [
-					            Name(name), left, right,
-					            IntLiteral(self.comp.usize_t, str(size))
-					        ]
-					    )
-					)
-				else:
-					op_method = OVERLOADABLE_OPERATORS_STR[str(expr.op)]
-					self.cur_fn.alloca(
-					    expr.typ, tmp,
-					    Inst(
-					        InstKind.Call, [
-					            Name(
-					                mangle_symbol(typ_sym) +
-					                f"{len(op_method)}{op_method}M"
-					            ),
-					            Inst(InstKind.GetRef, [left]),
-					            Inst(InstKind.GetRef, [right])
-					        ]
-					    )
-					)
-				return Ident(expr.typ, tmp)
-			if expr.op.is_relational():
+					return FloatLiteral(expr.typ, str(res))
+			elif isinstance(left, StringLiteral
+			                ) and isinstance(right, StringLiteral):
+				computed = True
 				if expr.op == Kind.Eq:
-					kind = "=="
+					res = int(left.lit == right.lit)
 				elif expr.op == Kind.Ne:
-					kind = "!="
+					res = int(left.lit != right.lit)
 				elif expr.op == Kind.Lt:
-					kind = "<"
+					res = int(left.lit < right.lit)
 				elif expr.op == Kind.Gt:
-					kind = ">"
+					res = int(left.lit > right.lit)
 				elif expr.op == Kind.Le:
-					kind = "<="
+					res = int(left.lit <= right.lit)
+				elif expr.op == Kind.Ge:
+					res = int(left.lit >= right.lit)
 				else:
-					kind = ">="
+					computed = False
+				if computed:
+					return IntLiteral(expr.typ, str(res))
+
+		# runtime calculation
+		tmp = self.cur_fn.local_name()
+		typ_sym = expr.left.typ.get_sym()
+		if expr.op.is_overloadable_op() and typ_sym.kind in (
+		    TypeKind.Array, TypeKind.Slice, TypeKind.Str, TypeKind.Struct
+		) and not isinstance(expr.left.typ, type.Ptr):
+			if typ_sym.kind == TypeKind.Array:
+				if expr.op == Kind.Eq:
+					name = "_R4core8array_eqF"
+				elif expr.op == Kind.Ne:
+					name = "_R4core8array_neF"
+				size, _ = self.comp.type_size(expr.left.typ)
 				self.cur_fn.alloca(
 				    expr.typ, tmp,
-				    Inst(InstKind.Cmp, [Name(kind), left, right])
-				)
-			elif expr.op in (Kind.Div, Kind.Mod):
-				is_div = expr.op == Kind.Div
-				kind = InstKind.Div if is_div else InstKind.Mod
-				if not isinstance(right, IntLiteral):
-					msg = utils.smart_quote(
-					    f"attempt to divide `{expr.left}` by zero"
-					    if is_div else
-					    f"attempt to calculate the remainder of `{expr.left}` with a divisor of zero or negative value",
-					    False
-					)
-					self.cur_fn.add_call(
-					    "_R4core8panic_ifF", [
-					        Inst(
-					            InstKind.Cmp, [
-					                Name("==" if is_div else "<="), right,
-					                IntLiteral(expr.typ, "0")
-					            ]
-					        ),
-					        StringLiteral(self.comp.str_t, msg, len(msg))
-					    ]
-					)
-				self.cur_fn.alloca(expr.typ, tmp, Inst(kind, [left, right]))
+				    Inst(
+				        InstKind.Call, [
+				            Name(name), left, right,
+				            IntLiteral(self.comp.usize_t, str(size))
+				        ]
+				    )
+				)
 			else:
-				if expr.op == Kind.Plus:
-					kind = InstKind.Add
-				elif expr.op == Kind.Minus:
-					kind = InstKind.Sub
-				elif expr.op == Kind.Mult:
-					kind = InstKind.Mult
-				elif expr.op == Kind.Amp:
-					kind = InstKind.BitAnd
-				elif expr.op == Kind.Pipe:
-					kind = InstKind.BitOr
-				elif expr.op == Kind.Xor:
-					kind = InstKind.BitXor
-				elif expr.op == Kind.Lshift:
-					kind = InstKind.Lshift
-				elif expr.op == Kind.Rshift:
-					kind = InstKind.Rshift
-				else:
-					assert False, expr.op # unreachable
-				self.cur_fn.alloca(expr.typ, tmp, Inst(kind, [left, right]))
+				op_method = OVERLOADABLE_OPERATORS_STR[str(expr.op)]
+				self.cur_fn.alloca(
+				    expr.typ, tmp,
+				    Inst(
+				        InstKind.Call, [
+				            Name(
+				                mangle_symbol(typ_sym) +
+				                f"{len(op_method)}{op_method}M"
+				            ),
+				            Inst(InstKind.GetRef, [left]),
+				            Inst(InstKind.GetRef, [right])
+				        ]
+				    )
+				)
 			return Ident(expr.typ, tmp)
-		elif isinstance(expr, ast.PostfixExpr):
-			left = self.convert_expr_with_cast(expr.typ, expr.left)
+		if expr.op.is_relational():
+			if expr.op == Kind.Eq:
+				kind = "=="
+			elif expr.op == Kind.Ne:
+				kind = "!="
+			elif expr.op == Kind.Lt:
+				kind = "<"
+			elif expr.op == Kind.Gt:
+				kind = ">"
+			elif expr.op == Kind.Le:
+				kind = "<="
+			else:
+				kind = ">="
+			self.cur_fn.alloca(
+			    expr.typ, tmp,
+			    Inst(InstKind.Cmp, [Name(kind), left, right])
+			)
+		elif expr.op in (Kind.Div, Kind.Mod):
+			is_div = expr.op == Kind.Div
+			kind = InstKind.Div if is_div else InstKind.Mod
+			if not isinstance(right, IntLiteral):
+				msg = utils.smart_quote(
+				    f"attempt to divide `{expr.left}` by zero"
+				    if is_div else
+				    f"attempt to calculate the remainder of `{expr.left}` with a divisor of zero or negative value",
+				    False
+				)
+				self.cur_fn.add_call(
+				    "_R4core8panic_ifF", [
+				        Inst(
+				            InstKind.Cmp, [
+				                Name("==" if is_div else "<="), right,
+				                IntLiteral(expr.typ, "0")
+				            ]
+				        ),
+				        StringLiteral(self.comp.str_t, msg, len(msg))
+				    ]
+				)
+			self.cur_fn.alloca(expr.typ, tmp, Inst(kind, [left, right]))
+		else:
+			if expr.op == Kind.Plus:
+				kind = InstKind.Add
+			elif expr.op == Kind.Minus:
+				kind = InstKind.Sub
+			elif expr.op == Kind.Mult:
+				kind = InstKind.Mult
+			elif expr.op == Kind.Amp:
+				kind = InstKind.BitAnd
+			elif expr.op == Kind.Pipe:
+				kind = InstKind.BitOr
+			elif expr.op == Kind.Xor:
+				kind = InstKind.BitXor
+			elif expr.op == Kind.Lshift:
+				kind = InstKind.Lshift
+			elif expr.op == Kind.Rshift:
+				kind = InstKind.Rshift
+			else:
+				assert False, expr.op # unreachable
+			self.cur_fn.alloca(expr.typ, tmp, Inst(kind, [left, right]))
+		return Ident(expr.typ, tmp)
 
-			# comptime calculation
-			if isinstance(left, IntLiteral):
-				return left
+	def convert_postfix_expr(self, expr):
+		left = self.convert_expr_with_cast(expr.typ, expr.left)
+
+		# comptime calculation
+		if isinstance(left, IntLiteral):
+			return left
+
+		# runtime calculation
+		if expr.op == Kind.Inc:
+			kind = InstKind.Inc
+		else:
+			kind = InstKind.Dec
+		tmp = self.cur_fn.local_name()
+		self.cur_fn.alloca(expr.typ, tmp, Inst(kind, [left]))
+		return Ident(expr.typ, tmp)
+
+	def convert_block(self, expr):
+		self.convert_stmts(expr.stmts)
+		if expr.is_expr:
+			return self.convert_expr(expr.expr)
+		return Skip()
 
-			# runtime calculation
-			if expr.op == Kind.Inc:
-				kind = InstKind.Inc
+	def convert_if_expr(self, expr):
+		is_void_value = expr.typ in self.void_types
+		if expr.is_comptime:
+			if expr.branch_idx == -1:
+				return Skip()
 			else:
-				kind = InstKind.Dec
-			tmp = self.cur_fn.local_name()
-			self.cur_fn.alloca(expr.typ, tmp, Inst(kind, [left]))
-			return Ident(expr.typ, tmp)
-		elif isinstance(expr, ast.Block):
-			self.convert_stmts(expr.stmts)
-			if expr.is_expr:
-				return self.convert_expr(expr.expr)
-		elif isinstance(expr, ast.IfExpr):
-			is_void_value = expr.typ in self.void_types
-			if expr.is_comptime:
-				if expr.branch_idx == -1:
-					return Skip()
-				else:
-					return self.convert_expr(
-					    expr.branches[expr.branch_idx].expr
-					)
-			if len(expr.branches) == 2 and not is_void_value:
-				b2 = expr.branches[1]
-				if b2.is_else:
-					b1 = expr.branches[0]
-					cond = self.convert_expr_with_cast(expr.typ, b1.cond)
-					if isinstance(cond, IntLiteral):
-						if cond.lit == "1":
-							# use first value if cond is true
-							return self.convert_expr_with_cast(
-							    expr.typ, b1.expr
-							)
-						else:
-							# use second value instead
-							return self.convert_expr_with_cast(
-							    expr.typ, b2.expr
-							)
-			gen_branch = True
-			exit_label = self.cur_fn.local_name()
-			else_label = self.cur_fn.local_name(
-			) if expr.has_else else exit_label
-			tmp = Ident(
-			    expr.typ,
-			    self.cur_fn.local_name() if not is_void_value else ""
-			)
-			if not is_void_value:
-				self.cur_fn.alloca_var(tmp)
-			self.cur_fn.add_comment(f"if expr (end: {exit_label})")
-			next_branch = ""
-			for i, b in enumerate(expr.branches):
-				if not gen_branch:
-					break
-				self.cur_fn.add_comment(f"if branch (is_else: {b.is_else})")
-				if b.is_else:
-					self.cur_fn.add_label(else_label)
-				else:
-					if isinstance(b.cond, ast.GuardExpr):
-						gexpr = self.convert_expr_with_cast(
-						    b.cond.expr.typ, b.cond.expr
-						)
-						if b.cond.is_result:
-							cond = Inst(
-							    InstKind.BooleanNot, [
-							        Selector(
-							            self.comp.bool_t, gexpr, Name("is_err")
-							        )
-							    ]
-							)
-						else:
-							cond = Inst(
-							    InstKind.BooleanNot, [
-							        Selector(
-							            self.comp.bool_t, gexpr,
-							            Name("is_none")
-							        )
-							    ]
-							)
-						self.cur_fn.alloca(
-						    b.cond.expr.typ.typ, b.cond.vars[0],
-						    Selector(b.cond.expr.typ.typ, gexpr, Name("value"))
+				return self.convert_expr(
+				    expr.branches[expr.branch_idx].expr
+				)
+		if len(expr.branches) == 2 and not is_void_value:
+			b2 = expr.branches[1]
+			if b2.is_else:
+				b1 = expr.branches[0]
+				cond = self.convert_expr_with_cast(expr.typ, b1.cond)
+				if isinstance(cond, IntLiteral):
+					if cond.lit == "1":
+						# use first value if cond is true
+						return self.convert_expr_with_cast(
+						    expr.typ, b1.expr
 						)
 					else:
-						cond = self.convert_expr_with_cast(
-						    self.comp.bool_t, b.cond
+						# use second value instead
+						return self.convert_expr_with_cast(
+						    expr.typ, b2.expr
 						)
-					if isinstance(cond, IntLiteral) and cond.lit == "0":
-						continue # skip `if` branch with false condition
-					branch_label = self.cur_fn.local_name()
-					if i == len(expr.branches) - 1:
-						next_branch = exit_label
-					elif i + 1 == len(expr.branches
-					                  ) - 1 and expr.branches[i + 1].is_else:
-						next_branch = else_label
-					else:
-						next_branch = self.cur_fn.local_name()
-					if isinstance(cond, IntLiteral) and cond.lit == "1":
-						gen_branch = False
-					else:
-						self.cur_fn.add_cond_br(cond, branch_label, next_branch)
-						self.cur_fn.add_label(branch_label)
-						if isinstance(b.cond, ast.GuardExpr):
-							if b.cond.has_cond:
-								gcond = self.convert_expr_with_cast(
-								    self.comp.bool_t, b.cond.cond
-								)
-								self.cur_fn.add_cond_br(
-								    gcond, branch_label, next_branch
-								)
-				if is_void_value:
-					self.convert_expr_with_cast(
-					    expr.typ, b.expr
-					) # ignore void value
-				else:
-					self.cur_fn.store(
-					    tmp, self.convert_expr_with_cast(expr.typ, b.expr)
+		gen_branch = True
+		exit_label = self.cur_fn.local_name()
+		else_label = self.cur_fn.local_name(
+		) if expr.has_else else exit_label
+		tmp = Ident(
+		    expr.typ,
+		    self.cur_fn.local_name() if not is_void_value else ""
+		)
+		if not is_void_value:
+			self.cur_fn.alloca_var(tmp)
+		self.cur_fn.add_comment(f"if expr (end: {exit_label})")
+		next_branch = ""
+		for i, b in enumerate(expr.branches):
+			if not gen_branch:
+				break
+			self.cur_fn.add_comment(f"if branch (is_else: {b.is_else})")
+			if b.is_else:
+				self.cur_fn.add_label(else_label)
+			else:
+				if isinstance(b.cond, ast.GuardExpr):
+					gexpr = self.convert_expr_with_cast(
+					    b.cond.expr.typ, b.cond.expr
 					)
-				if gen_branch:
-					self.cur_fn.add_comment(
-					    "if expr branch (goto to other branch)"
+					if b.cond.is_result:
+						cond = Inst(
+						    InstKind.BooleanNot, [
+						        Selector(
+						            self.comp.bool_t, gexpr, Name("is_err")
+						        )
+						    ]
+						)
+					else:
+						cond = Inst(
+						    InstKind.BooleanNot, [
+						        Selector(
+						            self.comp.bool_t, gexpr,
+						            Name("is_none")
+						        )
+						    ]
+						)
+					self.cur_fn.alloca(
+					    b.cond.expr.typ.typ, b.cond.vars[0],
+					    Selector(b.cond.expr.typ.typ, gexpr, Name("value"))
 					)
-					self.cur_fn.add_br(exit_label)
-				if len(next_branch) > 0 and next_branch != else_label:
-					self.cur_fn.add_label(next_branch)
+				else:
+					cond = self.convert_expr_with_cast(
+					    self.comp.bool_t, b.cond
+					)
+				if isinstance(cond, IntLiteral) and cond.lit == "0":
+					continue # skip `if` branch with false condition
+				branch_label = self.cur_fn.local_name()
+				if i == len(expr.branches) - 1:
+					next_branch = exit_label
+				elif i + 1 == len(expr.branches
+				                  ) - 1 and expr.branches[i + 1].is_else:
+					next_branch = else_label
+				else:
+					next_branch = self.cur_fn.local_name()
+				if isinstance(cond, IntLiteral) and cond.lit == "1":
+					gen_branch = False
+				else:
+					self.cur_fn.add_cond_br(cond, branch_label, next_branch)
+					self.cur_fn.add_label(branch_label)
+					if isinstance(b.cond, ast.GuardExpr):
+						if b.cond.has_cond:
+							gcond = self.convert_expr_with_cast(
+							    self.comp.bool_t, b.cond.cond
+							)
+							self.cur_fn.add_cond_br(
+							    gcond, branch_label, next_branch
+							)
+			if is_void_value:
+				self.convert_expr_with_cast(
+				    expr.typ, b.expr
+				) # ignore void value
+			else:
+				self.cur_fn.store(
+				    tmp, self.convert_expr_with_cast(expr.typ, b.expr)
+				)
 			if gen_branch:
-				self.cur_fn.add_label(exit_label)
-			if not is_void_value:
-				return tmp
-		elif isinstance(expr, ast.MatchExpr):
-			is_error_t = expr.expr.typ == self.comp.error_t
-			is_void_value = expr.typ in self.void_types
-			exit_match = self.cur_fn.local_name()
-			self.cur_fn.add_comment(f"match expr (end: {exit_match})")
-			tmp = Ident(
-			    expr.typ,
-			    self.cur_fn.local_name() if not is_void_value else ""
+				self.cur_fn.add_comment(
+				    "if expr branch (goto to other branch)"
+				)
+				self.cur_fn.add_br(exit_label)
+			if len(next_branch) > 0 and next_branch != else_label:
+				self.cur_fn.add_label(next_branch)
+		if gen_branch:
+			self.cur_fn.add_label(exit_label)
+		if not is_void_value:
+			return tmp
+		return Skip()
+
+	def convert_match_expr(self, expr):
+		is_error_t = expr.expr.typ == self.comp.error_t
+		is_void_value = expr.typ in self.void_types
+		exit_match = self.cur_fn.local_name()
+		self.cur_fn.add_comment(f"match expr (end: {exit_match})")
+		tmp = Ident(
+		    expr.typ,
+		    self.cur_fn.local_name() if not is_void_value else ""
+		)
+		if not is_void_value:
+			self.cur_fn.alloca_var(tmp)
+		is_guard_expr = isinstance(expr.expr, ast.GuardExpr)
+		if is_guard_expr:
+			gexpr = self.convert_expr_with_cast(
+			    expr.expr.typ, expr.expr.expr
 			)
-			if not is_void_value:
-				self.cur_fn.alloca_var(tmp)
-			is_guard_expr = isinstance(expr.expr, ast.GuardExpr)
-			if is_guard_expr:
-				gexpr = self.convert_expr_with_cast(
-				    expr.expr.typ, expr.expr.expr
+			if expr.expr.is_result:
+				cond = Selector(self.comp.bool_t, gexpr, Name("is_err"))
+			else:
+				cond = Selector(self.comp.bool_t, gexpr, Name("is_none"))
+			self.cur_fn.alloca(
+			    expr.expr.typ, expr.expr.vars[0],
+			    Selector(expr.expr.typ, gexpr, Name("value"))
+			)
+			self.cur_fn.add_cond_single_br(cond, exit_match)
+			if expr.expr.has_cond:
+				self.cur_fn.add_cond_single_br(
+				    Inst(
+				        InstKind.BooleanNot, [
+				            self.convert_expr_with_cast(
+				                self.comp.bool_t, expr.expr.cond
+				            )
+				        ]
+				    ), exit_match
 				)
-				if expr.expr.is_result:
-					cond = Selector(self.comp.bool_t, gexpr, Name("is_err"))
-				else:
-					cond = Selector(self.comp.bool_t, gexpr, Name("is_none"))
-				self.cur_fn.alloca(
-				    expr.expr.typ, expr.expr.vars[0],
-				    Selector(expr.expr.typ, gexpr, Name("value"))
+			match_expr = Ident(expr.expr.typ, expr.expr.vars[0])
+		else:
+			match_expr = self.convert_expr_with_cast(
+			    expr.expr.typ, expr.expr
+			)
+		for b in expr.branches:
+			b_label = "" if b.is_else else self.cur_fn.local_name()
+			b_exit = exit_match if b.is_else else self.cur_fn.local_name()
+			if not b.is_else:
+				self.cur_fn.add_comment(
+				    f"match expr patterns (len: {len(b.pats)})"
 				)
-				self.cur_fn.add_cond_single_br(cond, exit_match)
-				if expr.expr.has_cond:
-					self.cur_fn.add_cond_single_br(
+			for i, p in enumerate(b.pats):
+				next_pat = self.cur_fn.local_name(
+				) if i < len(b.pats) - 1 else b_exit
+				tmp2 = self.cur_fn.local_name()
+				if expr.is_typematch:
+					field_name = "tag" if is_error_t else "idx"
+					if is_error_t:
+						type_nr = self.errtype_tag(p.typ.sym)
+					else:
+						type_nr = self.type_nr(p.typ.sym)
+					self.cur_fn.alloca(
+					    self.comp.bool_t, tmp2,
 					    Inst(
-					        InstKind.BooleanNot, [
-					            self.convert_expr_with_cast(
-					                self.comp.bool_t, expr.expr.cond
-					            )
+					        InstKind.Cmp, [
+					            Name("=="),
+					            Selector(
+					                expr.expr.typ, match_expr,
+					                Name(field_name)
+					            ),
+					            type_nr
 					        ]
-					    ), exit_match
-					)
-				match_expr = Ident(expr.expr.typ, expr.expr.vars[0])
-			else:
-				match_expr = self.convert_expr_with_cast(
-				    expr.expr.typ, expr.expr
-				)
-			for b in expr.branches:
-				b_label = "" if b.is_else else self.cur_fn.local_name()
-				b_exit = exit_match if b.is_else else self.cur_fn.local_name()
-				if not b.is_else:
-					self.cur_fn.add_comment(
-					    f"match expr patterns (len: {len(b.pats)})"
+					    )
 					)
-				for i, p in enumerate(b.pats):
-					next_pat = self.cur_fn.local_name(
-					) if i < len(b.pats) - 1 else b_exit
-					tmp2 = self.cur_fn.local_name()
-					if expr.is_typematch:
-						field_name = "tag" if is_error_t else "idx"
-						type_nr = p.typ.sym.info.nr if is_error_t else p.typ.sym.index
-						self.cur_fn.alloca(
-						    self.comp.bool_t, tmp2,
-						    Inst(
-						        InstKind.Cmp, [
-						            Name("=="),
-						            Selector(
-						                expr.expr.typ, match_expr,
-						                Name(field_name)
-						            ),
-						            IntLiteral(self.comp.usize_t, str(type_nr))
-						        ]
-						    )
+				else:
+					p_conv = self.convert_expr_with_cast(p.typ, p)
+					if p.typ == self.comp.str_t:
+						inst = Inst(
+						    InstKind.Call, [
+						        Name("_R4core4_str4_eq_M"),
+						        Inst(InstKind.GetRef, [match_expr]),
+						        Inst(InstKind.GetRef, [p_conv]),
+						    ]
 						)
 					else:
-						p_conv = self.convert_expr_with_cast(p.typ, p)
-						if p.typ == self.comp.str_t:
-							inst = Inst(
-							    InstKind.Call, [
-							        Name("_R4core4_str4_eq_M"),
-							        Inst(InstKind.GetRef, [match_expr]),
-							        Inst(InstKind.GetRef, [p_conv]),
-							    ]
-							)
-						else:
-							inst = Inst(
-							    InstKind.Cmp, [Name("=="), match_expr, p_conv]
-							)
-						self.cur_fn.alloca(self.comp.bool_t, tmp2, inst)
-					self.cur_fn.add_cond_br(
-					    Ident(self.comp.bool_t, tmp2), b_label, next_pat
-					)
-					if i < len(b.pats) - 1:
-						self.cur_fn.add_label(next_pat)
-				if not b.is_else:
-					self.cur_fn.add_label(b_label)
-				if is_void_value:
-					self.convert_expr_with_cast(
-					    expr.typ, b.expr
-					) # ignore void value
-				else:
-					self.cur_fn.store(
-					    tmp, self.convert_expr_with_cast(expr.typ, b.expr)
-					)
-				self.cur_fn.add_br(exit_match)
-				if not b.is_else:
-					self.cur_fn.add_label(b_exit)
-			self.cur_fn.add_label(exit_match)
-			if not is_void_value:
-				return tmp
-		else:
-			raise Exception(expr.__class__)
+						inst = Inst(
+						    InstKind.Cmp, [Name("=="), match_expr, p_conv]
+						)
+					self.cur_fn.alloca(self.comp.bool_t, tmp2, inst)
+				self.cur_fn.add_cond_br(
+				    Ident(self.comp.bool_t, tmp2), b_label, next_pat
+				)
+				if i < len(b.pats) - 1:
+					self.cur_fn.add_label(next_pat)
+			if not b.is_else:
+				self.cur_fn.add_label(b_label)
+			if is_void_value:
+				self.convert_expr_with_cast(
+				    expr.typ, b.expr
+				) # ignore void value
+			else:
+				self.cur_fn.store(
+				    tmp, self.convert_expr_with_cast(expr.typ, b.expr)
+				)
+			self.cur_fn.add_br(exit_match)
+			if not b.is_else:
+				self.cur_fn.add_label(b_exit)
+		self.cur_fn.add_label(exit_match)
+		if not is_void_value:
+			return tmp
 		return Skip()
 
 	def convert_const(self, const_sym):
-		if const_sym.has_evaled_expr:
-			const_sym.has_ir_expr = True
-			const_sym.ir_expr = self.convert_expr_with_cast(
-			    const_sym.typ, const_sym.evaled_expr
-			)
-			return const_sym.ir_expr
+		# constant values are folded into a literal at each use
+		if lit := self.comp.const_eval.const_literal(const_sym):
+			return self.convert_expr_with_cast(const_sym.typ, lit)
 		if const_sym.has_ir_expr:
 			return const_sym.ir_expr
 		const_sym.has_ir_expr = True
@@ -2527,7 +2746,7 @@ class AST2RIR:
 		            StringLiteral(
 		                self.comp.str_t, errtype_name, len(errtype_name)
 		            ),
-		            IntLiteral(self.comp.uint8_t, str(tag)), msg,
+		            tag, msg,
 		            self.variadic_args(
 		                args, type.Type(self.comp.trait_to_string)
 		            )
@@ -2743,14 +2962,14 @@ class AST2RIR:
 
 	def sort_type_symbols(self, tss):
 		dg = utils.DepGraph()
-		typ_names = list()
+		typ_names = {}
 		for ts in tss:
 			if ts.kind in (
 			    sym.TypeKind.Alias, sym.TypeKind.ErrType, sym.TypeKind.NoReturn
 			):
 				continue
 			ts.mangled_name = mangle_symbol(ts)
-			typ_names.append(ts.mangled_name)
+			typ_names.setdefault(ts.mangled_name, []).append(ts)
 		for ts in tss:
 			if ts.kind in (
 			    sym.TypeKind.Alias, sym.TypeKind.ErrType, sym.TypeKind.NoReturn
@@ -2758,12 +2977,12 @@ class AST2RIR:
 				continue
 			field_deps = list()
 			if ts.kind == sym.TypeKind.Array:
-				dep = mangle_symbol(ts.info.elem_typ.get_sym())
+				dep = self.comp.type_names.symbol_name(ts.info.elem_typ)
 				if dep in typ_names:
 					field_deps.append(dep)
 			elif ts.kind == sym.TypeKind.Tuple:
 				for f in ts.info.types:
-					dep = mangle_symbol(f.get_sym())
+					dep = self.comp.type_names.symbol_name(f)
 					if dep not in typ_names or dep in field_deps or isinstance(
 					    f, type.Ref
 					):
@@ -2771,15 +2990,15 @@ class AST2RIR:
 					field_deps.append(dep)
 			elif ts.kind == sym.TypeKind.Union:
 				for v in ts.info.variants:
-					dep = mangle_symbol(v.get_sym())
+					dep = self.comp.type_names.symbol_name(v)
 					if dep not in typ_names or dep in field_deps or isinstance(
-					    f.typ, type.Optional
+					    v, type.Optional
 					):
 						continue
 					field_deps.append(dep)
 			elif ts.kind == sym.TypeKind.Struct:
 				for f in ts.fields:
-					dep = mangle_symbol(f.typ.get_sym())
+					dep = self.comp.type_names.symbol_name(f.typ)
 					if dep not in typ_names or dep in field_deps or isinstance(
 					    f.typ, type.Optional
 					):
@@ -2794,7 +3013,5 @@ class AST2RIR:
 			)
 		types_sorted = list()
 		for node in dg_sorted.nodes:
-			for ts in tss:
-				if ts.mangled_name == node.name:
-					types_sorted.append(ts)
+			types_sorted.extend(typ_names[node.name])
 		return types_sorted
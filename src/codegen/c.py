@@ -2,8 +2,10 @@
 # Use of this source code is governed by an MIT license
 # that can be found in the LICENSE file.
 
+import os, shutil
+
 from . import *
-from .. import ast, utils
+from .. import ast, prefs, utils
 from ..ast import sym, type
 from ..utils import full_version
 
@@ -138,6 +140,17 @@ typedef size_t usize;
 typedef void* _R4none;
 """
 
+# With `--split-c`, the private symbols are used by all the translation units
+# of the package, see `Gen.write_units`.
+SPLIT_HEADER = """
+#undef RIVET_LOCAL_SYMBOL
+#if defined(__GNUC__) || defined(__clang__)
+	#define RIVET_LOCAL_SYMBOL __attribute__((visibility("hidden")))
+#else
+	#define RIVET_LOCAL_SYMBOL
+#endif
+"""
+
 class Gen:
 	def __init__(self, comp):
 		self.comp = comp
@@ -146,7 +159,45 @@ class Gen:
 		self.types = utils.Builder()
 		self.protos = utils.Builder()
 		self.statics = utils.Builder()
+		self.static_decls = utils.Builder() # see `write_units`
+		self.vtables = utils.Builder()
 		self.out = utils.Builder()
+		# the functions of each module, with `--split-c`
+		self.units = {"": self.out}
+
+		self.inst_gens = {
+		    InstKind.Nop: self.gen_nop_inst,
+		    InstKind.Alloca: self.gen_alloca_inst,
+		    InstKind.Store: self.gen_store_inst,
+		    InstKind.StorePtr: self.gen_store_inst,
+		    InstKind.LoadPtr: self.gen_load_ptr_inst,
+		    InstKind.GetElementPtr: self.gen_get_element_ptr_inst,
+		    InstKind.GetRef: self.gen_get_ref_inst,
+		    InstKind.Cast: self.gen_cast_inst,
+		    InstKind.Cmp: self.gen_cmp_inst,
+		    InstKind.Select: self.gen_select_inst,
+		    InstKind.DbgStmtLine: self.gen_dbg_stmt_line_inst,
+		    InstKind.Unreachable: self.gen_unreachable_inst,
+		    InstKind.Breakpoint: self.gen_breakpoint_inst,
+		    InstKind.Add: self.gen_binary_inst,
+		    InstKind.Sub: self.gen_binary_inst,
+		    InstKind.Mult: self.gen_binary_inst,
+		    InstKind.Div: self.gen_binary_inst,
+		    InstKind.Mod: self.gen_binary_inst,
+		    InstKind.BitAnd: self.gen_binary_inst,
+		    InstKind.BitOr: self.gen_binary_inst,
+		    InstKind.BitXor: self.gen_binary_inst,
+		    InstKind.Lshift: self.gen_binary_inst,
+		    InstKind.Rshift: self.gen_binary_inst,
+		    InstKind.Inc: self.gen_inc_dec_inst,
+		    InstKind.Dec: self.gen_inc_dec_inst,
+		    InstKind.BitNot: self.gen_unary_inst,
+		    InstKind.BooleanNot: self.gen_unary_inst,
+		    InstKind.Neg: self.gen_unary_inst,
+		    InstKind.Br: self.gen_br_inst,
+		    InstKind.Call: self.gen_call_inst,
+		    InstKind.Ret: self.gen_ret_inst
+		}
 
 	def gen(self, rir_file):
 		self.gen_types(rir_file.types)
@@ -161,9 +212,20 @@ class Gen:
 		res.write(str(self.types))
 		res.writeln()
 		res.writeln(str(self.protos))
-		res.writeln(str(self.statics))
-		res.writeln(
-		    """void _R9init_argsZ(i32 __argc, u8** __argv) {
+		res.write(str(self.statics))
+		res.writeln(str(self.vtables))
+		if self.comp.prefs.pkg_type == prefs.PkgType.Lib:
+			# the entry point is generated by the binaries that link the
+			# library, see `Compiler.build_lib`
+			res.write(str(self.out))
+			return str(res)
+		res.writeln(self.init_args())
+		res.write(str(self.out))
+		res.write(self.entry_point())
+		return str(res)
+
+	def init_args(self):
+		return """void _R9init_argsZ(i32 __argc, u8** __argv) {
   _R4core4ARGS = (_R4core6_slice){
 	.ptr=malloc(sizeof(_R4core4_str) * __argc),
 	.elem_size=sizeof(_R4core4_str), .len=__argc
@@ -178,8 +240,9 @@ class Gen:
 void _R9drop_argsZ(void) {
 	free(_R4core4ARGS.ptr);
 }"""
-		)
-		res.write(str(self.out))
+
+	def entry_point(self):
+		res = utils.Builder()
 		res.writeln("int main(i32 __argc, char** __argv) {")
 		pkg_main = f"_R{len(self.comp.prefs.pkg_name)}{self.comp.prefs.pkg_name}4mainF"
 		res.writeln(
@@ -189,6 +252,46 @@ void _R9drop_argsZ(void) {
 		res.writeln("}")
 		return str(res)
 
+	def write_units(self, dir):
+		# Writes a header with the types, the prototypes and the declarations
+		# of the statics, included by a C file per module and by `main.c`,
+		# which defines the statics and the entry point. Returns the C files.
+		pkg_name = self.comp.prefs.pkg_name
+		if os.path.isdir(dir):
+			shutil.rmtree(dir) # the files of the removed modules
+		os.makedirs(dir)
+		header = utils.Builder()
+		header.writeln(HEADER)
+		header.writeln(SPLIT_HEADER)
+		header.writeln(str(self.typedefs))
+		header.write(str(self.types))
+		header.writeln()
+		header.writeln(str(self.protos))
+		header.write(str(self.static_decls))
+		header.writeln(str(self.vtables))
+		with open(os.path.join(dir, f"{pkg_name}.h"), "w+") as f:
+			f.write(str(header))
+		c_files = []
+		for unit, out in self.units.items():
+			res = utils.Builder()
+			res.writeln(f'#include "{pkg_name}.h"')
+			res.writeln()
+			if unit == "":
+				res.writeln(str(self.statics))
+				if self.comp.prefs.pkg_type != prefs.PkgType.Lib:
+					res.writeln(self.init_args())
+			res.write(str(out))
+			if unit == "":
+				if self.comp.prefs.pkg_type != prefs.PkgType.Lib:
+					res.write(self.entry_point())
+				c_file = os.path.join(dir, "main.c")
+			else:
+				c_file = os.path.join(dir, f"{unit}.ri.c")
+			with open(c_file, "w+") as f:
+				f.write(str(res))
+			c_files.append(c_file)
+		return c_files
+
 	def write_to_file(self, filename):
 		with open(filename, "w+") as f:
 			f.write(self.get_output())
@@ -212,9 +315,8 @@ void _R9drop_argsZ(void) {
 				self.types.writeln(f"struct {t.name} {{")
 				self.types.writeln("  union {")
 				for v in t.variants:
-					self.types.writeln(
-					    f"    {self.gen_type_str(v)} {mangle_type(v)};"
-					)
+					v_name = self.comp.type_names.mangle_type(v)
+					self.types.writeln(f"    {self.gen_type_str(v)} {v_name};")
 				self.types.writeln("  };")
 				self.types.writeln("  i64 idx;")
 				self.types.writeln("};")
@@ -274,12 +376,15 @@ void _R9drop_argsZ(void) {
 
 	def gen_statics(self, statics):
 		for s in statics:
+			typ_str = self.gen_type_str(s.typ)
+			self.static_decls.write("extern ")
 			if s.is_extern:
 				self.statics.write("extern ")
 			elif not s.is_pub:
 				self.statics.write("RIVET_LOCAL_SYMBOL ")
-			self.statics.write(self.gen_type_str(s.typ))
-			self.statics.writeln(f" {s.name};")
+				self.static_decls.write("RIVET_LOCAL_SYMBOL ")
+			self.statics.writeln(f"{typ_str} {s.name};")
+			self.static_decls.writeln(f"{typ_str} {s.name};")
 
 	def gen_decls(self, decls):
 		for decl in decls:
@@ -287,20 +392,22 @@ void _R9drop_argsZ(void) {
 
 	def gen_decl(self, decl):
 		if isinstance(decl, VTable):
-			self.statics.writeln(
+			self.vtables.writeln(
 			    f"static {decl.structure} {decl.name}[{decl.implement_nr}] = {{"
 			)
 			for i, ft in enumerate(decl.funcs):
-				self.statics.writeln('  {')
+				self.vtables.writeln('  {')
 				for f, impl in ft.items():
-					self.statics.writeln(f'    .{f} = (void*){impl}')
-				self.statics.write("  }")
+					self.vtables.writeln(f'    .{f} = (void*){impl}')
+				self.vtables.write("  }")
 				if i < len(decl.funcs) - 1:
-					self.statics.writeln(",")
+					self.vtables.writeln(",")
 				else:
-					self.statics.writeln()
-			self.statics.writeln("};")
+					self.vtables.writeln()
+			self.vtables.writeln("};")
 		elif isinstance(decl, FnDecl):
+			if self.comp.prefs.split_c:
+				self.out = self.units.setdefault(decl.unit, utils.Builder())
 			if decl.ret_typ == self.comp.no_return_t:
 				self.write("RIVET_NORETURN ")
 				self.protos.write("RIVET_NORETURN ")
@@ -374,168 +481,184 @@ void _R9drop_argsZ(void) {
 					self.writeln(";")
 
 	def gen_inst(self, inst):
-		if inst.kind == InstKind.Nop:
-			self.write("/* NOP */")
-		elif inst.kind == InstKind.Alloca:
-			if isinstance(inst.args[0].typ, type.Fn):
-				self.wrap_fn_ptr(inst.args[0].typ, inst.args[0].name)
-			else:
-				self.gen_type(inst.args[0].typ)
-				self.write(" ")
-				self.gen_expr(inst.args[0])
-		elif inst.kind in (InstKind.Store, InstKind.StorePtr):
-			arg0 = inst.args[0]
-			arg1 = inst.args[1]
-			is_ident_or_selector = isinstance(arg0, Ident
-			                                  ) or isinstance(arg0, Selector)
-			arg0_sym = arg0.typ.get_sym(
-			) if is_ident_or_selector else self.comp.void_t
-			if is_ident_or_selector and (
-			    isinstance(arg0.typ, type.Array)
-			    or arg0_sym.kind == sym.TypeKind.Array
-			):
-				# use memcpy for arrays
-				self.write("memcpy(")
-				if inst.kind != InstKind.StorePtr:
-					self.write("&")
+		if gen := self.inst_gens.get(inst.kind):
+			gen(inst)
+		else:
+			raise Exception(inst) # unreachable
+
+	def gen_nop_inst(self, inst):
+		self.write("/* NOP */")
+
+	def gen_alloca_inst(self, inst):
+		if isinstance(inst.args[0].typ, type.Fn):
+			self.wrap_fn_ptr(inst.args[0].typ, inst.args[0].name)
+		else:
+			self.gen_type(inst.args[0].typ)
+			self.write(" ")
+			self.gen_expr(inst.args[0])
+
+	def gen_store_inst(self, inst):
+		arg0 = inst.args[0]
+		arg1 = inst.args[1]
+		is_ident_or_selector = isinstance(arg0, Ident
+		                                  ) or isinstance(arg0, Selector)
+		arg0_sym = arg0.typ.get_sym(
+		) if is_ident_or_selector else self.comp.void_t
+		if is_ident_or_selector and (
+		    isinstance(arg0.typ, type.Array)
+		    or arg0_sym.kind == sym.TypeKind.Array
+		):
+			# use memcpy for arrays
+			self.write("memcpy(")
+			if inst.kind != InstKind.StorePtr:
+				self.write("&")
+			self.gen_expr(arg0)
+			self.write(", ")
+			if not ((isinstance(arg1, Ident) and arg1.use_arr_field)
+			        or isinstance(arg1, ArrayLiteral)):
+				self.write("&")
+			self.gen_expr(arg1)
+			size, _ = self.comp.type_size(arg0.typ)
+			self.write(f", {size})")
+		else:
+			if inst.kind == InstKind.StorePtr:
+				self.write("(*")
+			self.gen_expr(arg0)
+			if inst.kind == InstKind.StorePtr:
+				self.write(")")
+			self.write(" = ")
+			self.gen_expr(arg1)
+
+	def gen_load_ptr_inst(self, inst):
+		self.write("(*(")
+		self.gen_expr(inst.args[0])
+		self.write("))")
+
+	def gen_get_element_ptr_inst(self, inst):
+		self.write("(")
+		self.gen_expr(inst.args[0])
+		arg1 = inst.args[1]
+		if not (isinstance(arg1, IntLiteral) and arg1.lit == "0"):
+			self.write(" + ")
+			self.gen_expr(arg1)
+		self.write(")")
+
+	def gen_get_ref_inst(self, inst):
+		arg0 = inst.args[0]
+		if isinstance(
+		    arg0, (Ident, Selector, ArrayLiteral)
+		) or (isinstance(arg0, Inst) and arg0.kind == InstKind.LoadPtr):
+			if isinstance(arg0, ArrayLiteral):
 				self.gen_expr(arg0)
-				self.write(", ")
-				if not ((isinstance(arg1, Ident) and arg1.use_arr_field)
-				        or isinstance(arg1, ArrayLiteral)):
-					self.write("&")
-				self.gen_expr(arg1)
-				size, _ = self.comp.type_size(arg0.typ)
-				self.write(f", {size})")
 			else:
-				if inst.kind == InstKind.StorePtr:
-					self.write("(*")
+				self.write("(&")
 				self.gen_expr(arg0)
-				if inst.kind == InstKind.StorePtr:
-					self.write(")")
-				self.write(" = ")
-				self.gen_expr(arg1)
-		elif inst.kind == InstKind.LoadPtr:
-			self.write("(*(")
-			self.gen_expr(inst.args[0])
-			self.write("))")
-		elif inst.kind == InstKind.GetElementPtr:
-			self.write("(")
-			self.gen_expr(inst.args[0])
-			arg1 = inst.args[1]
-			if not (isinstance(arg1, IntLiteral) and arg1.lit == "0"):
-				self.write(" + ")
-				self.gen_expr(arg1)
+				self.write(")")
+		else:
+			self.write(f"(({self.gen_type_str(arg0.typ)}[]){{ ")
+			self.gen_expr(arg0)
+			self.write(" })")
+
+	def gen_cast_inst(self, inst):
+		self.write("((")
+		self.gen_expr(inst.args[1])
+		self.write(")(")
+		self.gen_expr(inst.args[0])
+		self.write("))")
+
+	def gen_cmp_inst(self, inst):
+		self.gen_expr(inst.args[1])
+		self.write(" ")
+		self.gen_expr(inst.args[0])
+		self.write(" ")
+		self.gen_expr(inst.args[2])
+
+	def gen_select_inst(self, inst):
+		self.write("(")
+		self.gen_expr(inst.args[0])
+		self.write(") ? (")
+		self.gen_expr(inst.args[1])
+		self.write(") : (")
+		self.gen_expr(inst.args[2])
+		self.write(")")
+
+	def gen_dbg_stmt_line_inst(self, inst):
+		self.write(f'#line {inst.args[1].name} "{inst.args[0].name}"')
+
+	def gen_unreachable_inst(self, inst):
+		self.write("RIVET_UNREACHABLE()")
+
+	def gen_breakpoint_inst(self, inst):
+		self.write("RIVET_BREAKPOINT()")
+
+	def gen_binary_inst(self, inst):
+		self.gen_expr(inst.args[0])
+		if inst.kind == InstKind.Add: self.write(" + ")
+		elif inst.kind == InstKind.Sub: self.write(" - ")
+		elif inst.kind == InstKind.Mult: self.write(" * ")
+		elif inst.kind == InstKind.Div: self.write(" / ")
+		elif inst.kind == InstKind.Mod: self.write(" % ")
+		elif inst.kind == InstKind.BitAnd: self.write(" & ")
+		elif inst.kind == InstKind.BitOr: self.write(" | ")
+		elif inst.kind == InstKind.BitXor: self.write(" ^ ")
+		elif inst.kind == InstKind.Lshift: self.write(" << ")
+		elif inst.kind == InstKind.Rshift: self.write(" >> ")
+		self.gen_expr(inst.args[1])
+
+	def gen_inc_dec_inst(self, inst):
+		self.gen_expr(inst.args[0])
+		if inst.kind == InstKind.Inc:
+			self.write("++")
+		else:
+			self.write("--")
+
+	def gen_unary_inst(self, inst):
+		if inst.kind == InstKind.BooleanNot:
+			self.write("!(")
+		elif inst.kind == InstKind.Neg:
+			self.write("-")
+		else:
+			self.write("~")
+		self.gen_expr(inst.args[0])
+		if inst.kind == InstKind.BooleanNot:
 			self.write(")")
-		elif inst.kind == InstKind.GetRef:
-			arg0 = inst.args[0]
-			if isinstance(
-			    arg0, (Ident, Selector, ArrayLiteral)
-			) or (isinstance(arg0, Inst) and arg0.kind == InstKind.LoadPtr):
-				if isinstance(arg0, ArrayLiteral):
-					self.gen_expr(arg0)
-				else:
-					self.write("(&")
-					self.gen_expr(arg0)
-					self.write(")")
-			else:
-				self.write(f"(({self.gen_type_str(arg0.typ)}[]){{ ")
-				self.gen_expr(arg0)
-				self.write(" })")
-		elif inst.kind == InstKind.Cast:
-			self.write("((")
-			self.gen_expr(inst.args[1])
-			self.write(")(")
-			self.gen_expr(inst.args[0])
-			self.write("))")
-		elif inst.kind == InstKind.Cmp:
-			self.gen_expr(inst.args[1])
-			self.write(" ")
+
+	def gen_br_inst(self, inst):
+		if len(inst.args) == 1:
+			self.write(f"goto {inst.args[0].name}")
+		else:
+			self.write("if (")
 			self.gen_expr(inst.args[0])
+			self.write(f") goto {inst.args[1].name}")
+			if len(inst.args) == 3:
+				self.write(f"; else goto {inst.args[2].name}")
+
+	def gen_call_inst(self, inst):
+		arg0 = inst.args[0]
+		args = inst.args[1:]
+		if isinstance(arg0, Ident):
+			self.write(arg0.name)
+		else:
+			self.gen_expr(arg0)
+		self.write("(")
+		for i, arg in enumerate(args):
+			self.gen_expr(arg)
+			if i < len(args) - 1:
+				self.write(", ")
+		self.write(")")
+
+	def gen_ret_inst(self, inst):
+		self.write("return")
+		if len(inst.args) == 1:
 			self.write(" ")
-			self.gen_expr(inst.args[2])
-		elif inst.kind == InstKind.Select:
-			self.write("(")
-			self.gen_expr(inst.args[0])
-			self.write(") ? (")
-			self.gen_expr(inst.args[1])
-			self.write(") : (")
-			self.gen_expr(inst.args[2])
-			self.write(")")
-		elif inst.kind == InstKind.DbgStmtLine:
-			self.write(f'#line {inst.args[1].name} "{inst.args[0].name}"')
-		elif inst.kind == InstKind.Unreachable:
-			self.write("RIVET_UNREACHABLE()")
-		elif inst.kind == InstKind.Breakpoint:
-			self.write("RIVET_BREAKPOINT()")
-		elif inst.kind in (
-		    InstKind.Add, InstKind.Sub, InstKind.Mult, InstKind.Div,
-		    InstKind.Mod, InstKind.BitAnd, InstKind.BitOr, InstKind.BitXor,
-		    InstKind.Lshift, InstKind.Rshift
-		):
-			self.gen_expr(inst.args[0])
-			if inst.kind == InstKind.Add: self.write(" + ")
-			elif inst.kind == InstKind.Sub: self.write(" - ")
-			elif inst.kind == InstKind.Mult: self.write(" * ")
-			elif inst.kind == InstKind.Div: self.write(" / ")
-			elif inst.kind == InstKind.Mod: self.write(" % ")
-			elif inst.kind == InstKind.BitAnd: self.write(" & ")
-			elif inst.kind == InstKind.BitOr: self.write(" | ")
-			elif inst.kind == InstKind.BitXor: self.write(" ^ ")
-			elif inst.kind == InstKind.Lshift: self.write(" << ")
-			elif inst.kind == InstKind.Rshift: self.write(" >> ")
-			self.gen_expr(inst.args[1])
-		elif inst.kind in (InstKind.Inc, InstKind.Dec):
-			self.gen_expr(inst.args[0])
-			if inst.kind == InstKind.Inc:
-				self.write("++")
-			else:
-				self.write("--")
-		elif inst.kind in (InstKind.BitNot, InstKind.BooleanNot, InstKind.Neg):
-			if inst.kind == InstKind.BooleanNot:
-				self.write("!(")
-			elif inst.kind == InstKind.Neg:
-				self.write("-")
-			else:
-				self.write("~")
-			self.gen_expr(inst.args[0])
-			if inst.kind == InstKind.BooleanNot:
-				self.write(")")
-		elif inst.kind == InstKind.Br:
-			if len(inst.args) == 1:
-				self.write(f"goto {inst.args[0].name}")
-			else:
-				self.write("if (")
-				self.gen_expr(inst.args[0])
-				self.write(f") goto {inst.args[1].name}")
-				if len(inst.args) == 3:
-					self.write(f"; else goto {inst.args[2].name}")
-		elif inst.kind == InstKind.Call:
 			arg0 = inst.args[0]
-			args = inst.args[1:]
-			if isinstance(arg0, Ident):
-				self.write(arg0.name)
+			if isinstance(arg0, ArrayLiteral):
+				arg0_sym = arg0.typ.get_sym()
+				self.write(f"({arg0_sym.mangled_name}_Ret){{.arr=")
+				self.gen_expr(arg0)
+				self.write("}")
 			else:
 				self.gen_expr(arg0)
-			self.write("(")
-			for i, arg in enumerate(args):
-				self.gen_expr(arg)
-				if i < len(args) - 1:
-					self.write(", ")
-			self.write(")")
-		elif inst.kind == InstKind.Ret:
-			self.write("return")
-			if len(inst.args) == 1:
-				self.write(" ")
-				arg0 = inst.args[0]
-				if isinstance(arg0, ArrayLiteral):
-					arg0_sym = arg0.typ.get_sym()
-					self.write(f"({arg0_sym.mangled_name}_Ret){{.arr=")
-					self.gen_expr(arg0)
-					self.write("}")
-				else:
-					self.gen_expr(arg0)
-		else:
-			raise Exception(inst) # unreachable
 
 	def gen_expr(self, expr):
 		if isinstance(expr, Skip):
@@ -599,6 +722,15 @@ void _R9drop_argsZ(void) {
 		self.write(self.gen_type_str(typ))
 
 	def gen_type_str(self, typ):
+		# arrays are rendered differently as return types
+		key = (typ.key(), self.inside_func_ret_typ)
+		if typ_str := self.comp.type_names.c_types.get(key):
+			return typ_str
+		typ_str = self.render_type_str(typ)
+		self.comp.type_names.c_types[key] = typ_str
+		return typ_str
+
+	def render_type_str(self, typ):
 		res = utils.Builder()
 		if isinstance(typ, type.Result):
 			res.write(typ.sym.mangled_name)
@@ -643,9 +775,17 @@ void _R9drop_argsZ(void) {
 		self.write(self.wrap_fn_ptr_str(fn_ptr, name))
 
 	def wrap_fn_ptr_str(self, fn_ptr, name):
+		key = (fn_ptr.key(), self.inside_func_ret_typ)
+		if not (parts := self.comp.type_names.fn_ptrs.get(key)):
+			parts = self.render_fn_ptr_parts(fn_ptr)
+			self.comp.type_names.fn_ptrs[key] = parts
+		return f"{parts[0]}{name}{parts[1]}"
+
+	# returns the C declarator of `fn_ptr` split around its name
+	def render_fn_ptr_parts(self, fn_ptr):
+		prefix = f"{self.gen_type_str(fn_ptr.ret_typ)} (*"
 		res = utils.Builder()
-		res.write(self.gen_type_str(fn_ptr.ret_typ))
-		res.write(f" (*{name})(")
+		res.write(")(")
 		if fn_ptr.is_method:
 			res.write("void* self")
 			if len(fn_ptr.args) > 0:
@@ -658,4 +798,4 @@ void _R9drop_argsZ(void) {
 				if i < len(fn_ptr.args) - 1:
 					res.write(", ")
 		res.write(")")
-		return str(res)
+		return prefix, str(res)
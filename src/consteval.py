@@ -0,0 +1,293 @@
+# Copyright (C) 2022 The Rivet Team. All rights reserved.
+# Use of this source code is governed by an MIT license
+# that can be found in the LICENSE file.
+
+import math
+
+from .token import Kind
+from .ast import sym, type
+from . import ast, report, utils
+
+# like C, the quotient is truncated toward zero
+def int_div(a, b):
+	quo = abs(a) // abs(b)
+	return -quo if (a < 0) != (b < 0) else quo
+
+def int_mod(a, b):
+	return a - b * int_div(a, b)
+
+# Evaluates constant expressions at compile-time: integers, floats, bools,
+# runes, strings, comparisons, `size_of!`/`align_of!`, enum values and
+# references to other constants.
+#
+# The values are Python values (`int`, `float` and `bool`), runes and
+# strings are kept as their literals. `None` means that the expression
+# is not constant; then it is lowered like any other expression.
+#
+# The value of each constant is memoized in its symbol. The resolver
+# evaluates the sizes of the arrays before all the types are resolved, a
+# value that depends on the size of an unresolved type is not memoized,
+# it will be evaluated again later.
+class ConstEval:
+	def __init__(self, comp):
+		self.comp = comp
+		# constants being evaluated, to detect cycles
+		self.stack = []
+		self.incomplete = False
+
+	def eval_const(self, const_sym, pos = None):
+		if const_sym.has_evaled_value:
+			return const_sym.evaled_value
+		if const_sym in self.stack:
+			cycle = self.stack[self.stack.index(const_sym):] + [const_sym]
+			report.error(
+			    f"constant `{const_sym.name}` depends on itself",
+			    pos or const_sym.expr.pos
+			)
+			report.note(" -> ".join([f"`{s.name}`" for s in cycle]))
+			return None
+		self.comp.resolver.resolve_const(const_sym)
+		self.stack.append(const_sym)
+		old_incomplete = self.incomplete
+		self.incomplete = False
+		value = self.eval_expr(const_sym.expr)
+		if not self.incomplete:
+			const_sym.evaled_value = value
+			const_sym.has_evaled_value = True
+		self.stack.pop()
+		self.incomplete = old_incomplete or self.incomplete
+		return value
+
+	# Returns the value of `expr` if it is an integer.
+	def eval_int(self, expr):
+		value = self.eval_expr(expr)
+		self.incomplete = False
+		if isinstance(value, int) and not isinstance(value, bool):
+			return value
+		return None
+
+	# Returns the value of `const_sym` as a literal of its type, ready to be
+	# lowered in place of each use of the constant.
+	def const_literal(self, const_sym):
+		value = self.eval_const(const_sym)
+		if value == None:
+			return None
+		typ = const_sym.typ
+		pos = const_sym.expr.pos
+		if isinstance(value, ast.StringLiteral):
+			lit = ast.StringLiteral(
+			    value.lit, value.is_raw, value.is_bytestr, value.is_cstr, pos
+			)
+		elif isinstance(value, ast.CharLiteral):
+			lit = ast.CharLiteral(value.lit, pos, value.is_byte)
+		elif isinstance(value, bool):
+			if typ != self.comp.bool_t:
+				return None
+			lit = ast.BoolLiteral(value, pos)
+		elif self.comp.is_int(typ) and isinstance(value, int):
+			lit = ast.IntegerLiteral(str(value), pos)
+		elif self.comp.is_float(typ) and math.isfinite(value):
+			lit = ast.FloatLiteral(repr(float(value)), pos)
+		else:
+			return None
+		lit.typ = typ
+		return lit
+
+	def eval_expr(self, expr):
+		if isinstance(expr, ast.ParExpr):
+			return self.eval_expr(expr.expr)
+		elif isinstance(expr, ast.BoolLiteral):
+			return expr.lit
+		elif isinstance(expr, ast.IntegerLiteral):
+			try:
+				return int(expr.lit, 0)
+			except ValueError:
+				return None
+		elif isinstance(expr, ast.FloatLiteral):
+			try:
+				return float(expr.lit)
+			except ValueError:
+				return None
+		elif isinstance(expr, ast.CharLiteral):
+			if expr.is_byte:
+				b, _ = utils.bytestr(expr.lit)
+				return b[0]
+			return expr
+		elif isinstance(expr, ast.StringLiteral):
+			return expr
+		elif isinstance(expr, ast.Ident):
+			return self.eval_ident(expr)
+		elif isinstance(expr, ast.PathExpr):
+			return self.eval_path_expr(expr)
+		elif isinstance(expr, ast.UnaryExpr):
+			return self.eval_unary_expr(expr)
+		elif isinstance(expr, ast.BinaryExpr):
+			return self.eval_binary_expr(expr)
+		elif isinstance(expr, ast.CastExpr):
+			return self.eval_cast_expr(expr)
+		elif isinstance(expr, ast.BuiltinCallExpr):
+			if expr.name in ("size_of", "align_of"):
+				typ = expr.args[0].typ
+				if not self.is_resolved_type(typ):
+					self.incomplete = True
+					return None
+				size, align = self.comp.type_size(typ)
+				return size if expr.name == "size_of" else align
+		return None
+
+	def eval_ident(self, expr):
+		if isinstance(expr.sym, sym.Const):
+			return self.eval_const(expr.sym, expr.pos)
+		return None
+
+	def eval_path_expr(self, expr):
+		if isinstance(expr.field_info, sym.Const):
+			return self.eval_const(expr.field_info, expr.pos)
+		elif isinstance(
+		    expr.left_info, sym.Type
+		) and expr.left_info.kind == sym.TypeKind.Enum:
+			if v := expr.left_info.info.get_variant(expr.field_name):
+				return v.value
+		return None
+
+	def eval_unary_expr(self, expr):
+		right = self.eval_expr(expr.right)
+		if right == None:
+			return None
+		if expr.op == Kind.Bang:
+			if isinstance(right, bool):
+				return not right
+		elif isinstance(right, bool):
+			return None
+		elif expr.op == Kind.Minus:
+			if isinstance(right, (int, float)):
+				return -right
+		elif expr.op == Kind.BitNot:
+			if isinstance(right, int):
+				return ~right
+		return None
+
+	def eval_binary_expr(self, expr):
+		left = self.eval_expr(expr.left)
+		if left == None:
+			return None
+		# `and` and `or` short-circuit
+		if expr.op in (Kind.KeyAnd, Kind.KeyOr):
+			if not isinstance(left, bool):
+				return None
+			if left == (expr.op == Kind.KeyOr):
+				return left
+			right = self.eval_expr(expr.right)
+			return right if isinstance(right, bool) else None
+		right = self.eval_expr(expr.right)
+		if right == None:
+			return None
+		op = expr.op
+		if isinstance(left, ast.StringLiteral) or isinstance(
+		    right, ast.StringLiteral
+		):
+			return self.eval_string_cmp(op, left, right)
+		elif isinstance(left, ast.CharLiteral) or isinstance(
+		    right, ast.CharLiteral
+		):
+			if op in (Kind.Eq, Kind.Ne) and isinstance(
+			    left, ast.CharLiteral
+			) and isinstance(right, ast.CharLiteral) and left.lit == right.lit:
+				return op == Kind.Eq
+			return None
+		elif isinstance(left, bool) or isinstance(right, bool):
+			if not (isinstance(left, bool) and isinstance(right, bool)):
+				return None
+			if op == Kind.Eq:
+				return left == right
+			elif op == Kind.Ne:
+				return left != right
+			elif op == Kind.Amp:
+				return left and right
+			elif op == Kind.Pipe:
+				return left or right
+			return None
+		elif op == Kind.Eq:
+			return left == right
+		elif op == Kind.Ne:
+			return left != right
+		elif op == Kind.Lt:
+			return left < right
+		elif op == Kind.Gt:
+			return left > right
+		elif op == Kind.Le:
+			return left <= right
+		elif op == Kind.Ge:
+			return left >= right
+		elif op == Kind.Plus:
+			return left + right
+		elif op == Kind.Minus:
+			return left - right
+		elif op == Kind.Mult:
+			return left * right
+		elif op in (Kind.Div, Kind.Mod):
+			if right == 0:
+				report.error(
+				    "division by zero in constant expression", expr.pos
+				)
+				return None
+			if isinstance(left, float) or isinstance(right, float):
+				if op == Kind.Div:
+					return left / right
+				return math.fmod(left, right)
+			if op == Kind.Div:
+				return int_div(left, right)
+			return int_mod(left, right)
+		elif isinstance(left, int) and isinstance(right, int):
+			if op == Kind.Amp:
+				return left & right
+			elif op == Kind.Pipe:
+				return left | right
+			elif op == Kind.Xor:
+				return left ^ right
+			elif right >= 0:
+				if op == Kind.Lshift:
+					return left << right
+				elif op == Kind.Rshift:
+					return left >> right
+		return None
+
+	def eval_string_cmp(self, op, left, right):
+		if not (
+		    isinstance(left, ast.StringLiteral)
+		    and isinstance(right, ast.StringLiteral)
+		) or op not in (Kind.Eq, Kind.Ne):
+			return None
+		if left.lit == right.lit and left.is_raw == right.is_raw:
+			return op == Kind.Eq
+		elif "\\" not in left.lit and "\\" not in right.lit:
+			return op == Kind.Ne
+		# the escape sequences would have to be decoded
+		return None
+
+	def eval_cast_expr(self, expr):
+		value = self.eval_expr(expr.expr)
+		if value == None or not self.is_resolved_type(expr.typ):
+			return None
+		elif self.comp.is_int(expr.typ):
+			if isinstance(value, float):
+				if not math.isfinite(value):
+					return None
+				value = int(value)
+			elif not isinstance(value, int):
+				return None
+			# wrap around, like C
+			bits = self.comp.int_bits(expr.typ)
+			value &= (1 << bits) - 1
+			if self.comp.is_signed_int(expr.typ) and value >> (bits - 1):
+				value -= 1 << bits
+			return value
+		elif self.comp.is_float(expr.typ):
+			if isinstance(value, (int, float)) and not isinstance(value, bool):
+				return float(value)
+		return None
+
+	def is_resolved_type(self, typ):
+		if isinstance(typ, (type.Ptr, type.Ref, type.Fn)):
+			return True
+		return typ.get_sym() != None
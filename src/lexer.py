@@ -2,13 +2,96 @@
 # Use of this source code is governed by an MIT license
 # that can be found in the LICENSE file.
 
+import re
+from collections import deque
+from itertools import islice
+
 from .token import Kind
-from . import utils, token, report
+from . import utils, token, report, source
 
 LF = chr(10)
 CR = chr(13)
 NUM_SEP = "_"
 
+# Number of tokens that `peek_token` can look past the next one, in
+# streaming mode; the parser never peeks more than one token ahead of
+# `Parser.peek_tok`.
+LOOKAHEAD = 2
+
+def build_master_pattern(for_bytes = False):
+	# Longest operators first, so that `...` wins over `..` and `.`.
+	ops = sorted(FAST_OPERATORS, key = len, reverse = True)
+	ops.remove("!is")
+	comment = r"[^\n]*"
+	if for_bytes:
+		# over UTF-8 bytes, multibyte characters are left to the legacy
+		# engine, except the whitespaces U+0085 and U+00A0
+		ws = r"(?:[\x08-\x0d\x20]|\xc2[\x85\xa0])+"
+		word = r"[\w\x80-\xff]"
+		not_is = r"!is(?=[\s\x1c-\x1f])"
+		ops.remove("!")
+		ops.append(r"!(?!is[\x80-\xff])")
+		# a lone `\r` ends the line, it isn't translated to `\n` here
+		comment = r"[^\r\n]*"
+	else:
+		ws = r"[\x08-\x0d\x20\x85\xa0]+"
+		word = r"\w"
+		not_is = r"!is(?=\s)"
+	pattern = "|".join((
+	    f"(?P<ws>{ws})",
+	    # names followed by a non-ASCII alphanumeric character are left to
+	    # the legacy engine
+	    f"(?P<name>[A-Za-z_][A-Za-z_0-9]*)(?!{word})",
+	    # only numbers that don't need diagnostics or prefix-zero handling,
+	    # the rest are read by `read_number`
+	    rf"(?P<number>0x[0-9a-fA-F]+|0b[01]+|[1-9][0-9]*|0)(?!{word}|\.)",
+	    # strings without escapes or newlines are the same for every string
+	    # prefix
+	    r'(?P<string>"[^"\\\r\n]*")',
+	    f"(?P<doc>///{comment})",
+	    f"(?P<comment>//{comment})",
+	    r"(?P<slow>/\*)",
+	    f"(?P<op>{not_is}|" + "|".join(
+	        op if op.startswith("!(") else re.escape(op) for op in ops
+	    ) + ")",
+	))
+	return re.compile(pattern.encode() if for_bytes else pattern)
+
+FAST_OPERATORS = {
+    "...": Kind.Ellipsis, "!is": Kind.KeyNotIs, "++": Kind.Inc,
+    "+=": Kind.PlusAssign, "--": Kind.Dec, "-=": Kind.MinusAssign,
+    "*=": Kind.MultAssign, "/=": Kind.DivAssign, "%=": Kind.ModAssign,
+    "==": Kind.Eq, "=>": Kind.Arrow, "<=": Kind.Le, ">=": Kind.Ge,
+    "..": Kind.DotDot, "::": Kind.DoubleColon, "&=": Kind.AmpAssign,
+    "!=": Kind.Ne, "|=": Kind.PipeAssign, "^=": Kind.XorAssign,
+    "+": Kind.Plus, "-": Kind.Minus, "*": Kind.Mult, "/": Kind.Div,
+    "%": Kind.Mod, "=": Kind.Assign, "<": Kind.Lt, ">": Kind.Gt,
+    ".": Kind.Dot, ",": Kind.Comma, ":": Kind.Colon, ";": Kind.Semicolon,
+    "?": Kind.Question, "$": Kind.Dollar, "#": Kind.Hash, "&": Kind.Amp,
+    "!": Kind.Bang, "|": Kind.Pipe, "~": Kind.BitNot, "^": Kind.Xor,
+    "{": Kind.Lbrace, "}": Kind.Rbrace, "[": Kind.Lbracket,
+    "]": Kind.Rbracket, "(": Kind.Lparen, ")": Kind.Rparen
+}
+MASTER_PATTERN = build_master_pattern()
+MASTER_BYTES_PATTERN = build_master_pattern(True)
+assert MASTER_PATTERN.groupindex == MASTER_BYTES_PATTERN.groupindex
+FAST_BYTES_OPERATORS = {
+    op.encode(): kind
+    for op, kind in FAST_OPERATORS.items()
+}
+WS_GROUP = MASTER_PATTERN.groupindex["ws"]
+NAME_GROUP = MASTER_PATTERN.groupindex["name"]
+NUMBER_GROUP = MASTER_PATTERN.groupindex["number"]
+STRING_GROUP = MASTER_PATTERN.groupindex["string"]
+DOC_GROUP = MASTER_PATTERN.groupindex["doc"]
+SLOW_GROUP = MASTER_PATTERN.groupindex["slow"]
+OP_GROUP = MASTER_PATTERN.groupindex["op"]
+
+# ends of the string and char literals that start at a given byte, used to
+# slice the memory-mapped source
+STRING_END_RE = re.compile(rb'(?:[^"\\]|\\.)*"', re.DOTALL)
+CHAR_END_RE = re.compile(rb"(?:[^'\\]|\\.)*'", re.DOTALL)
+
 def is_hex_digit(ch):
 	return ch.isdigit() or (ch >= "a"
 	                        and ch <= "f") or (ch >= "A" and ch <= "F")
@@ -17,30 +100,62 @@ def is_bin_digit(ch):
 	return ch in ("0", "1")
 
 class Lexer:
-	def __init__(self, text):
+	def __init__(self, text, legacy = False, streaming = False):
 		self.file = "<in-memory>"
+		# positions are computed from the line index of the source buffer
+		self.source = source.SourceBuffer(self.file, text)
 		self.text = text
 		self.text_len = len(text)
-		self.line = 0
-		self.last_nl_pos = 0
 		self.pos = 0
 		self.is_started = False
-		self.is_cr_lf = False
 
+		# Use the old character-by-character engine (`_next`) instead of
+		# the master pattern one (`fast_scan`), both produce the same
+		# tokens.
+		self.legacy = legacy
+
+		# A list of `Token`s with the legacy engine, a `token.TokenBuffer`
+		# otherwise.
 		self.all_tokens = []
 		self.tidx = 0
 
+		# In streaming mode the tokens are pulled from a generator on
+		# demand, and only the tokens being peeked at are kept, in
+		# `lookahead`, instead of materializing the whole file in
+		# `all_tokens`.
+		self.stream = self.tokens() if streaming else None
+		self.lookahead = deque(maxlen = LOOKAHEAD)
+
 	@staticmethod
-	def from_file(file):
-		s = Lexer(open(file, encoding = 'UTF-8').read())
+	def from_file(file, legacy = False, streaming = False):
+		# the legacy engine can only read decoded text
+		buf = source.get(file, not legacy)
+		if buf.data != None:
+			# the bytes of memory-mapped files are scanned directly
+			s = Lexer("", legacy, streaming)
+		else:
+			s = Lexer(buf.text, legacy, streaming)
 		s.file = file
-		s.tokenize_remaining_text()
+		s.source = buf
+		if not streaming:
+			s.tokenize_remaining_text()
 		return s
 
 	def tokenize_remaining_text(self):
+		if self.legacy:
+			self.all_tokens.extend(self.tokens())
+		else:
+			self.all_tokens = token.TokenBuffer(self.source.pos)
+			self.all_tokens.extend(self.fast_scan())
+
+	def tokens(self):
+		if not self.legacy:
+			for lit, kind, offset in self.fast_scan():
+				yield token.LazyToken(lit, kind, offset, self.source.pos)
+			return
 		while True:
 			t = self._next()
-			self.all_tokens.append(t)
+			yield t
 			if t.kind == Kind.EOF:
 				break
 
@@ -48,30 +163,12 @@ class Lexer:
 		return self.text[self.pos]
 
 	def get_pos(self):
-		return token.Pos(
-		    self.file, self.line, max(1, self.current_column()), self.pos
-		)
-
-	def ignore_line(self):
-		self.eat_to_end_of_line()
-		self.inc_line_number()
+		return self.source.pos(self.pos)
 
 	def eat_to_end_of_line(self):
 		while self.pos < self.text_len and self.cur_char() != LF:
 			self.pos += 1
 
-	def inc_line_number(self):
-		self.last_nl_pos = min(self.text_len - 1, self.pos)
-		if self.is_cr_lf:
-			self.last_nl_pos += 1
-		self.line += 1
-
-	def current_column(self):
-		return self.pos - self.last_nl_pos
-
-	def is_nl(self, ch):
-		return ch in (CR, LF)
-
 	def skip_whitespace(self):
 		while self.pos < self.text_len:
 			c = self.cur_char()
@@ -83,15 +180,6 @@ class Lexer:
 			    (c == chr(0x85)) or (c == chr(0xA0))
 			):
 				return
-			if (
-			    self.pos + 1 < self.text_len and c == CR
-			    and self.text[self.pos + 1] == LF
-			):
-				self.is_cr_lf = True
-			if self.is_nl(c) and not (
-			    self.pos > 0 and self.text[self.pos - 1] == CR and c == LF
-			):
-				self.inc_line_number()
 			self.pos += 1
 
 	def expect(self, want, start_pos):
@@ -107,11 +195,38 @@ class Lexer:
 		return True
 
 	def peek_token(self, n):
+		if self.stream != None:
+			assert n < LOOKAHEAD, "increase `lexer.LOOKAHEAD`"
+			while len(self.lookahead) <= n:
+				t = next(self.stream, None)
+				if t == None:
+					return token.Token("", Kind.EOF, self.get_pos())
+				self.lookahead.append(t)
+			return self.lookahead[n]
 		idx = self.tidx + n
 		if idx >= len(self.all_tokens):
 			return token.Token("", Kind.EOF, self.get_pos())
 		return self.all_tokens[idx]
 
+	def matching_rbrace(self, idx):
+		# Returns the index of the `}` that closes the block whose first
+		# token is at `idx`, or -1 if the file ends before it; not available
+		# in streaming mode.
+		if isinstance(self.all_tokens, token.TokenBuffer):
+			kinds = islice(self.all_tokens.kinds, idx, None)
+		else:
+			kinds = (t.kind for t in islice(self.all_tokens, idx, None))
+		lbrace, rbrace = Kind.Lbrace, Kind.Rbrace
+		depth = 1
+		for i, kind in enumerate(kinds, idx):
+			if kind == lbrace:
+				depth += 1
+			elif kind == rbrace:
+				depth -= 1
+				if depth == 0:
+					return i
+		return -1
+
 	def read_ident(self):
 		start = self.pos
 		self.pos += 1
@@ -349,8 +464,6 @@ class Lexer:
 				break # handle "\\" at the end
 			if c == CR:
 				n_cr_chars += 1
-			if c == LF:
-				self.inc_line_number()
 			if backslash_count % 2 == 1 and not (is_cstr or is_raw):
 				# escape `\x`
 				if c == "x":
@@ -367,6 +480,13 @@ class Lexer:
 		return lit
 
 	def next(self):
+		if self.stream != None:
+			if len(self.lookahead) > 0:
+				return self.lookahead.popleft()
+			t = next(self.stream, None)
+			if t == None:
+				return token.Token("", Kind.EOF, self.get_pos())
+			return t
 		while True:
 			cidx = self.tidx
 			self.tidx += 1
@@ -375,6 +495,109 @@ class Lexer:
 			return self.all_tokens[cidx]
 		return token.Token("", Kind.EOF, self.get_pos())
 
+	def fast_scan(self):
+		# Yields `(lit, kind, offset)` for every token; positions are
+		# computed afterwards from the line index of `self.source`. Memory-
+		# mapped sources are scanned as bytes and only the literals are
+		# decoded.
+		data = self.source.data
+		if data == None:
+			text = self.text
+			match = MASTER_PATTERN.match
+			operators = FAST_OPERATORS
+			decode = str
+		else:
+			text = data
+			match = MASTER_BYTES_PATTERN.match
+			operators = FAST_BYTES_OPERATORS
+			decode = bytes.decode
+		text_len = len(text)
+		lookup = token.lookup
+		pos = 0
+		while pos < text_len:
+			m = match(text, pos)
+			group = m.lastindex if m else SLOW_GROUP
+			if group == WS_GROUP:
+				pos = m.end()
+				continue
+			elif group == NAME_GROUP:
+				lit = decode(m.group())
+				yield lit, lookup(lit), pos
+				pos = m.end()
+				continue
+			elif group == OP_GROUP:
+				yield "", operators[m.group()], pos
+				pos = m.end()
+				continue
+			elif group == SLOW_GROUP:
+				# block comments, chars, escaped strings, `@keyword`, complex
+				# numbers and invalid characters are handled by the legacy
+				# engine, one token at a time
+				if data == None:
+					self.pos = pos - 1
+					self.is_started = True
+					t = self._next()
+					next_pos = self.pos + 1
+				elif m:
+					# block comments are skipped without decoding them
+					end = data.find(b"*/", pos + 2)
+					pos = text_len if end == -1 else end + 2
+					continue
+				else:
+					t, next_pos = self.next_from_bytes(pos)
+				yield t.lit, t.kind, t.pos.pos
+				if t.kind == Kind.EOF:
+					return
+				pos = next_pos
+				continue
+
+			end = m.end()
+			if group == NUMBER_GROUP:
+				yield decode(m.group()), Kind.Number, pos
+			elif group == STRING_GROUP:
+				yield decode(text[pos + 1:end - 1]), Kind.String, pos
+			else: # line comments
+				if group == DOC_GROUP:
+					yield decode(text[pos + 3:end]).strip(), Kind.DocComment, pos
+				end += 1 # skip the newline
+			pos = end
+		self.pos = pos
+		yield "", Kind.EOF, pos
+
+	def next_from_bytes(self, pos):
+		# Decodes the shortest slice of the mapped file that can hold the
+		# token at byte `pos` and reads it with the legacy engine; returns
+		# the token and the byte offset that follows it.
+		data = self.source.data
+		start = pos
+		if pos > 0 and data[pos - 1] in b"bcr":
+			# the string prefix is needed by `read_string` and `read_char`
+			start -= 1
+		ch = data[pos]
+		if ch == 34: # '"'
+			if data[pos - 1:pos] == b"r":
+				end = data.find(b'"', pos + 1) + 1
+			else:
+				m = STRING_END_RE.match(data, pos + 1)
+				end = m.end() if m else 0
+		elif ch == 39: # '\''
+			m = CHAR_END_RE.match(data, pos + 1)
+			end = m.end() if m else 0
+		else:
+			end = data.find(b"\n", pos) + 1
+		if end <= 0:
+			end = len(data)
+		window = source.SourceWindow(
+		    self.source, start, data[start:end].decode("utf-8")
+		)
+		sub = Lexer(window.text, True)
+		sub.file = self.file
+		sub.source = window
+		if start < pos:
+			sub.is_started = True
+		t = sub._next()
+		return t, sub.source.offset(sub.pos + 1)
+
 	def _next(self):
 		while True:
 			if self.is_started:
@@ -434,20 +657,17 @@ class Lexer:
 					start_pos = self.pos
 					if self.expect("///", start_pos):
 						start_pos += 3
-						self.ignore_line()
+						self.eat_to_end_of_line()
 						line = self.text[start_pos:self.pos].strip()
 						return token.Token(line, Kind.DocComment, pos)
-					self.ignore_line()
+					self.eat_to_end_of_line()
 					continue
 				elif nextc == "*":
 					start_pos = self.pos
 					self.pos += 1
 					while self.pos < self.text_len - 1:
 						self.pos += 1
-						if self.cur_char() == LF:
-							self.inc_line_number()
-							continue
-						elif self.expect("*/", self.pos):
+						if self.expect("*/", self.pos):
 							self.pos += 1
 							break
 					if self.pos >= self.text_len:
@@ -0,0 +1,244 @@
+# Copyright (C) 2022 The Rivet Team. All rights reserved.
+# Use of this source code is governed by an MIT license
+# that can be found in the LICENSE file.
+
+# Library packages (`--pkg-type lib`) are compiled once into a static archive
+# and an interface, `<name>.rilib`, with the symbols of the package: its
+# types with their fields, the signatures of its functions, its statics and
+# its constants. The packages that depend on a library (`extern pkg <name>;`)
+# load its interface instead of parsing and checking its sources again.
+
+import os, pickle
+from os import path
+
+from .ast import sym
+from . import ast, cache, prefs, utils
+
+LIBS_DIR = path.join(prefs.RIVET_DIR, "libs")
+
+def interface_file(dir, name):
+	return path.join(dir, f"{name}.rilib")
+
+def archive_file(dir, name):
+	return path.join(dir, f"lib{name}.a")
+
+def init_statics_name(name):
+	# initializes the statics of the library, called by the binaries
+	return f"_R{len(name)}{name}12init_staticsZ"
+
+def type_nr_name(s, kind):
+	# Name of the static with the number of a type of a library, `kind` is
+	# `idx` (see `Sym.index`) or `tag` (see `ErrTypeInfo`), defined by the
+	# binary, see `AST2RIR.type_nr`.
+	name = "".join(c if c.isalnum() else f"_{ord(c):x}_" for c in s.qualname())
+	return f"_RN{len(name)}{name}{len(kind)}{kind}Z"
+
+def target(p):
+	return (str(p.target_os), str(p.target_arch), str(p.target_bits))
+
+def _slots(obj):
+	attrs = {}
+	for cls in obj.__class__.__mro__:
+		for name in getattr(cls, "__slots__", ()):
+			if hasattr(obj, name):
+				attrs[name] = getattr(obj, name)
+	return attrs
+
+# The composite types (see `Sym.add_or_get_result` and the like) live in the
+# universe and are shared by all the packages: those used by the library are
+# pickled by value, and only added to the universe of the dependent package
+# if it doesn't have them yet.
+
+def _instance(universe, name):
+	if s := universe.find(name):
+		return s
+	return sym.Type.__new__(sym.Type) # filled by `_set_instance`
+
+def _set_instance(s, state):
+	universe, key, attrs = state
+	if universe.find(attrs["name"]) is s:
+		return
+	for name, value in attrs.items():
+		setattr(s, name, value)
+	s.index = sym.symbol_count() # see `renumber`
+	universe.add_and_return(s)
+	if key != None:
+		universe.instances.add(key, s)
+
+class _Pickler(pickle.Pickler):
+	# The symbols of the package are pickled by value, the other symbols are
+	# referenced by their path and looked up in the universe on load.
+	def __init__(self, f, comp):
+		super().__init__(f, pickle.HIGHEST_PROTOCOL)
+		self.comp = comp
+		self.keys = {}
+		for key, s in comp.universe.instances.syms.items():
+			self.keys.setdefault(id(s), key)
+
+	def persistent_id(self, obj):
+		if isinstance(obj, sym.Sym):
+			return self.sym_id(obj)
+		elif isinstance(obj, ast.SourceFile):
+			# only used to resolve the constants, see `Resolver.resolve_const`
+			return ("none", )
+		return None
+
+	def sym_id(self, s):
+		if s.is_universe:
+			return ("universe", )
+		elif isinstance(s, sym.Pkg):
+			if s is self.comp.pkg_sym:
+				return None
+			return ("pkg", s.name)
+		elif s.parent == None:
+			return None # composite type, see `reducer_override`
+		p = s.parent
+		while p != None:
+			if p is self.comp.pkg_sym:
+				return None
+			p = p.parent
+		return ("member", s.parent, s.name)
+
+	def reducer_override(self, obj):
+		if isinstance(obj, sym.Type) and obj.parent == None:
+			universe = self.comp.universe
+			return (
+			    _instance, (universe, obj.name),
+			    (universe, self.keys.get(id(obj)), _slots(obj)), None, None,
+			    _set_instance
+			)
+		return NotImplemented
+
+class _Unpickler(pickle.Unpickler):
+	def __init__(self, f, comp):
+		super().__init__(f)
+		self.comp = comp
+
+	def persistent_load(self, pid):
+		kind = pid[0]
+		if kind == "none":
+			return None
+		elif kind == "universe":
+			return self.comp.universe
+		elif kind == "pkg":
+			s = self.comp.universe.find(pid[1])
+			if not isinstance(s, sym.Pkg):
+				raise utils.CompilerError(f"package `{pid[1]}` not found")
+			return s
+		elif kind == "member":
+			if s := pid[1].find(pid[2]):
+				return s
+			raise utils.CompilerError(
+			    f"symbol `{pid[1].qualname()}::{pid[2]}` not found"
+			)
+		raise pickle.UnpicklingError(f"unknown symbol reference: {pid}")
+
+def store(comp, dir):
+	# the libraries loaded by the package are loaded first by the dependents
+	header = {
+	    "fingerprint": cache.compiler_fingerprint(),
+	    "target": target(comp.prefs),
+	    "deps": [lib.name for lib in comp.libs],
+	    "core_numbers": core_numbers(comp),
+	}
+	file = interface_file(dir, comp.pkg_sym.name)
+	tmp = f"{file}.{os.getpid()}.tmp"
+	with open(tmp, "wb") as f:
+		pickle.dump(header, f, pickle.HIGHEST_PROTOCOL)
+		_Pickler(f, comp).dump(comp.pkg_sym)
+	os.replace(tmp, file)
+
+def core_numbers(comp):
+	# the types of `core` have the same numbers in all the packages
+	return (comp.core_symbol_count, comp.core_errtype_nr)
+
+def renumber(comp, s):
+	# Two libraries built separately give the same numbers to their types,
+	# so these are numbered again when they are loaded together. The code
+	# of the libraries reads them from statics, see `AST2RIR.type_nr`.
+	s.index = sym.symbol_count()
+	if isinstance(s, sym.Type) and s.kind == sym.TypeKind.ErrType:
+		s.info.nr = comp.errtype_nr
+		comp.errtype_nr += 1
+	for child in s.syms:
+		if child.parent is s:
+			renumber(comp, child)
+
+def numbered_types(comp):
+	# the types of the loaded libraries, and the composite types they
+	# created, whose numbers are defined by the binary
+	for s in comp.universe.syms:
+		if s in comp.libs:
+			yield from _types(s)
+		elif isinstance(s, sym.Type) and s.parent == None and (
+		    s.index >= comp.core_symbol_count
+		):
+			yield s
+
+def _types(s):
+	for child in s.syms:
+		if child.parent is s:
+			if isinstance(child, sym.Type):
+				yield child
+			yield from _types(child)
+
+def find(comp, name):
+	for dir in comp.prefs.library_path:
+		if path.isfile(file := interface_file(dir, name)):
+			return file
+	return None
+
+def load(comp, name):
+	# Loads the interface of the library `name` and its dependencies into the
+	# universe, once; raises `utils.CompilerError` on failure.
+	if pkg := comp.universe.find(name):
+		if pkg in comp.libs:
+			return pkg
+		raise utils.CompilerError(
+		    f"cannot load library `{name}`, another package has the same name"
+		)
+	file = find(comp, name)
+	if file == None:
+		raise utils.CompilerError(
+		    f"library `{name}` not found (build it with `--pkg-type lib`)"
+		)
+	with open(file, "rb") as f:
+		try:
+			header = pickle.load(f)
+		except Exception:
+			raise utils.CompilerError(f"invalid library interface `{file}`")
+		if header["fingerprint"] != cache.compiler_fingerprint():
+			raise utils.CompilerError(
+			    f"library `{name}` was built by another version of the compiler, rebuild it"
+			)
+		if header["core_numbers"] != core_numbers(comp):
+			raise utils.CompilerError(
+			    f"library `{name}` was built with another `core`, rebuild it"
+			)
+		if header["target"] != target(comp.prefs):
+			raise utils.CompilerError(
+			    f"library `{name}` was built for another target, rebuild it"
+			)
+		for dep in header["deps"]:
+			load(comp, dep)
+		try:
+			pkg = _Unpickler(f, comp).load()
+		except (pickle.UnpicklingError, EOFError):
+			raise utils.CompilerError(f"invalid library interface `{file}`")
+	comp.universe.add(pkg)
+	renumber(comp, pkg)
+	comp.libs.append(pkg)
+	comp.build_deps.append(file)
+	comp.build_deps.append(archive_file(path.dirname(file), name))
+	return pkg
+
+def pub_syms(pkg):
+	# the exported functions and statics of a loaded library
+	for s in pkg.syms:
+		if isinstance(s, (sym.Fn, sym.Static)):
+			if s.vis.is_pub():
+				yield s
+		elif isinstance(s, sym.Mod) or (
+		    isinstance(s, sym.Type) and s.is_used()
+		):
+			yield from pub_syms(s)
@@ -0,0 +1,155 @@
+# Copyright (C) 2022 The Rivet Team. All rights reserved.
+# Use of this source code is governed by an MIT license
+# that can be found in the LICENSE file.
+
+import io, os, glob, contextlib
+from concurrent.futures import ProcessPoolExecutor
+
+from .ast import sym
+from .lexer import Lexer
+from .parser import Parser
+from . import ast, cache, report, source, utils
+
+# The compiler of a worker process, created from the same command line
+# arguments as the main one.
+WORKER_COMP = None
+
+def init_worker(args):
+	global WORKER_COMP
+	from . import Compiler
+	WORKER_COMP = Compiler(args)
+
+def parse_in_worker(file, is_pkg_level, pkg_is_core):
+	# Returns whether the file was in the parse cache, the diagnostics of
+	# the lexer and of the parser separately, with their counts, and the
+	# source file with the side effects of the parser, serialized by
+	# `cache.dumps`; `None` if there were errors.
+	comp = WORKER_COMP
+	comp.extern_packages = []
+	comp.pkg_attrs = None
+	comp.pkg_sym = None
+	if pkg_is_core != None:
+		comp.pkg_sym = sym.Pkg(ast.Visibility.Public, comp.prefs.pkg_name)
+		comp.pkg_sym.is_core = pkg_is_core
+	# only referenced by name in the result
+	comp.mod_sym = None if is_pkg_level else sym.Mod(
+	    ast.Visibility.Public, ""
+	)
+	report.ERRORS = 0
+	report.WARNS = 0
+
+	if comp.parse_cache:
+		key = comp.parse_cache.key(file, is_pkg_level)
+		if data := comp.parse_cache.load_data(key):
+			return True, "", 0, 0, "", 0, 0, data
+
+	p = Parser(comp)
+	p.is_pkg_level = is_pkg_level
+	with contextlib.redirect_stderr(io.StringIO()) as out:
+		# the tokens are not streamed, to keep the lexer diagnostics apart
+		p.lexer = Lexer.from_file(file, comp.prefs.legacy_lexer)
+		lex_out = out.getvalue()
+		lex_errors, lex_warns = report.ERRORS, report.WARNS
+		if report.ERRORS == 0:
+			source_file = p.parse_lexed_file(file)
+
+	data = None
+	if report.ERRORS == 0:
+		data = cache.dumps(
+		    comp, (source_file, comp.extern_packages, comp.pkg_attrs)
+		)
+		if comp.parse_cache and report.WARNS == 0:
+			comp.parse_cache.store_data(key, data)
+	# the worker parses many files, the parent process has its own buffers
+	source.release(file)
+	return (
+	    False, lex_out, lex_errors, lex_warns,
+	    out.getvalue()[len(lex_out):], report.ERRORS - lex_errors,
+	    report.WARNS - lex_warns, data
+	)
+
+class ParsePool:
+	# Parses files in worker processes (`-j N`). Files are submitted ahead
+	# of time, including the files of the `mod foo;` declarations found, and
+	# the parser takes the results in the same order in which it would
+	# parse them, so the diagnostics are reported in the same order too.
+	def __init__(self, comp):
+		self.comp = comp
+		self.executor = ProcessPoolExecutor(
+		    comp.prefs.jobs, initializer = init_worker,
+		    initargs = (comp.args, )
+		)
+		self.jobs = {}
+
+	def pkg_is_core(self):
+		if self.comp.pkg_sym == None:
+			return None
+		return self.comp.pkg_sym.is_core
+
+	def submit(self, files, is_pkg_level):
+		pkg_is_core = self.pkg_is_core()
+		for file in files:
+			if (file, is_pkg_level) not in self.jobs:
+				self.jobs[(file, is_pkg_level)] = (
+				    pkg_is_core,
+				    self.executor.submit(
+				        parse_in_worker, file, is_pkg_level, pkg_is_core
+				    )
+				)
+
+	def submit_modules(self, source_files):
+		# Submits the files of the modules declared in `source_files`; some
+		# of them may never be loaded, because of `#[if]` attributes.
+		for sf in source_files:
+			self.submit_modules_in(sf.file, sf.decls)
+
+	def submit_modules_in(self, file, decls):
+		for decl in decls:
+			if isinstance(decl, ast.ModDecl):
+				if decl.is_unloaded:
+					path = os.path.join(os.path.dirname(file), decl.name)
+					if os.path.isdir(path):
+						self.submit(
+						    self.comp.prefs.filter_files_list(
+						        glob.glob(os.path.join(path, "*.ri"))
+						    ), False
+						)
+				else:
+					self.submit_modules_in(file, decl.decls)
+
+	def take(self, file, is_pkg_level):
+		# Returns the parsed file, reporting its diagnostics, or `None` if it
+		# wasn't submitted with the current package settings.
+		job = self.jobs.pop((file, is_pkg_level), None)
+		if job == None:
+			return None
+		pkg_is_core, future = job
+		if pkg_is_core != self.pkg_is_core():
+			future.cancel()
+			return None
+		res = future.result()
+		from_cache, lex_out, lex_errors, lex_warns, out, errors, warns, data = res
+		if self.comp.parse_cache:
+			if from_cache:
+				self.comp.parse_cache.hits += 1
+			else:
+				self.comp.parse_cache.misses += 1
+		if report.ERRORS > 0:
+			# like `Parser.parse_file`, only the file is tokenized
+			utils.eprint(lex_out, end = "")
+			report.ERRORS += lex_errors
+			report.WARNS += lex_warns
+			return ast.SourceFile(file, [], None)
+		utils.eprint(lex_out + out, end = "")
+		report.ERRORS += lex_errors + errors
+		report.WARNS += lex_warns + warns
+		if data == None:
+			return ast.SourceFile(file, [], None)
+		source_file, extern_packages, pkg_attrs = cache.loads(self.comp, data)
+		self.comp.extern_packages.extend(extern_packages)
+		if pkg_attrs != None:
+			self.comp.pkg_attrs = pkg_attrs
+		return source_file
+
+	def shutdown(self):
+		self.executor.shutdown(cancel_futures = True)
@@ -7,6 +7,17 @@ from .lexer import Lexer
 from .ast import sym, type
 from . import report, token, ast, utils
 
+# Binding powers of the binary operators, from the lowest to the highest.
+BINARY_OPS_PREC = {
+    Kind.KeyOr: 1, Kind.KeyAnd: 2, Kind.Eq: 3, Kind.Ne: 3, Kind.Gt: 4,
+    Kind.Lt: 4, Kind.Ge: 4, Kind.Le: 4, Kind.KeyOrElse: 4, Kind.KeyIs: 4,
+    Kind.KeyNotIs: 4, Kind.Lshift: 5, Kind.Rshift: 5, Kind.Amp: 5,
+    Kind.Pipe: 5, Kind.Xor: 5, Kind.Plus: 6, Kind.Minus: 6, Kind.Mult: 7,
+    Kind.Div: 7, Kind.Mod: 7
+}
+SHIFT_PREC = 5
+MAX_PREC = 7
+
 class Parser:
 	def __init__(self, comp):
 		self.comp = comp
@@ -27,24 +38,77 @@ class Parser:
 		self.inside_trait = False
 		self.inside_block = False
 
-	def parse_pkg(self):
+	def parse_pkg(self, inputs):
 		self.is_pkg_level = True
-		return self.parse_module_files()
+		source_files = self.parse_module_files(inputs)
+		if pool := self.comp.parse_pool:
+			pool.submit_modules(source_files)
+		return source_files
 
-	def parse_module_files(self):
+	def parse_module_files(self, inputs):
+		if pool := self.comp.parse_pool:
+			pool.submit(inputs, self.is_pkg_level)
 		source_files = []
-		for input in self.comp.prefs.inputs:
+		for input in inputs:
 			source_files.append(self.parse_file(input))
 		return source_files
 
 	def parse_extern_module_files(self, files):
+		if pool := self.comp.parse_pool:
+			pool.submit(files, self.is_pkg_level)
+		source_files = []
 		for file in files:
-			self.comp.source_files.append(self.parse_file(file))
+			source_files.append(self.parse_file(file))
+		self.comp.source_files.extend(source_files)
+		if pool:
+			pool.submit_modules(source_files)
 
 	def parse_file(self, file):
-		self.lexer = Lexer.from_file(file)
+		source_file = self.load_file(file)
+		source_file.decls = self.comp.prune_decls(source_file.decls)
+		return source_file
+
+	def load_file(self, file):
+		if pool := self.comp.parse_pool:
+			if source_file := pool.take(file, self.is_pkg_level):
+				return source_file
+		cache = self.comp.parse_cache
+		if cache == None:
+			return self.parse_file_without_cache(file)
+		key = cache.key(file, self.is_pkg_level)
+		if res := cache.load(key):
+			if report.ERRORS > 0:
+				return ast.SourceFile(file, [], None)
+			source_file, extern_packages, pkg_attrs = res
+			self.comp.extern_packages.extend(extern_packages)
+			if pkg_attrs != None:
+				self.comp.pkg_attrs = pkg_attrs
+			return source_file
+		warns = report.WARNS
+		extern_packages_len = len(self.comp.extern_packages)
+		old_pkg_attrs = self.comp.pkg_attrs
+		source_file = self.parse_file_without_cache(file)
+		# with `--lazy-bodies`, storing the file would parse all its bodies
+		if report.ERRORS == 0 and report.WARNS == warns and (
+		    not self.comp.prefs.lazy_bodies
+		):
+			cache.store(
+			    key, source_file,
+			    self.comp.extern_packages[extern_packages_len:],
+			    None if self.comp.pkg_attrs is old_pkg_attrs else
+			    self.comp.pkg_attrs
+			)
+		return source_file
+
+	def parse_file_without_cache(self, file):
+		self.lexer = Lexer.from_file(
+		    file, self.comp.prefs.legacy_lexer, self.comp.prefs.stream_tokens
+		)
 		if report.ERRORS > 0:
 			return ast.SourceFile(file, [], None)
+		return self.parse_lexed_file(file)
+
+	def parse_lexed_file(self, file):
 		self.advance(2)
 		return ast.SourceFile(file, self.parse_decls(), self.comp.mod_sym)
 
@@ -571,6 +635,7 @@ class Parser:
 			ret_typ = type.Result(ret_typ)
 
 		stmts = []
+		lazy_body = None
 		has_body = True
 		if self.inside_trait and self.tok.kind == Kind.Semicolon:
 			self.next()
@@ -579,16 +644,34 @@ class Parser:
 			has_body = False
 		else:
 			self.expect(Kind.Lbrace)
-			while not self.accept(Kind.Rbrace):
-				stmts.append(self.parse_stmt())
+			if self.comp.prefs.lazy_bodies:
+				lazy_body = self.skip_fn_body()
+			if lazy_body == None:
+				while not self.accept(Kind.Rbrace):
+					stmts.append(self.parse_stmt())
 		self.close_scope()
 		return ast.FnDecl(
 		    doc_comment, attrs, vis, self.inside_extern, is_unsafe, name, pos,
 		    args, ret_typ, stmts, sc, has_body, is_method, self_is_ref,
 		    self_is_mut, has_named_args, self.is_pkg_level and name == "main",
-		    is_variadic, abi
+		    is_variadic, abi, lazy_body
 		)
 
+	def skip_fn_body(self):
+		# Moves past the body of a function, whose `{` was just consumed,
+		# and returns a `LazyBody` to parse it later; `None` if the body
+		# must be parsed now.
+		if self.lexer.stream != None or self.prev_tok.kind != Kind.Lbrace:
+			return None
+		start = self.lexer.tidx - 2 # `self.tok`
+		end = self.lexer.matching_rbrace(start)
+		if end == -1:
+			return None # unclosed, the errors are reported now
+		body = LazyBody(self, start)
+		self.lexer.tidx = end
+		self.advance(3)
+		return body
+
 	# ---- statements --------------------------
 	def parse_stmt(self):
 		if self.accept(Kind.KeyLet):
@@ -686,97 +769,37 @@ class Parser:
 
 	# ---- expressions -------------------------
 	def parse_expr(self):
-		return self.parse_or_expr()
-
-	def parse_or_expr(self):
-		left = self.parse_and_expr()
-		while self.accept(Kind.KeyOr):
-			right = self.parse_and_expr()
-			left = ast.BinaryExpr(left, Kind.KeyOr, right, left.pos)
-		return left
-
-	def parse_and_expr(self):
-		left = self.parse_equality_expr()
-		while self.accept(Kind.KeyAnd):
-			right = self.parse_equality_expr()
-			left = ast.BinaryExpr(left, Kind.KeyAnd, right, left.pos)
-		return left
+		return self.parse_binary_expr(1)
 
-	def parse_equality_expr(self):
-		left = self.parse_relational_expr()
+	def parse_binary_expr(self, min_prec):
+		# Precedence climbing over `BINARY_OPS_PREC`, all the binary
+		# operators are left-associative.
+		left = self.parse_unary_expr()
+		max_prec = MAX_PREC
 		while True:
-			if self.tok.kind in [Kind.Eq, Kind.Ne]:
-				op = self.tok.kind
-				self.next()
-				right = self.parse_relational_expr()
-				left = ast.BinaryExpr(left, op, right, left.pos)
-			else:
+			op = self.tok.kind
+			is_shift = False
+			if op in (Kind.Lt, Kind.Gt) and max_prec >= SHIFT_PREC:
+				# `<<` and `>>` are two adjacent tokens
+				if self.tok.pos.pos + 1 == self.peek_tok.pos.pos:
+					is_shift = True
+					op = Kind.Lshift if op == Kind.Lt else Kind.Rshift
+			prec = BINARY_OPS_PREC.get(op, 0)
+			if prec < min_prec or prec > max_prec:
+				# a right operand already contains all the operators that
+				# bind tighter than its own, except after `is Type`, where
+				# those operators end the expression
 				break
-		return left
-
-	def parse_relational_expr(self):
-		left = self.parse_shift_expr()
-		while True:
-			if self.tok.kind in [
-			    Kind.Gt, Kind.Lt, Kind.Ge, Kind.Le, Kind.KeyOrElse
-			]:
-				op = self.tok.kind
-				self.next()
-				right = self.parse_shift_expr()
-				left = ast.BinaryExpr(left, op, right, left.pos)
-			elif self.tok.kind in [Kind.KeyIs, Kind.KeyNotIs]:
-				op = self.tok.kind
+			if is_shift:
 				self.next()
+			self.next()
+			if op in (Kind.KeyIs, Kind.KeyNotIs):
 				pos = self.tok.pos
 				right = ast.TypeNode(self.parse_type(), pos)
-				left = ast.BinaryExpr(left, op, right, left.pos)
-			else:
-				break
-		return left
-
-	def parse_shift_expr(self):
-		left = self.parse_additive_expr()
-		while True:
-			if self.tok.kind in [Kind.Lt, Kind.Gt]:
-				op = Kind.Lshift if self.tok.kind == Kind.Lt else Kind.Rshift
-				if self.tok.pos.pos + 1 == self.peek_tok.pos.pos:
-					self.next()
-					self.next()
-					right = self.parse_additive_expr()
-					left = ast.BinaryExpr(left, op, right, left.pos)
-				else:
-					break
-			elif self.tok.kind in [Kind.Amp, Kind.Pipe, Kind.Xor]:
-				op = self.tok.kind
-				self.next()
-				right = self.parse_additive_expr()
-				left = ast.BinaryExpr(left, op, right, left.pos)
-			else:
-				break
-		return left
-
-	def parse_additive_expr(self):
-		left = self.parse_multiplicative_expr()
-		while True:
-			if self.tok.kind in [Kind.Plus, Kind.Minus]:
-				op = self.tok.kind
-				self.next()
-				right = self.parse_multiplicative_expr()
-				left = ast.BinaryExpr(left, op, right, left.pos)
-			else:
-				break
-		return left
-
-	def parse_multiplicative_expr(self):
-		left = self.parse_unary_expr()
-		while True:
-			if self.tok.kind in [Kind.Mult, Kind.Div, Kind.Mod]:
-				op = self.tok.kind
-				self.next()
-				right = self.parse_unary_expr()
-				left = ast.BinaryExpr(left, op, right, left.pos)
 			else:
-				break
+				right = self.parse_binary_expr(prec + 1)
+			left = ast.BinaryExpr(left, op, right, left.pos)
+			max_prec = prec
 		return left
 
 	def parse_unary_expr(self):
@@ -1345,8 +1368,7 @@ class Parser:
 			return type.Type.unresolved(
 			    ast.SelfTyExpr(self.scope, self.prev_tok.pos)
 			)
-		elif (self.comp.prefs.pkg_name == "core"
-		      or self.comp.pkg_sym.is_core) and self.accept(Kind.KeyNone):
+		elif self.comp.in_core_pkg() and self.accept(Kind.KeyNone):
 			return self.comp.none_t
 		elif self.tok.kind in (Kind.KeyPkg, Kind.KeySuper, Kind.Name):
 			# normal type
@@ -1405,20 +1427,11 @@ class Parser:
 					return self.comp.float64_t
 				elif lit == "str":
 					return self.comp.str_t
-				elif lit == "untyped_int" and (
-				    self.comp.prefs.pkg_name == "core"
-				    or self.comp.pkg_sym.is_core
-				):
+				elif lit == "untyped_int" and self.comp.in_core_pkg():
 					return self.comp.untyped_int_t
-				elif lit == "untyped_float" and (
-				    self.comp.prefs.pkg_name == "core"
-				    or self.comp.pkg_sym.is_core
-				):
+				elif lit == "untyped_float" and self.comp.in_core_pkg():
 					return self.comp.untyped_float_t
-				elif lit == "error" and (
-				    self.comp.prefs.pkg_name == "core"
-				    or self.comp.pkg_sym.is_core
-				):
+				elif lit == "error" and self.comp.in_core_pkg():
 					return self.comp.error_t
 				else:
 					return type.Type.unresolved(expr)
@@ -1429,3 +1442,29 @@ class Parser:
 			report.error(f"expected type, found {self.tok}", pos)
 			self.next()
 		return type.Type.unresolved(self.empty_expr())
+
+class LazyBody:
+	# The tokens of a function body that is parsed on first use, with the
+	# state of the parser at its `{`; see `ast.FnDecl.stmts`.
+	def __init__(self, p, start):
+		self.comp = p.comp
+		self.lexer = p.lexer
+		self.start = start
+		self.scope = p.scope
+		self.is_pkg_level = p.is_pkg_level
+		self.inside_extern = p.inside_extern
+		self.inside_trait = p.inside_trait
+
+	def parse(self):
+		p = Parser(self.comp)
+		p.lexer = self.lexer
+		p.scope = self.scope
+		p.is_pkg_level = self.is_pkg_level
+		p.inside_extern = self.inside_extern
+		p.inside_trait = self.inside_trait
+		self.lexer.tidx = self.start - 1 # the `{`
+		p.advance(3)
+		stmts = []
+		while not p.accept(Kind.Rbrace):
+			stmts.append(p.parse_stmt())
+		return stmts
@@ -7,10 +7,11 @@ import os, sys, glob, platform
 from ctypes import sizeof, c_voidp
 from enum import IntEnum as Enum, auto as auto_enum
 
-from . import report
+from . import report, source
 from .utils import error, eprint, execute, is_valid_name, full_version, HELP
 
 RIVET_DIR = path.join(path.expanduser("~"), ".rivet-lang")
+CORE_SRC_DIR = path.join("lib", "core", "src")
 
 def option(args, param):
 	for i, arg in enumerate(args):
@@ -153,6 +154,7 @@ class BuildMode(Enum):
 
 class Prefs:
 	def __init__(self, args: [str]):
+		self.core_inputs = []
 		self.inputs = []
 
 		# target info
@@ -181,7 +183,18 @@ class Prefs:
 		self.check = False
 		self.emit_rir = False
 		self.keep_c = False
+		self.split_c = False
 		self.is_verbose = False
+		self.legacy_lexer = False
+		self.stream_tokens = False
+		self.lazy_bodies = False
+		self.stats = False
+		self.parse_cache = True
+		self.core_snapshot = True
+		self.build_cache = True
+		self.object_cache = True
+		self.evict_object_cache = None # size in bytes
+		self.jobs = 1
 
 		if len(args) == 0:
 			eprint(HELP)
@@ -230,7 +243,7 @@ class Prefs:
 			elif arg == "--pkg-type":
 				if typ := option(current_args, arg):
 					if pkg_typ := PkgType.from_string(typ):
-						self.pkg_typ = pkg_typ
+						self.pkg_type = pkg_typ
 					else:
 						error(f"invalid package type: `{typ}`")
 				else:
@@ -315,6 +328,48 @@ class Prefs:
 				self.emit_rir = True
 			elif arg == "--keep-c":
 				self.keep_c = True
+			elif arg == "--split-c":
+				self.split_c = True
+			elif arg == "--legacy-lexer":
+				self.legacy_lexer = True
+			elif arg == "--stream-tokens":
+				self.stream_tokens = True
+			elif arg == "--lazy-bodies":
+				self.lazy_bodies = True
+			elif arg == "-j":
+				if jobs := option(current_args, arg):
+					if not jobs.isdigit() or int(jobs) == 0:
+						error(f"invalid number of jobs: `{jobs}`")
+					self.jobs = int(jobs)
+				else:
+					error("`-j` requires a number as argument")
+				i += 1
+			elif arg == "--stats":
+				self.stats = True
+			elif arg == "--no-parse-cache":
+				self.parse_cache = False
+			elif arg == "--no-core-snapshot":
+				self.core_snapshot = False
+			elif arg == "--no-build-cache":
+				self.build_cache = False
+			elif arg == "--no-object-cache":
+				self.object_cache = False
+			elif arg == "--evict-object-cache":
+				if size := option(current_args, arg):
+					if not size.isdigit():
+						error(f"invalid size for `{arg}`: `{size}`")
+					self.evict_object_cache = int(size)
+				else:
+					error("`--evict-object-cache` requires a size as argument")
+				i += 1
+			elif arg == "--mmap-threshold":
+				if size := option(current_args, arg):
+					if not size.isdigit():
+						error(f"invalid size for `{arg}`: `{size}`")
+					source.MMAP_THRESHOLD = int(size)
+				else:
+					error("`--mmap-threshold` requires a size as argument")
+				i += 1
 			elif arg in ("-v", "--verbose"):
 				self.is_verbose = True
 			elif path.isdir(arg):
@@ -327,9 +382,15 @@ class Prefs:
 				error(f"unknown option: `{arg}`")
 			i += 1
 
+		if self.check_syntax:
+			# the syntax of the bodies is what is being checked
+			self.lazy_bodies = False
+
 		self.filter_files()
-		if len(self.inputs) == 0:
+		if len(self.core_inputs) + len(self.inputs) == 0:
 			error("no input received")
+		if self.pkg_type == PkgType.Lib and self.pkg_name == "core":
+			error("`--pkg-type lib` requires a package name, see `--pkg-name`")
 
 		self.build_rivet_dir()
 
@@ -342,9 +403,10 @@ class Prefs:
 			self.pkg_output += ".exe"
 
 	def load_core_library(self):
-		self.inputs = glob.glob("lib/core/src/*.ri")
+		self.core_inputs = glob.glob(path.join(CORE_SRC_DIR, "*.ri"))
 
 	def filter_files(self):
+		self.core_inputs = self.filter_files_list(self.core_inputs)
 		self.inputs = self.filter_files_list(self.inputs)
 
 	def filter_files_list(self, inputs):
@@ -4,17 +4,12 @@
 
 import textwrap
 
-from . import utils, colors
+from . import utils, colors, source
 
 WARNS_ARE_ERRORS = False
 ERRORS = 0
 WARNS = 0
 
-# This dictionary saves the lines of the files that have
-# had reports to avoid having to open them over and over
-# again.
-FILE_LINES = {}
-
 LAST_LINE_NR_LEN = -1
 SEP = colors.bold(colors.blue("|"))
 MARK = colors.bold("^")
@@ -23,21 +18,10 @@ FOOT = colors.bold(colors.blue("="))
 def color(kind, msg):
 	return colors.red(msg) if kind == "error:" else colors.yellow(msg)
 
-def _readline(file, line_nr):
-	global FILE_LINES
-	if file in FILE_LINES:
-		lines = FILE_LINES[file]
-		line_nr = min(line_nr, len(lines) - 1)
-		return lines[line_nr]
-
-	lines = open(file).read().splitlines()
-	FILE_LINES[file] = lines
-	line_nr = min(line_nr, len(lines) - 1)
-	return lines[line_nr]
-
 def readline(pos, kind):
 	global LAST_LINE_NR_LEN
-	line = _readline(pos.file, pos.line)
+	# the buffer is shared with the lexer, so the file is not read again
+	line = source.get(pos.file).line(pos.line)
 	line_str = f"  {colors.bold(colors.blue(pos.line + 1))}"
 	LAST_LINE_NR_LEN = len(f"  {pos.line+1}")
 	# TODO(StunxFS): it would be better if the marker was the width of
@@ -18,14 +18,28 @@ class Resolver:
 
 		self.self_sym = None
 
+		# these expressions have nothing to resolve
+		self.expr_resolvers = ast.dispatch_table(
+		    self, "resolve", ast.EXPRS, (
+		        ast.EmptyExpr, ast.PkgExpr, ast.SuperExpr, ast.NoneLiteral,
+		        ast.BoolLiteral, ast.CharLiteral, ast.IntegerLiteral,
+		        ast.FloatLiteral, ast.StringLiteral, ast.EnumVariantExpr,
+		        ast.BranchExpr
+		    )
+		)
+
 	def resolve_files(self, source_files):
 		register.Register(self.comp).visit_source_files(source_files)
 		if report.ERRORS > 0:
 			return
 
+		# includes the public symbols registered since the last call
+		self.core_prelude = []
 		self.cur_sym = self.comp.pkg_sym
 		for sf in source_files:
 			self.resolve_file(sf)
+		if report.ERRORS == 0:
+			self.intern_sym_types(self.comp.universe)
 
 	def resolve_file(self, sf):
 		self.sf = sf
@@ -37,158 +51,167 @@ class Resolver:
 		if sf.mod_sym:
 			self.cur_sym = old_cur_sym
 
+	def intern_sym_types(self, s):
+		# the checker takes most of its types from the symbols, see
+		# `type.TypeTable`
+		intern = self.comp.type_table.intern_resolved
+		if isinstance(s, (sym.Const, sym.Static)):
+			s.typ = intern(s.typ)
+		elif isinstance(s, sym.Fn):
+			for arg in s.args:
+				arg.typ = intern(arg.typ)
+			s.ret_typ = intern(s.ret_typ)
+			if s.self_typ:
+				s.self_typ = intern(s.self_typ)
+		elif isinstance(s, sym.Type):
+			for f in s.fields:
+				f.typ = intern(f.typ)
+			if isinstance(s.info, sym.AliasInfo):
+				s.info.parent = intern(s.info.parent)
+			elif isinstance(s.info, (sym.ArrayInfo, sym.SliceInfo)):
+				s.info.elem_typ = intern(s.info.elem_typ)
+			elif isinstance(s.info, sym.TupleInfo):
+				s.info.types = [intern(t) for t in s.info.types]
+			elif isinstance(s.info, sym.UnionInfo):
+				s.info.variants = [intern(v) for v in s.info.variants]
+			elif isinstance(s.info, sym.EnumInfo):
+				s.info.underlying_typ = intern(s.info.underlying_typ)
+		for ss in s.syms:
+			self.intern_sym_types(ss)
+
 	def resolve_decls(self, decls):
 		for decl in decls:
 			self.resolve_decl(decl)
 
 	def resolve_decl(self, decl):
-		should_check = True
-		if not decl.__class__ in (
-		    ast.TestDecl, ast.ExternPkg, ast.DestructorDecl
-		):
-			should_check = decl.attrs.if_check
 		if isinstance(decl, ast.UsingDecl):
-			if should_check:
-				if isinstance(decl.path, (ast.Ident, ast.PkgExpr)):
-					name = decl.path.name if isinstance(
-					    decl.path, ast.Ident
-					) else self.comp.prefs.pkg_name
-					if len(decl.symbols) == 0:
-						if isinstance(decl.path, ast.PkgExpr):
-							report.error(
-							    "invalid `using` declaration", decl.path.pos
-							)
-						elif _ := self.comp.pkg_sym.find(name):
-							report.error(
-							    f"use of undeclared external package `{name}`",
-							    decl.path.pos
-							)
-							report.help(f"use `pkg::{name}` instead")
-						else:
-							report.error(
-							    "expected symbol list after name", decl.path.pos
-							)
-					elif sym_info := self.comp.universe.find(name):
-						self.resolve_selective_using_symbols(
-						    decl.symbols, sym_info
+			if isinstance(decl.path, (ast.Ident, ast.PkgExpr)):
+				name = decl.path.name if isinstance(
+				    decl.path, ast.Ident
+				) else self.comp.prefs.pkg_name
+				if len(decl.symbols) == 0:
+					if isinstance(decl.path, ast.PkgExpr):
+						report.error(
+						    "invalid `using` declaration", decl.path.pos
 						)
-					else:
+					elif _ := self.comp.pkg_sym.find(name):
 						report.error(
 						    f"use of undeclared external package `{name}`",
 						    decl.path.pos
 						)
-				elif isinstance(decl.path, ast.PathExpr):
-					self.resolve_expr(decl.path)
-					if not decl.path.has_error:
-						if len(decl.symbols) == 0:
-							self.sf.imported_symbols[decl.alias
-							                         ] = decl.path.field_info
-						else:
-							self.resolve_selective_using_symbols(
-							    decl.symbols, decl.path.field_info
-							)
+						report.help(f"use `pkg::{name}` instead")
+					else:
+						report.error(
+						    "expected symbol list after name", decl.path.pos
+						)
+				elif sym_info := self.comp.universe.find(name):
+					self.resolve_selective_using_symbols(
+					    decl.symbols, sym_info
+					)
+				else:
+					report.error(
+					    f"use of undeclared external package `{name}`",
+					    decl.path.pos
+					)
+			elif isinstance(decl.path, ast.PathExpr):
+				self.resolve_expr(decl.path)
+				if not decl.path.has_error:
+					if len(decl.symbols) == 0:
+						self.sf.imported_symbols[decl.alias
+						                         ] = decl.path.field_info
+					else:
+						self.resolve_selective_using_symbols(
+						    decl.symbols, decl.path.field_info
+						)
 		if isinstance(decl, ast.ExternDecl):
-			if should_check:
-				self.resolve_decls(decl.protos)
+			self.resolve_decls(decl.protos)
 		elif isinstance(decl, ast.ConstDecl):
-			if should_check:
-				self.resolve_type(decl.typ)
-				self.resolve_expr(decl.expr)
+			self.resolve_const(decl.sym)
 		elif isinstance(decl, ast.StaticDecl):
-			if should_check:
-				self.resolve_type(decl.typ)
-				self.resolve_expr(decl.expr)
+			self.resolve_type(decl.typ)
+			self.resolve_expr(decl.expr)
 		elif isinstance(decl, ast.ModDecl):
-			if should_check:
-				old_sym = self.cur_sym
-				self.cur_sym = decl.sym
-				self.resolve_decls(decl.decls)
-				self.cur_sym = old_sym
+			old_sym = self.cur_sym
+			self.cur_sym = decl.sym
+			self.resolve_decls(decl.decls)
+			self.cur_sym = old_sym
 		elif isinstance(decl, ast.TypeDecl):
-			if should_check:
-				self.resolve_type(decl.parent)
+			self.resolve_type(decl.parent)
 		elif isinstance(decl, ast.TraitDecl):
-			if should_check:
-				self.resolve_decls(decl.decls)
+			self.resolve_decls(decl.decls)
 		elif isinstance(decl, ast.UnionDecl):
-			if should_check:
-				self.self_sym = decl.sym
-				for v in decl.variants:
-					self.resolve_type(v)
-				self.resolve_decls(decl.decls)
-				self.self_sym = None
+			self.self_sym = decl.sym
+			for v in decl.variants:
+				self.resolve_type(v)
+			self.resolve_decls(decl.decls)
+			self.self_sym = None
 		elif isinstance(decl, ast.EnumDecl):
-			if should_check:
-				self.self_sym = decl.sym
-				self.resolve_decls(decl.decls)
-				self.self_sym = None
+			self.self_sym = decl.sym
+			self.resolve_decls(decl.decls)
+			self.self_sym = None
 		elif isinstance(decl, ast.StructDecl):
-			if should_check:
-				self.self_sym = decl.sym
-				self.resolve_decls(decl.decls)
-				self.self_sym = None
+			self.self_sym = decl.sym
+			self.resolve_decls(decl.decls)
+			self.self_sym = None
 		elif isinstance(decl, ast.StructField):
-			if should_check:
-				self.resolve_type(decl.typ)
-				if decl.has_def_expr:
-					self.resolve_expr(decl.def_expr)
+			self.resolve_type(decl.typ)
+			if decl.has_def_expr:
+				self.resolve_expr(decl.def_expr)
 		elif isinstance(decl, ast.ExtendDecl):
-			if should_check:
-				if self.resolve_type(decl.typ):
-					self.self_sym = decl.typ.get_sym()
-					if decl.is_for_trait:
-						if self.resolve_type(decl.for_trait):
-							decl.for_trait.get_sym().info.implements.append(
-							    self.self_sym
-							)
-					if isinstance(
-					    decl.typ, (type.Array, type.Slice, type.Tuple)
-					):
-						# TODO(StunxFS): better error messages
-						s = decl.typ.get_sym()
-						for d in decl.decls:
-							if isinstance(d, ast.FnDecl):
-								if d.is_method:
-									self_typ = type.Type(self.self_sym)
-									if d.self_is_ref:
-										self_typ = type.Ref(
-										    self_typ, d.self_is_mut
-										)
-									d.self_typ = self_typ
-									if not d.scope.exists("self"):
-										d.scope.add(
-										    sym.Object(
-										        False, "self", self_typ, True
-										    )
-										)
-									try:
-										d.sym = sym.Fn(
-										    sym.ABI.Rivet, d.vis, d.is_extern,
-										    d.is_unsafe, d.is_method, False,
-										    d.name, d.args, d.ret_typ,
-										    d.has_named_args, d.has_body,
-										    d.name_pos, d.self_is_mut,
-										    d.self_is_ref
-										)
-										d.sym.self_typ = self_typ
-										s.add(d.sym)
-									except utils.CompilerError as e:
-										report.error(e.args[0], d.name_pos)
-								else:
-									report.error("expected method", d.name_pos)
+			if self.resolve_type(decl.typ):
+				self.self_sym = decl.typ.get_sym()
+				if decl.is_for_trait:
+					if self.resolve_type(decl.for_trait):
+						decl.for_trait.get_sym().info.implements.append(
+						    self.self_sym
+						)
+				if isinstance(
+				    decl.typ, (type.Array, type.Slice, type.Tuple)
+				):
+					# TODO(StunxFS): better error messages
+					s = decl.typ.get_sym()
+					for d in decl.decls:
+						if isinstance(d, ast.FnDecl):
+							if d.is_method:
+								self_typ = type.Type(self.self_sym)
+								if d.self_is_ref:
+									self_typ = type.Ref(
+									    self_typ, d.self_is_mut
+									)
+								d.self_typ = self_typ
+								if not d.scope.exists("self"):
+									d.scope.add(
+									    sym.Object(
+									        False, "self", self_typ, True
+									    )
+									)
+								try:
+									d.sym = sym.Fn(
+									    sym.ABI.Rivet, d.vis, d.is_extern,
+									    d.is_unsafe, d.is_method, False,
+									    d.name, d.args, d.ret_typ,
+									    d.has_named_args, d.has_body,
+									    d.name_pos, d.self_is_mut,
+									    d.self_is_ref
+									)
+									d.sym.self_typ = self_typ
+									s.add(d.sym)
+								except utils.CompilerError as e:
+									report.error(e.args[0], d.name_pos)
 							else:
-								report.error("expected method", d.pos)
-					self.resolve_decls(decl.decls)
-					self.self_sym = None
+								report.error("expected method", d.name_pos)
+						else:
+							report.error("expected method", d.pos)
+				self.resolve_decls(decl.decls)
+				self.self_sym = None
 		elif isinstance(decl, ast.TestDecl):
 			self.resolve_stmts(decl.stmts)
 		elif isinstance(decl, ast.FnDecl):
-			if should_check:
-				for arg in decl.args:
-					self.resolve_type(arg.typ)
-					if arg.has_def_expr: self.resolve_expr(arg.def_expr)
-				self.resolve_type(decl.ret_typ)
-				self.resolve_stmts(decl.stmts)
+			for arg in decl.args:
+				self.resolve_type(arg.typ)
+				if arg.has_def_expr: self.resolve_expr(arg.def_expr)
+			self.resolve_type(decl.ret_typ)
+			self.resolve_stmts(decl.stmts)
 		elif isinstance(decl, ast.DestructorDecl):
 			self.resolve_stmts(decl.stmts)
 
@@ -214,88 +237,108 @@ class Resolver:
 			self.resolve_stmt(stmt.stmt)
 
 	def resolve_expr(self, expr):
-		if isinstance(expr, ast.ParExpr):
-			self.resolve_expr(expr.expr)
-		elif isinstance(expr, ast.Ident):
-			self.resolve_ident(expr)
-		elif isinstance(expr, ast.SelfExpr):
-			if self_ := expr.scope.lookup("self"):
-				expr.typ = self_.typ
-			else:
-				report.error("cannot find `self` in this scope", expr.pos)
-		elif isinstance(expr, ast.SelfTyExpr):
-			if self.self_sym != None:
-				expr.typ = type.Type(self.self_sym)
-			else:
-				report.error("cannot resolve type for `Self`", expr.pos)
-		elif isinstance(expr, ast.TypeNode):
-			self.resolve_type(expr.typ)
-		elif isinstance(expr, ast.TupleLiteral):
-			for e in expr.exprs:
-				self.resolve_expr(e)
-		elif isinstance(expr, ast.ArrayLiteral):
-			for e in expr.elems:
-				self.resolve_expr(e)
-		elif isinstance(expr, ast.StructLiteral):
-			self.resolve_expr(expr.expr)
-			for f in expr.fields:
-				self.resolve_expr(f.expr)
-		elif isinstance(expr, ast.UnaryExpr):
-			self.resolve_expr(expr.right)
-		elif isinstance(expr, ast.BinaryExpr):
-			self.inside_is_comparation = expr.op in (Kind.KeyNotIs, Kind.KeyIs)
-			self.resolve_expr(expr.left)
-			self.resolve_expr(expr.right)
-		elif isinstance(expr, ast.PostfixExpr):
-			self.resolve_expr(expr.left)
-		elif isinstance(expr, ast.CastExpr):
-			self.resolve_expr(expr.expr)
-			self.resolve_type(expr.typ)
-		elif isinstance(expr, ast.IndexExpr):
-			self.resolve_expr(expr.left)
-			self.resolve_expr(expr.index)
-		elif isinstance(expr, ast.RangeExpr):
-			if expr.has_start: self.resolve_expr(expr.start)
-			if expr.has_end: self.resolve_expr(expr.end)
-		elif isinstance(expr, ast.SelectorExpr):
-			self.resolve_expr(expr.left)
-		elif isinstance(expr, ast.PathExpr):
-			self.resolve_path_expr(expr)
-		elif isinstance(expr, ast.BuiltinCallExpr):
-			for a in expr.args:
-				self.resolve_expr(a)
-		elif isinstance(expr, ast.CallExpr):
-			self.resolve_expr(expr.left)
-			for a in expr.args:
-				self.resolve_expr(a.expr)
-			if expr.has_err_handler():
-				self.resolve_expr(expr.err_handler.expr)
-		elif isinstance(expr, ast.ReturnExpr):
-			self.resolve_expr(expr.expr)
-		elif isinstance(expr, ast.RaiseExpr):
-			self.resolve_expr(expr.expr)
-		elif isinstance(expr, ast.Block):
-			for stmt in expr.stmts:
-				self.resolve_stmt(stmt)
-			if expr.is_expr: self.resolve_expr(expr.expr)
-		elif isinstance(expr, ast.IfExpr):
-			if expr.is_comptime:
-				if expr.branch_idx > -1:
-					self.resolve_expr(expr.branches[expr.branch_idx].expr)
-			else:
-				for b in expr.branches:
-					if not b.is_else: self.resolve_expr(b.cond)
-					self.resolve_expr(b.expr)
-		elif isinstance(expr, ast.MatchExpr):
-			self.resolve_expr(expr.expr)
+		if resolve := self.expr_resolvers[expr.__class__]:
+			resolve(expr)
+
+	def resolve_par_expr(self, expr):
+		self.resolve_expr(expr.expr)
+
+	def resolve_self_expr(self, expr):
+		if self_ := expr.scope.lookup("self"):
+			expr.typ = self_.typ
+		else:
+			report.error("cannot find `self` in this scope", expr.pos)
+
+	def resolve_self_ty_expr(self, expr):
+		if self.self_sym != None:
+			expr.typ = type.Type(self.self_sym)
+		else:
+			report.error("cannot resolve type for `Self`", expr.pos)
+
+	def resolve_type_node(self, expr):
+		self.resolve_type(expr.typ)
+
+	def resolve_tuple_literal(self, expr):
+		for e in expr.exprs:
+			self.resolve_expr(e)
+
+	def resolve_array_literal(self, expr):
+		for e in expr.elems:
+			self.resolve_expr(e)
+
+	def resolve_struct_literal(self, expr):
+		self.resolve_expr(expr.expr)
+		for f in expr.fields:
+			self.resolve_expr(f.expr)
+
+	def resolve_unary_expr(self, expr):
+		self.resolve_expr(expr.right)
+
+	def resolve_binary_expr(self, expr):
+		self.inside_is_comparation = expr.op in (Kind.KeyNotIs, Kind.KeyIs)
+		self.resolve_expr(expr.left)
+		self.resolve_expr(expr.right)
+
+	def resolve_postfix_expr(self, expr):
+		self.resolve_expr(expr.left)
+
+	def resolve_cast_expr(self, expr):
+		self.resolve_expr(expr.expr)
+		self.resolve_type(expr.typ)
+
+	def resolve_index_expr(self, expr):
+		self.resolve_expr(expr.left)
+		self.resolve_expr(expr.index)
+
+	def resolve_range_expr(self, expr):
+		if expr.has_start: self.resolve_expr(expr.start)
+		if expr.has_end: self.resolve_expr(expr.end)
+
+	def resolve_selector_expr(self, expr):
+		self.resolve_expr(expr.left)
+
+	def resolve_builtin_call_expr(self, expr):
+		for a in expr.args:
+			self.resolve_expr(a)
+
+	def resolve_call_expr(self, expr):
+		self.resolve_expr(expr.left)
+		for a in expr.args:
+			self.resolve_expr(a.expr)
+		if expr.has_err_handler() and not expr.err_handler.is_propagate:
+			self.resolve_expr(expr.err_handler.expr)
+
+	def resolve_return_expr(self, expr):
+		self.resolve_expr(expr.expr)
+
+	def resolve_raise_expr(self, expr):
+		self.resolve_expr(expr.expr)
+
+	def resolve_block(self, expr):
+		for stmt in expr.stmts:
+			self.resolve_stmt(stmt)
+		if expr.is_expr: self.resolve_expr(expr.expr)
+
+	def resolve_if_expr(self, expr):
+		if expr.is_comptime:
+			if expr.branch_idx > -1:
+				self.resolve_expr(expr.branches[expr.branch_idx].expr)
+		else:
 			for b in expr.branches:
-				for p in b.pats:
-					self.resolve_expr(p)
+				if not b.is_else: self.resolve_expr(b.cond)
 				self.resolve_expr(b.expr)
-		elif isinstance(expr, ast.GuardExpr):
-			self.resolve_expr(expr.expr)
-			if expr.has_cond:
-				self.resolve_expr(expr.cond)
+
+	def resolve_match_expr(self, expr):
+		self.resolve_expr(expr.expr)
+		for b in expr.branches:
+			for p in b.pats:
+				self.resolve_expr(p)
+			self.resolve_expr(b.expr)
+
+	def resolve_guard_expr(self, expr):
+		self.resolve_expr(expr.expr)
+		if expr.has_cond:
+			self.resolve_expr(expr.cond)
 
 	def find_symbol(self, symbol, name, pos):
 		if s := symbol.find(name):
@@ -473,15 +516,17 @@ class Resolver:
 				return True
 		elif isinstance(typ, type.Array):
 			if self.resolve_type(typ.typ):
-				if typ_size := self.eval_size_expr(typ.size):
-					if int(typ_size.lit) <= 0:
+				self.resolve_expr(typ.size)
+				size = self.comp.const_eval.eval_int(typ.size)
+				if size != None:
+					if size <= 0:
 						report.error(
-						    f"array size cannot be zero or negative (size: {typ_size.lit})",
+						    f"array size cannot be zero or negative (size: {size})",
 						    typ.size.pos
 						)
-					typ.size = typ_size
+					typ.size = ast.IntegerLiteral(str(size), typ.size.pos)
 					typ.resolve(
-					    self.comp.universe.add_or_get_array(typ.typ, typ_size)
+					    self.comp.universe.add_or_get_array(typ.typ, typ.size)
 					)
 					return True
 				report.error(
@@ -563,67 +608,27 @@ class Resolver:
 				report.error(f"expected type, found {typ.expr}", typ.expr.pos)
 		return False
 
-	def eval_size_expr(self, expr):
-		if isinstance(expr, ast.IntegerLiteral):
-			return expr
-		elif isinstance(expr, ast.ParExpr):
-			return self.eval_size_expr(expr.expr)
-		elif isinstance(expr, ast.BinaryExpr):
-			if left := self.eval_size_expr(expr.left):
-				if right := self.eval_size_expr(expr.right):
-					il = int(left.lit)
-					ir = int(right.lit)
-					if expr.op == Kind.Plus:
-						return ast.IntegerLiteral(str(il + ir), expr.pos)
-					elif expr.op == Kind.Minus:
-						return ast.IntegerLiteral(str(il - ir), expr.pos)
-					elif expr.op == Kind.Mult:
-						return ast.IntegerLiteral(str(il * ir), expr.pos)
-					elif expr.op == Kind.Div:
-						return ast.IntegerLiteral(str(il // ir), expr.pos)
-					elif expr.op == Kind.Mod:
-						return ast.IntegerLiteral(str(il % ir), expr.pos)
-					elif expr.op == Kind.Amp:
-						return ast.IntegerLiteral(str(il & ir), expr.pos)
-					elif expr.op == Kind.Pipe:
-						return ast.IntegerLiteral(str(il | ir), expr.pos)
-					elif expr.op == Kind.Xor:
-						return ast.IntegerLiteral(str(il ^ ir), expr.pos)
-					elif expr.op == Kind.Lshift:
-						return ast.IntegerLiteral(str(il << ir), expr.pos)
-					elif expr.op == Kind.Rshift:
-						return ast.IntegerLiteral(str(il >> ir), expr.pos)
-		elif isinstance(expr, ast.Ident):
-			if s := self.cur_sym.find(expr.name):
-				if isinstance(s, sym.Const):
-					if s.has_evaled_expr:
-						return s.evaled_expr
-					if evaled_expr := self.eval_size_expr(s.expr):
-						s.evaled_expr = evaled_expr
-						s.has_evaled_expr = True
-						return s.evaled_expr
-			else:
-				report.error(
-				    f"cannot find `{expr.name}` in this scope", expr.pos
-				)
-		elif isinstance(expr, ast.PathExpr):
-			self.resolve_path_expr(expr)
-			if not expr.has_error:
-				if isinstance(expr.field_info, sym.Const):
-					if expr.field_info.has_evaled_expr:
-						return expr.field_info.evaled_expr
-					if evaled_expr := self.eval_size_expr(expr.field_info.expr):
-						expr.field_info.evaled_expr = evaled_expr
-						expr.field_info.has_evaled_expr = True
-						return expr.field_info.evaled_expr
-		elif isinstance(expr, ast.BuiltinCallExpr):
-			if expr.name in ("sizeof", "alignof"):
-				size, align = self.comp.type_size(expr.args[0].typ)
-				if expr.name == "sizeof":
-					return ast.IntegerLiteral(str(size), expr.pos)
-				else:
-					return ast.IntegerLiteral(str(align), expr.pos)
-		return None
+	# The constants used by the size of an array can be declared later, or in
+	# another file, so they are resolved on demand, see `consteval.ConstEval`.
+	def resolve_const(self, const_sym):
+		if const_sym.is_resolved:
+			return
+		const_sym.is_resolved = True
+		old_sf = self.sf
+		old_cur_sym = self.cur_sym
+		old_self_sym = self.self_sym
+		self.sf = const_sym.sf
+		if isinstance(const_sym.parent, sym.Type):
+			self.cur_sym = const_sym.parent.parent
+			self.self_sym = const_sym.parent
+		else:
+			self.cur_sym = const_sym.parent
+		self.import_core_prelude()
+		self.resolve_type(const_sym.typ)
+		self.resolve_expr(const_sym.expr)
+		self.sf = old_sf
+		self.cur_sym = old_cur_sym
+		self.self_sym = old_self_sym
 
 	def check_imported_symbol(self, s, pos):
 		if s.name in self.sf.imported_symbols:
@@ -0,0 +1,157 @@
+# Copyright (C) 2022 The Rivet Team. All rights reserved.
+# Use of this source code is governed by an MIT license
+# that can be found in the LICENSE file.
+
+import os, re, mmap
+from array import array
+from bisect import bisect_left, bisect_right
+
+from . import token
+
+NEWLINE_RE = re.compile(r"\r\n?|\n")
+NEWLINE_BYTES_RE = re.compile(rb"\r\n?|\n")
+
+# Files of this size (in bytes) or larger are memory-mapped instead of
+# being read and decoded in full; set by `--mmap-threshold`.
+MMAP_THRESHOLD = 1 << 20
+
+# Every source file read by the compiler, so that the lexer and the
+# diagnostics share the same buffer and each file is only read once. The
+# files are released by `clear` once the package is built.
+SOURCES = {}
+
+def get(file, can_map = True):
+	if file in SOURCES:
+		return SOURCES[file]
+	size = os.path.getsize(file)
+	if can_map and size > 0 and size >= MMAP_THRESHOLD:
+		buf = MappedSourceBuffer(file)
+	else:
+		buf = SourceBuffer(file, open(file, encoding = 'UTF-8').read())
+	SOURCES[file] = buf
+	return buf
+
+def release(file):
+	# The tokens of the file cannot be used anymore, the diagnostics read it
+	# again.
+	if buf := SOURCES.pop(file, None):
+		buf.close()
+
+def clear():
+	for buf in SOURCES.values():
+		buf.close()
+	SOURCES.clear()
+
+class SourceBuffer:
+	# offsets are character offsets into `text`
+	data = None
+	newline_re = NEWLINE_RE
+
+	def __init__(self, file, text):
+		self.file = file
+		self.text = text
+		self._line_starts = None
+
+	def size(self):
+		return len(self.text)
+
+	def close(self):
+		pass
+
+	@property
+	def line_starts(self):
+		# offset of the first character of every line, computed on first
+		# use; `\n`, `\r\n` and `\r` are line breaks
+		if self._line_starts == None:
+			self._line_starts = array("I", [0])
+			self._line_starts.extend(
+			    m.end()
+			    for m in self.newline_re.finditer(self.data or self.text)
+			)
+		return self._line_starts
+
+	def lines_len(self):
+		# a line break at the end of the file doesn't start a new line
+		starts = self.line_starts
+		if len(starts) > 1 and starts[-1] == self.size():
+			return len(starts) - 1
+		return len(starts)
+
+	def line_of(self, offset):
+		return bisect_right(self.line_starts, offset) - 1
+
+	def col_of(self, line_start, offset):
+		return offset - line_start + 1
+
+	def pos(self, offset):
+		line = self.line_of(offset)
+		return token.Pos(
+		    self.file, line, self.col_of(self.line_starts[line], offset),
+		    offset
+		)
+
+	def slice(self, start, end):
+		return self.text[start:end]
+
+	def line(self, line_nr):
+		starts = self.line_starts
+		line_nr = min(line_nr, self.lines_len() - 1)
+		end = starts[line_nr + 1] if line_nr + 1 < len(starts) else self.size()
+		return self.slice(starts[line_nr], end).rstrip("\r\n")
+
+class MappedSourceBuffer(SourceBuffer):
+	# A memory-mapped file, never decoded as a whole; offsets are byte
+	# offsets into `data`. Unlike files read as text, line breaks are not
+	# translated to `\n`.
+	newline_re = NEWLINE_BYTES_RE
+
+	def __init__(self, file):
+		self.file = file
+		self.text = None
+		with open(file, "rb") as f:
+			self.data = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+		self._line_starts = None
+
+	def size(self):
+		return len(self.data)
+
+	def close(self):
+		self.data.close()
+
+	def col_of(self, line_start, offset):
+		# columns are still counted in characters; the EOF token that
+		# follows a trailing comment is one past the end
+		chars = self.data[line_start:offset].decode("utf-8", "replace")
+		return len(chars) + max(0, offset - len(self.data)) + 1
+
+	def slice(self, start, end):
+		return self.data[start:end].decode("utf-8", "replace")
+
+class SourceWindow(SourceBuffer):
+	# A decoded slice of a memory-mapped file starting at byte `start`, used
+	# to lex the tokens the bytes engine doesn't handle itself. Line breaks
+	# are translated to `\n` like in files read as text, and positions are
+	# reported in terms of the whole file.
+	def __init__(self, buf, start, chars):
+		# offsets of the `\n`s that were a `\r\n`
+		self.crlfs = array("I")
+		parts = chars.split("\r\n")
+		idx = 0
+		for part in parts[:-1]:
+			idx += len(part)
+			self.crlfs.append(idx)
+			idx += 1
+		SourceBuffer.__init__(
+		    self, buf.file, "\n".join(parts).replace("\r", "\n")
+		)
+		self.buf = buf
+		self.start = start
+
+	def offset(self, offset):
+		# byte offset in the file of the character at `offset`
+		return self.start + len(self.text[:offset].encode()) + bisect_left(
+		    self.crlfs, offset
+		) + max(0, offset - len(self.text))
+
+	def pos(self, offset):
+		return self.buf.pos(self.offset(offset))
@@ -2,6 +2,7 @@
 # Use of this source code is governed by an MIT license
 # that can be found in the LICENSE file.
 
+from array import array
 from enum import IntEnum as Enum, auto as auto_enum
 
 class Kind(Enum):
@@ -319,3 +320,56 @@ class Token:
 
 	def __repr__(self):
 		return f'rivet.Token(kind: "{self.kind}", lit: "{self.lit}", pos: "{self.pos}")'
+
+class LazyToken(Token):
+	# A token whose position is only computed, by `pos_of(offset)`, when a
+	# diagnostic or a node needs it.
+	def __init__(self, lit, kind, offset, pos_of):
+		self.lit = lit
+		self.kind = kind
+		self.offset = offset
+		self.pos_of = pos_of
+		self._pos = None
+
+	@property
+	def pos(self):
+		if self._pos == None:
+			self._pos = self.pos_of(self.offset)
+		return self._pos
+
+KINDS_BY_VALUE = [None] + list(Kind)
+
+class TokenBuffer:
+	# Compact, struct-of-arrays storage for the tokens of a file: kinds,
+	# offsets and literal indexes are stored in typed arrays and the
+	# literals in a deduplicated side table. `Token`s are created on demand
+	# by `__getitem__`.
+	def __init__(self, pos_of):
+		self.kinds = array("H")
+		self.offsets = array("I")
+		self.lit_idxs = array("I")
+		self.lits = [""]
+		self.lits_map = {"": 0}
+		self.pos_of = pos_of
+
+	def extend(self, tokens):
+		kinds, offsets, lit_idxs = self.kinds, self.offsets, self.lit_idxs
+		lits, lits_map = self.lits, self.lits_map
+		for lit, kind, offset in tokens:
+			kinds.append(kind)
+			offsets.append(offset)
+			idx = lits_map.get(lit)
+			if idx == None:
+				idx = len(lits)
+				lits.append(lit)
+				lits_map[lit] = idx
+			lit_idxs.append(idx)
+
+	def __len__(self):
+		return len(self.kinds)
+
+	def __getitem__(self, idx):
+		return LazyToken(
+		    self.lits[self.lit_idxs[idx]], KINDS_BY_VALUE[self.kinds[idx]],
+		    self.offsets[idx], self.pos_of
+		)
@@ -3,6 +3,7 @@
 # that can be found in the LICENSE file.
 
 import sys, subprocess
+from collections import deque
 
 from . import colors
 
@@ -18,6 +19,9 @@ Options:
 
    --pkg-type bin|lib|dylib|staticlib
       Specify the type of the package being built. By default: bin.
+      A `lib` package is compiled into a static archive and an interface
+      file (`<name>.rilib`) stored in `~/.rivet-lang/libs`, which are
+      loaded by the packages that declare `extern pkg <name>;`.
 
    -r, --release
       Compile the executable in release mode, where most optimizations are enabled.
@@ -40,7 +44,8 @@ Options:
       Define the provided flag.
 
    -L <path>
-      Add a directory to the library search path.
+      Add a directory to the library search path, where the interfaces of
+      the libraries are also searched.
 
    -os <name>, --target-os <name>
       Change the target OS that Rivet tries to compile for. By default, the
@@ -77,6 +82,73 @@ Options:
    --keep-c
       Don't remove the output C source file.
 
+   --split-c
+      Write a C file per module, with a shared header, into `<name>.ri.d`
+      instead of a single `<name>.ri.c`, and compile them in parallel (see
+      `-j`). With the object cache, only the files of the changed modules
+      are compiled again, as long as the types and the function prototypes
+      of the package are the same.
+
+   --legacy-lexer
+      Use the old character-by-character lexer instead of the table-driven
+      one. Both must produce the same tokens, this is useful to debug the
+      lexer.
+
+   --stream-tokens
+      Tokenize the files on demand while they are parsed, keeping only the
+      tokens being peeked at in memory instead of the whole token list.
+      Lexer and parser errors of a file may be reported interleaved.
+
+   --lazy-bodies
+      Only find the braces of the function bodies while parsing, and parse
+      them when they are first needed. Bodies that are never used, like
+      those of the functions disabled with `#[if]`, are never parsed. Has
+      no effect with `--check-syntax`. The syntax trees of the files are
+      not saved in the parse cache.
+
+   --mmap-threshold <bytes>
+      Memory-map the source files of this size or larger and scan their bytes
+      directly, decoding only names and literals. By default: 1048576 (1 MiB).
+
+   --no-parse-cache
+      Parse every file again instead of loading the syntax trees saved in
+      `~/.rivet-lang/cache/parse` by previous builds. The cache is keyed by
+      the contents of the files and the compiler, this is useful to debug
+      the parser.
+
+   --no-core-snapshot
+      Parse, resolve and check the `core` package again instead of loading the
+      snapshot saved in `~/.rivet-lang/cache/core` by previous builds. The
+      snapshot is keyed by the sources of `core`, the compiler, the target and
+      the defined flags.
+
+   --no-build-cache
+      Build the package even if it is up to date. The files read and written
+      by the last successful build without warnings are recorded, with the
+      settings of the build, in `~/.rivet-lang/objs/<pkg-name>`, and nothing
+      is done while none of them changes.
+
+   --no-object-cache
+      Compile the C files again instead of copying the object files saved in
+      `~/.rivet-lang/cache/objs` by previous builds. The cache is keyed by the
+      contents of the C files (and of their headers, for `c_compile`), the C
+      compiler and its options, and is shared by the concurrent builds.
+
+   --evict-object-cache <bytes>
+      Remove the least recently used object files from the object cache
+      until it is no larger than this size, and exit.
+
+   -j <number>
+      Parse the files in this number of processes. The files of the modules
+      are parsed ahead of time, the diagnostics are reported in the same
+      order as with one process. With `--split-c`, the C files are compiled
+      by this number of C compiler processes too. By default: 1.
+
+   --stats
+      Print statistics about the build when it finishes: the composite types
+      (results, optionals, arrays, slices and tuples) created in the
+      universe, and how many times an existing one was reused.
+
    -v, --verbose
       Print additional messages to the console.
 
@@ -287,117 +359,59 @@ def smart_quote(str, raw: bool):
 		result += current
 	return result
 
-class OrderedDepMap:
-	def __init__(self, keys = list(), data = {}):
-		self.keys = keys
-		self.data = data
-
-	def set(self, name, deps):
-		if name not in self.data:
-			self.keys.append(name)
-		self.data[name] = deps
-
-	def add(self, name, deps):
-		d = self.get(name)
-		for dep in deps:
-			if dep not in d:
-				d.append(dep)
-		self.set(name, d)
-
-	def get(self, name):
-		return self.data[name] if name in self.data else []
-
-	def delete(self, name):
-		if name not in self.data:
-			raise KeyError(f"OrderedDepMap.delete: no such key `{name}`")
-		for i, _ in enumerate(self.keys):
-			if self.keys[i] == name:
-				self.keys.pop(i)
-				break
-		self.data.pop(name)
-
-	def apply_diff(self, name, deps):
-		diff = []
-		deps_of_name = self.get(name)
-		for dep in deps_of_name:
-			if dep not in deps:
-				diff.append(dep)
-		self.set(name, diff)
-
-	def size(self):
-		return len(self.data)
-
 class DepGraphNode:
 	def __init__(self, name, deps):
 		self.name = name
 		self.deps = deps
 
-class NodeNames:
-	def __init__(self, is_cycle = dict(), names = dict()):
-		self.is_cycle = is_cycle
-		self.names = names
-
-	def is_part_of_cycle(self, name, already_seen):
-		seen = False
-		new_already_seen = already_seen.copy()
-		if name in self.is_cycle:
-			return self.is_cycle[name], new_already_seen
-
-		if name in already_seen:
-			new_already_seen.append(name)
-			self.is_cycle[name] = True
-			return True, new_already_seen
-
-		new_already_seen.append(name)
-		deps = self.names[name] if name in self.names else []
-		if len(deps) == 0:
-			self.is_cycle[name] = False
-			return False, new_already_seen
-
-		for d in deps:
-			d_already_seen = new_already_seen.copy()
-			seen, d_already_seen = self.is_part_of_cycle(d, d_already_seen)
-			if seen:
-				new_already_seen = d_already_seen.copy()
-				self.is_cycle[name] = True
-				return True, new_already_seen
-		self.is_cycle[name] = False
-		return False, new_already_seen
-
+# A dependency graph sorted with Kahn's algorithm: every node counts its
+# unresolved dependencies and lists the nodes that depend on it, so each
+# node and each edge is visited once. The dependencies that are not nodes
+# of the graph are ignored.
 class DepGraph:
-	def __init__(self, acyclic = True, nodes = list()):
+	def __init__(self, acyclic = True):
 		self.acyclic = acyclic
-		self.nodes = nodes
+		self.nodes = []
 
 	def add(self, name, deps):
 		self.nodes.append(DepGraphNode(name, deps))
 
-	def resolve(self):
-		node_names = OrderedDepMap()
-		node_deps = OrderedDepMap()
+	# Returns the nodes with their unique dependencies; the nodes added
+	# more than once are merged, like the dependencies of a name.
+	def node_deps(self):
+		node_deps = {}
 		for node in self.nodes:
-			node_names.add(node.name, node.deps)
-			node_deps.add(node.name, node.deps)
-		iterations = 0
+			deps = node_deps.setdefault(node.name, {})
+			for dep in node.deps:
+				deps[dep] = None
+		return node_deps
+
+	def resolve(self):
+		node_deps = self.node_deps()
+		indegree = {}
+		dependents = {name: [] for name in node_deps}
+		for name, deps in node_deps.items():
+			count = 0
+			for dep in deps:
+				if dep in dependents:
+					dependents[dep].append(name)
+					count += 1
+			indegree[name] = count
+		ready = deque(name for name, count in indegree.items() if count == 0)
 		resolved = DepGraph()
-		resolved.nodes = [] # fix bug
-		while node_deps.size() != 0:
-			iterations += 1
-			ready_set = []
-			for name in node_deps.keys:
-				if len(node_deps.get(name)) == 0:
-					ready_set.append(name)
-			if len(ready_set) == 0:
-				g = DepGraph()
-				g.acyclic = False
-				for name in node_deps.keys:
-					g.add(name, node_names.get(name))
-				return g
-			for name in ready_set:
-				node_deps.delete(name)
-				resolved.add(name, node_names.get(name))
-			for name in node_deps.keys:
-				node_deps.apply_diff(name, ready_set)
+		while ready:
+			name = ready.popleft()
+			resolved.add(name, list(node_deps[name]))
+			for dependent in dependents[name]:
+				indegree[dependent] -= 1
+				if indegree[dependent] == 0:
+					ready.append(dependent)
+		if len(resolved.nodes) != len(node_deps):
+			g = DepGraph(False)
+			for name, count in indegree.items():
+				if count > 0:
+					g.add(name, list(node_deps[name]))
+			return g
 		return resolved
 
 	def last_node(self):
@@ -410,17 +424,62 @@ class DepGraph:
 				out.append(f" * {node.name} -> {dep}")
 		return "\n".join(out)
 
+	# Finds the strongly connected components with Tarjan's algorithm,
+	# iteratively, and shows one cycle of each component.
 	def display_cycles(self):
-		seen = False
-		out = []
-		nn = NodeNames()
-		for node in self.nodes:
-			nn.names[node.name] = node.deps
-		for k, _ in nn.names.items():
-			cycle_names = []
-			if k in nn.is_cycle:
+		node_deps = self.node_deps()
+		edges = {
+		    name: [dep for dep in deps if dep in node_deps]
+		    for name, deps in node_deps.items()
+		}
+		index, lowlink, on_stack = {}, {}, set()
+		stack, out = [], []
+		for root in edges:
+			if root in index:
 				continue
-			seen, cycle_names = nn.is_part_of_cycle(k, cycle_names)
-			if seen:
-				out.append(" * " + " -> ".join(cycle_names))
+			work = [(root, 0)]
+			while work:
+				name, i = work.pop()
+				if i == 0:
+					index[name] = lowlink[name] = len(index)
+					stack.append(name)
+					on_stack.add(name)
+				deps = edges[name]
+				while i < len(deps):
+					dep = deps[i]
+					i += 1
+					if dep not in index:
+						work.append((name, i))
+						work.append((dep, 0))
+						break
+					elif dep in on_stack:
+						lowlink[name] = min(lowlink[name], index[dep])
+				else:
+					if lowlink[name] == index[name]:
+						component = set()
+						while True:
+							dep = stack.pop()
+							on_stack.discard(dep)
+							component.add(dep)
+							if dep == name:
+								break
+						if len(component) > 1 or name in edges[name]:
+							out.append(
+							    " * " +
+							    " -> ".join(self.cycle_in(edges, component, name))
+							)
+					if work:
+						parent = work[-1][0]
+						lowlink[parent] = min(lowlink[parent], lowlink[name])
 		return "\n".join(out)
+
+	# Follows the dependencies inside `component`, from `start`, until a
+	# name is repeated.
+	def cycle_in(self, edges, component, start):
+		path, seen = [], {}
+		name = start
+		while name not in seen:
+			seen[name] = len(path)
+			path.append(name)
+			name = next(dep for dep in edges[name] if dep in component)
+		return path[seen[name]:] + [name]
@@ -0,0 +1,63 @@
+# Copyright (C) 2022 The Rivet Team. All rights reserved.
+# Use of this source code is governed by an MIT license
+# that can be found in the LICENSE file.
+
+# Benchmark: time spent by the parser on the files of `lib/core`, per file
+# and per expression; the files are tokenized beforehand, so the lexer is
+# not measured.
+
+import glob, os, sys, time
+
+import utils
+
+sys.path.insert(0, os.getcwd())
+import src
+from src import parser
+from src.lexer import Lexer
+
+ROUNDS = 5
+PKG_DIR = "lib/core/src"
+
+def parse(comp, file, lexer):
+	p = parser.Parser(comp)
+	p.is_pkg_level = os.path.dirname(file) == PKG_DIR
+	lexer.tidx = 0
+	p.lexer = lexer
+	return p.parse_lexed_file(file)
+
+def count_exprs(comp, file, lexer):
+	count = 0
+	parse_expr = parser.Parser.parse_expr
+
+	def counting_parse_expr(self):
+		nonlocal count
+		count += 1
+		return parse_expr(self)
+
+	parser.Parser.parse_expr = counting_parse_expr
+	try:
+		parse(comp, file, lexer)
+	finally:
+		parser.Parser.parse_expr = parse_expr
+	return count
+
+def bench_parser():
+	FILES = sorted(glob.glob(f"{PKG_DIR}/**/*.ri", recursive = True))
+	comp = src.Compiler(["--check-syntax", "--no-parse-cache"])
+	lexers = [(file, Lexer.from_file(file)) for file in FILES]
+	exprs = sum(count_exprs(comp, file, lexer) for file, lexer in lexers)
+	best = None
+	for _ in range(ROUNDS):
+		start = time.perf_counter()
+		for file, lexer in lexers:
+			parse(comp, file, lexer)
+		elapsed = time.perf_counter() - start
+		if best == None or elapsed < best:
+			best = elapsed
+	utils.eprint(
+	    f"parsed {len(FILES)} files ({exprs} expressions) in {best*1000:.1f}ms, "
+	    f"{best*1e6/exprs:.2f}us per expression (best of {ROUNDS})"
+	)
+
+if __name__ == "__main__":
+	bench_parser()
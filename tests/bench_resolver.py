@@ -0,0 +1,88 @@
+# Copyright (C) 2022 The Rivet Team. All rights reserved.
+# Use of this source code is governed by an MIT license
+# that can be found in the LICENSE file.
+
+# Benchmark: time spent by the resolver (including the register) on
+# generated packages with a growing number of symbols. Every function
+# refers to its own struct, to composite types of it and to the previous
+# function, so the package and the universe grow together. A second set of
+# packages has a single function with many locals declared in deeply
+# nested blocks, to measure the cost of the scopes.
+
+import os, sys, tempfile, time
+
+import utils
+
+sys.path.insert(0, os.getcwd())
+import src
+from src import report, source
+from src.ast import sym
+
+ROUNDS = 3
+SIZES = (250, 1000, 4000)
+LOCALS = (200, 800, 3200)
+
+def gen_package(dir, size):
+	with open(os.path.join(dir, "main.ri"), "w") as f:
+		for i in range(size):
+			f.write(f"struct S{i} {{ a: i32; }}\n")
+			f.write(f"fn f{i}(s: S{i}, o: ?S{i}, a: [S{i}; 2]) (S{i}, i32) {{\n")
+			if i > 0:
+				f.write(f"    let _ = f{i-1};\n")
+			f.write("    return (s, o.?.a + a[0].a);\n}\n")
+		f.write("fn main() {}\n")
+
+def gen_locals_package(dir, size):
+	with open(os.path.join(dir, "main.ri"), "w") as f:
+		f.write("fn main() {\n    let mut t = 0;\n")
+		for i in range(size):
+			f.write(f"    let v{i} = {i};\n")
+			if i % 20 == 19:
+				f.write("    {\n")
+			f.write(f"    t += v{i} + v{i // 2};\n")
+		f.write("    }\n" * (size // 20))
+		f.write("}\n")
+
+def resolve(dir):
+	# the universe must be the first symbol, see `sym.Sym.is_universe`
+	sym.SYMBOL_COUNT = 0
+	# the files of the previous rounds, see `source.SOURCES`
+	source.clear()
+	comp = src.Compiler(["--check", "--no-parse-cache", dir])
+	# `core` and the package are parsed and resolved together
+	comp.parse_files(comp.prefs.core_inputs + comp.prefs.inputs)
+	start = time.perf_counter()
+	comp.resolver.resolve_files(comp.source_files)
+	elapsed = time.perf_counter() - start
+	if report.ERRORS > 0:
+		comp.abort()
+	syms = len(comp.universe.syms) + len(comp.pkg_sym.syms)
+	return elapsed, syms
+
+def best_of(gen, size):
+	with tempfile.TemporaryDirectory() as dir:
+		gen(dir, size)
+		best = None
+		for _ in range(ROUNDS):
+			elapsed, syms = resolve(dir)
+			if best == None or elapsed < best:
+				best = elapsed
+	return best, syms
+
+def bench_resolver():
+	for size in SIZES:
+		best, syms = best_of(gen_package, size)
+		utils.eprint(
+		    f"{syms} symbols: resolved in {best*1000:.1f}ms, "
+		    f"{best*1e6/syms:.2f}us per symbol (best of {ROUNDS})"
+		)
+	for size in LOCALS:
+		best, _ = best_of(gen_locals_package, size)
+		utils.eprint(
+		    f"{size} locals in {size // 20} nested blocks: resolved in "
+		    f"{best*1000:.1f}ms, {best*1e6/size:.2f}us per local "
+		    f"(best of {ROUNDS})"
+		)
+
+if __name__ == "__main__":
+	bench_resolver()
@@ -0,0 +1,63 @@
+# Copyright (C) 2022 The Rivet Team. All rights reserved.
+# Use of this source code is governed by an MIT license
+# that can be found in the LICENSE file.
+
+# Benchmark: time spent by `AST2RIR.sort_type_symbols` ordering the types of
+# generated packages with a growing number of structs, tuples, arrays and
+# unions. Every struct contains the next one, so the types are declared in
+# the reverse order of their definitions in C.
+
+import os, sys, tempfile, time
+
+import utils
+
+sys.path.insert(0, os.getcwd())
+import src
+from src import report, source
+from src.ast import sym
+
+ROUNDS = 3
+SIZES = (1000, 4000, 16000)
+
+def gen_package(dir, size):
+	with open(os.path.join(dir, "main.ri"), "w") as f:
+		for i in range(size):
+			f.write(f"union U{i} {{ S{i+1}, i32 }}\n")
+			f.write(
+			    f"struct S{i} {{ a: S{i+1}; b: (S{i+1}, U{i}); c: [S{i+1}; 2]; }}\n"
+			)
+		f.write(f"struct S{size} {{ a: i32; }}\n")
+		f.write("fn main() {}\n")
+
+def sort_types(dir):
+	# the universe must be the first symbol, see `sym.Sym.is_universe`
+	sym.SYMBOL_COUNT = 0
+	# the files of the previous rounds, see `source.SOURCES`
+	source.clear()
+	comp = src.Compiler(["--check", "--no-parse-cache", dir])
+	# `core` and the package are parsed and resolved together
+	comp.parse_files(comp.prefs.core_inputs + comp.prefs.inputs)
+	comp.resolver.resolve_files(comp.source_files)
+	if report.ERRORS > 0:
+		comp.abort()
+	tss = comp.ast2rir.get_type_symbols(comp.universe)
+	start = time.perf_counter()
+	comp.ast2rir.sort_type_symbols(tss)
+	return time.perf_counter() - start, len(tss)
+
+def bench_types():
+	for size in SIZES:
+		with tempfile.TemporaryDirectory() as dir:
+			gen_package(dir, size)
+			best = None
+			for _ in range(ROUNDS):
+				elapsed, types = sort_types(dir)
+				if best == None or elapsed < best:
+					best = elapsed
+		utils.eprint(
+		    f"{types} types: sorted in {best*1000:.1f}ms, "
+		    f"{best*1e6/types:.2f}us per type (best of {ROUNDS})"
+		)
+
+if __name__ == "__main__":
+	bench_types()
@@ -0,0 +1,99 @@
+# Copyright (C) 2022 The Rivet Team. All rights reserved.
+# Use of this source code is governed by an MIT license
+# that can be found in the LICENSE file.
+
+# Benchmark: time spent by each stage that visits the AST (or the RIR) of
+# `lib/core`, per visited node. The nodes are counted in a separate run,
+# through the entry point of each visitor.
+
+import os, sys, tempfile, time
+
+import utils
+
+sys.path.insert(0, os.getcwd())
+import src
+from src import report, source, register, resolver, checker, codegen
+from src.ast import sym
+from src.codegen import c
+
+ROUNDS = 5
+
+# (stage, class, entry points)
+VISITORS = (
+    ("register", register.Register, ("visit_expr", )),
+    ("resolver", resolver.Resolver, ("resolve_expr", )),
+    ("checker", checker.Checker, ("check_expr", )),
+    ("ast2rir", codegen.AST2RIR, ("convert_expr", "convert_stmt")),
+    ("cgen", c.Gen, ("gen_inst", )),
+)
+
+def build(dir):
+	# the universe must be the first symbol, see `sym.Sym.is_universe`
+	sym.SYMBOL_COUNT = 0
+	# the files of the previous rounds, see `source.SOURCES`
+	source.clear()
+	comp = src.Compiler(["--no-parse-cache", dir])
+	# `core` and the package are parsed and resolved together
+	comp.parse_files(comp.prefs.core_inputs + comp.prefs.inputs)
+	times = {}
+	start = time.perf_counter()
+	comp.resolver.resolve_files(comp.source_files)
+	times["resolver"] = time.perf_counter() - start
+	if report.ERRORS > 0:
+		comp.abort()
+	comp.load_core_pkg()
+	start = time.perf_counter()
+	comp.checker.check_files(comp.source_files)
+	times["checker"] = time.perf_counter() - start
+	start = time.perf_counter()
+	rir = comp.ast2rir.convert(comp.core_files, comp.source_files)
+	times["ast2rir"] = time.perf_counter() - start
+	start = time.perf_counter()
+	comp.cgen.gen(rir)
+	times["cgen"] = time.perf_counter() - start
+	return times
+
+def count_nodes(dir):
+	counts = {}
+	originals = []
+
+	def counting(stage, method):
+		def visit(self, node):
+			counts[stage] += 1
+			return method(self, node)
+
+		return visit
+
+	for stage, cls, names in VISITORS:
+		counts[stage] = 0
+		for name in names:
+			method = getattr(cls, name)
+			originals.append((cls, name, method))
+			setattr(cls, name, counting(stage, method))
+	try:
+		build(dir)
+	finally:
+		for cls, name, method in originals:
+			setattr(cls, name, method)
+	# the register runs inside `Resolver.resolve_files`
+	counts["resolver"] += counts.pop("register")
+	return counts
+
+def bench_visitors():
+	with tempfile.TemporaryDirectory() as dir:
+		with open(os.path.join(dir, "main.ri"), "w") as f:
+			f.write("fn main() {}\n")
+		counts = count_nodes(dir)
+		best = {}
+		for _ in range(ROUNDS):
+			for stage, elapsed in build(dir).items():
+				if stage not in best or elapsed < best[stage]:
+					best[stage] = elapsed
+	for stage, elapsed in best.items():
+		utils.eprint(
+		    f"{stage}: {counts[stage]} nodes in {elapsed*1000:.1f}ms, "
+		    f"{elapsed*1e6/counts[stage]:.2f}us per node (best of {ROUNDS})"
+		)
+
+if __name__ == "__main__":
+	bench_visitors()
@@ -2,8 +2,10 @@
 # Use of this source code is governed by an MIT license
 # that can be found in the LICENSE file.
 
-import run_failing_tests, run_ok_tests
+import run_build_cache_tests, run_failing_tests, run_lib_tests, run_ok_tests
 
 exit_code = run_ok_tests.run_tests()
-exit_code = run_failing_tests.run_fail_tests()
+exit_code |= run_failing_tests.run_fail_tests()
+exit_code |= run_lib_tests.run_lib_tests()
+exit_code |= run_build_cache_tests.run_build_cache_tests()
 exit(exit_code)
@@ -0,0 +1,220 @@
+# Copyright (C) 2022 The Rivet Team. All rights reserved.
+# Use of this source code is governed by an MIT license
+# that can be found in the LICENSE file.
+
+# Builds a generated package several times, changing it between the builds,
+# to check that the build manifest skips a build only when nothing changed
+# (including the headers of the `c_compile` files),
+# that an object from the object cache gives the same binary and that
+# `--split-c` only compiles again the modules that changed.
+
+import os, sys, random, tempfile
+
+import utils
+
+CC = os.getenv("RIVET_CC_TEST")
+CC = CC if CC else "gcc"
+
+IS_WINDOWS = sys.platform == "win32"
+PKG_NAME = "test_cache"
+LIB_NAME = "test_cache_lib"
+
+# the cache entries of previous runs must not be reused
+NONCE = random.randrange(1000, 1000000)
+
+MAIN = """extern pkg test_cache_lib;
+
+mod geo {
+    pub fn scale(x: i32) i32 {
+        return x * FACTOR;
+    }
+}
+
+fn main() {
+    println("{}", geo::scale(test_cache_lib::value()));
+}
+"""
+
+# the attributes of the package replace those of `core`
+C_MAIN = """#![c_compile("C_FILE")]
+#![c_compile("thirdparty/libbacktrace/backtrace.c")]
+
+extern (C) {
+    fn get_val() i32;
+}
+
+fn main() {
+    println("{}", unsafe { get_val() });
+}
+"""
+
+C_FILE = """#include "val.h"
+
+int get_val(void) {
+    return VAL;
+}
+"""
+
+LIB = """pub fn value() i32 {
+    return VALUE;
+}
+"""
+
+class BuildCacheTests:
+	def __init__(self, dir):
+		self.dir = dir
+		self.pkg_dir = os.path.join(dir, "pkg")
+		self.lib_dir = os.path.join(dir, "lib")
+		self.c_pkg_dir = os.path.join(dir, "c_pkg")
+		os.makedirs(self.pkg_dir)
+		os.makedirs(self.lib_dir)
+		os.makedirs(self.c_pkg_dir)
+		self.exit_code = 0
+
+	def write(self, dir, name, text):
+		with open(os.path.join(dir, name), "w") as f:
+			f.write(text)
+
+	def write_main(self, factor):
+		self.write(self.pkg_dir, "main.ri", MAIN.replace("FACTOR", str(factor)))
+
+	def write_lib(self, value):
+		self.write(self.lib_dir, "lib.ri", LIB.replace("VALUE", str(value)))
+
+	def exe(self, name):
+		return os.path.join(self.dir, f"{name}.exe" if IS_WINDOWS else name)
+
+	def rivetc(self, *args):
+		return utils.run_process(
+		    sys.executable, "rivetc.py", "-v", "-cc", CC, *args
+		)
+
+	def build_lib(self):
+		return self.rivetc(
+		    "--pkg-type", "lib", "--pkg-name", LIB_NAME, self.lib_dir
+		)
+
+	def build(self, *args, output = "test", pkg_dir = None):
+		return self.rivetc(
+		    "--pkg-name", PKG_NAME, "-o", self.exe(output), *args, pkg_dir
+		    or self.pkg_dir
+		)
+
+	def run(self, output = "test"):
+		return utils.run_process(self.exe(output)).out
+
+	def check(self, name, ok, res = None):
+		if ok:
+			utils.eprint(utils.bold(utils.green(" [ PASS ] ")), name)
+		else:
+			utils.eprint(utils.bold(utils.red(" [ FAIL ] ")), name)
+			if res != None:
+				utils.eprint(res.err)
+			self.exit_code = 1
+
+	def check_build(
+	    self, name, res, expected, up_to_date = False, output = "test"
+	):
+		is_up_to_date = "is up to date" in res.err
+		self.check(
+		    name, res.exit_code == 0 and is_up_to_date == up_to_date
+		    and self.run(output) == expected, res
+		)
+
+	def build_c_pkg(self):
+		return self.build(output = "c_test", pkg_dir = self.c_pkg_dir)
+
+	def run_manifest_tests(self):
+		self.write_lib(2)
+		res = self.build_lib()
+		self.check("library build", res.exit_code == 0, res)
+		self.write_main(NONCE)
+		self.check_build("first build", self.build(), str(2 * NONCE))
+		self.check_build(
+		    "build skipped when nothing changed", self.build(),
+		    str(2 * NONCE), True
+		)
+		self.write_main(NONCE + 1)
+		self.check_build(
+		    "build after a file is edited", self.build(), str(2 * (NONCE + 1))
+		)
+		self.write(self.pkg_dir, "extra.ri", "pub fn extra() {}\n")
+		self.check_build(
+		    "build after a file is added", self.build(), str(2 * (NONCE + 1))
+		)
+		self.write_lib(3)
+		self.build_lib()
+		self.check_build(
+		    "build after a library is changed", self.build(),
+		    str(3 * (NONCE + 1))
+		)
+
+	def run_c_compile_tests(self):
+		# only a header included by a `c_compile` file changes
+		c_file = os.path.join(self.c_pkg_dir, "val.c").replace("\\", "/")
+		self.write(self.c_pkg_dir, "val.c", C_FILE)
+		self.write(
+		    self.c_pkg_dir, "main.ri", C_MAIN.replace("C_FILE", c_file)
+		)
+		self.write(self.c_pkg_dir, "val.h", f"#define VAL {NONCE}\n")
+		self.check_build(
+		    "build with a `c_compile` file", self.build_c_pkg(), str(NONCE),
+		    output = "c_test"
+		)
+		self.write(self.c_pkg_dir, "val.h", f"#define VAL {NONCE + 1}\n")
+		self.check_build(
+		    "build after a header of a `c_compile` file is edited",
+		    self.build_c_pkg(), str(NONCE + 1), output = "c_test"
+		)
+		self.check_build(
+		    "build skipped when the headers did not change",
+		    self.build_c_pkg(), str(NONCE + 1), True, "c_test"
+		)
+
+	def run_object_cache_tests(self):
+		self.build("--no-build-cache")
+		res = self.build("--no-build-cache", "--stats", output = "cached")
+		self.check(
+		    "object cache hit", res.exit_code == 0
+		    and ", 0 misses" in res.err, res
+		)
+		res = self.build(
+		    "--no-build-cache", "--no-object-cache", output = "uncached"
+		)
+		with open(self.exe("cached"), "rb") as f:
+			cached = f.read()
+		with open(self.exe("uncached"), "rb") as f:
+			uncached = f.read()
+		self.check(
+		    "same binary with and without the object cache",
+		    res.exit_code == 0 and cached == uncached, res
+		)
+
+	def run_split_c_tests(self):
+		res = self.build("--split-c", "-j", "2")
+		self.check_build("build with `--split-c`", res, str(3 * (NONCE + 1)))
+		self.write_main(NONCE + 2)
+		res = self.build("--split-c", "-j", "2", "--stats")
+		self.check_build(
+		    "build with `--split-c` after a module is edited", res,
+		    str(3 * (NONCE + 2))
+		)
+		self.check(
+		    "only the edited module is compiled again",
+		    res.exit_code == 0 and ", 1 misses" in res.err, res
+		)
+
+def run_build_cache_tests():
+	HEADER = "------------------- Running build cache tests -------------------"
+	utils.eprint(utils.bold(HEADER))
+	with tempfile.TemporaryDirectory() as dir:
+		tests = BuildCacheTests(dir)
+		tests.run_manifest_tests()
+		tests.run_c_compile_tests()
+		tests.run_object_cache_tests()
+		tests.run_split_c_tests()
+	utils.eprint(utils.bold("-" * len(HEADER)))
+	return tests.exit_code
+
+if __name__ == "__main__":
+	exit(run_build_cache_tests())
@@ -0,0 +1,72 @@
+# Copyright (C) 2022 The Rivet Team. All rights reserved.
+# Use of this source code is governed by an MIT license
+# that can be found in the LICENSE file.
+
+# Differential test: the fast and the legacy lexer must produce exactly the
+# same token stream (kind, literal and position) for every source file. The
+# bytes engine, used for memory-mapped files, is compared too, except for
+# the offsets which are byte offsets there.
+
+import glob, os, sys, time
+
+import utils
+
+sys.path.insert(0, os.getcwd())
+from src.lexer import Lexer
+from src.token import Kind
+from src import source
+
+MODES = ("legacy", "fast", "mapped")
+
+def tokens(file, mode):
+	source.release(file)
+	source.MMAP_THRESHOLD = 0 if mode == "mapped" else 1 << 62
+	lexer = Lexer.from_file(file, mode == "legacy")
+	res = []
+	while True:
+		t = lexer.next()
+		if mode == "mapped":
+			res.append((t.kind, t.lit, t.pos.line, t.pos.col))
+		else:
+			res.append((t.kind, t.lit, t.pos.line, t.pos.col, t.pos.pos))
+		if t.kind == Kind.EOF:
+			return res
+
+def run_lexer_diff():
+	exit_code = 0
+	FILES = glob.glob("lib/**/*.ri", recursive = True) + glob.glob(
+	    "tests/**/*.ri", recursive = True
+	) + glob.glob("examples/**/*.ri", recursive = True)
+	HEADER = f"------------------ Comparing lexers on {len(FILES)} files ------------------"
+
+	utils.eprint(utils.bold(HEADER))
+	times = [0.0] * len(MODES)
+	for file in FILES:
+		streams = []
+		for i, mode in enumerate(MODES):
+			start = time.perf_counter()
+			streams.append(tokens(file, mode))
+			times[i] += time.perf_counter() - start
+		# the mapped stream is compared without the offsets
+		expected = [streams[0], streams[0], [t[:4] for t in streams[0]]]
+		for i in range(1, len(MODES)):
+			if streams[i] != expected[i]:
+				utils.eprint(
+				    utils.bold(utils.red(" [ FAIL ] ")), f"{file} ({MODES[i]})"
+				)
+				for old, new in zip(expected[i], streams[i]):
+					if old != new:
+						utils.eprint(f"    legacy: {old}\n    {MODES[i]}: {new}")
+						break
+				exit_code = 1
+	utils.eprint(
+	    " " + ", ".join(
+	        f"{mode}: {t*1000:.1f}ms" for mode, t in zip(MODES, times)
+	    )
+	)
+	utils.eprint(utils.bold("-" * len(HEADER)))
+
+	return exit_code
+
+if __name__ == "__main__":
+	exit(run_lexer_diff())
@@ -0,0 +1,57 @@
+# Copyright (C) 2022 The Rivet Team. All rights reserved.
+# Use of this source code is governed by an MIT license
+# that can be found in the LICENSE file.
+
+# Builds the library packages of `tests/libs` with `--pkg-type lib`, the
+# dependencies first, and the binary of `tests/libs/app` that loads them with
+# `extern pkg`.
+
+import sys, os
+
+import utils
+
+CC = os.getenv("RIVET_CC_TEST")
+CC = CC if CC else "gcc"
+
+LIBS = ("test_base", "test_derived", "test_ea", "test_eb")
+
+def run_lib_tests():
+	exit_code = 0
+
+	IS_WINDOWS = sys.platform == "win32"
+	HEADER = f"------------------- Running {len(LIBS)} library tests -------------------"
+	TEST_EXE = "test.exe" if IS_WINDOWS else "test"
+
+	utils.eprint(utils.bold(HEADER))
+	for lib in LIBS:
+		dir = os.path.join("tests", "libs", lib)
+		res = utils.run_process(
+		    sys.executable, "rivetc.py", "--pkg-type", "lib", "--pkg-name", lib,
+		    "-cc", CC, dir
+		)
+		if res.exit_code == 0:
+			utils.eprint(utils.bold(utils.green(" [ PASS ] ")), dir)
+		else:
+			utils.eprint(utils.bold(utils.red(" [ FAIL ] ")), dir)
+			utils.eprint(res.err)
+			exit_code = res.exit_code
+	if exit_code == 0:
+		dir = os.path.join("tests", "libs", "app")
+		res = utils.run_process(
+		    sys.executable, "rivetc.py", "-o", TEST_EXE, "-cc", CC, dir
+		)
+		if res.exit_code == 0:
+			res = utils.run_process(".\\test.exe" if IS_WINDOWS else "./test")
+			os.remove(TEST_EXE)
+		if res.exit_code == 0:
+			utils.eprint(utils.bold(utils.green(" [ PASS ] ")), dir)
+		else:
+			utils.eprint(utils.bold(utils.red(" [ FAIL ] ")), dir)
+			utils.eprint(res.err)
+			exit_code = res.exit_code
+	utils.eprint(utils.bold("-" * len(HEADER)))
+
+	return exit_code
+
+if __name__ == "__main__":
+	exit(run_lib_tests())